@@ -0,0 +1,72 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import time
+import argparse
+import numpy as np
+from src.core.text_artifacts import get_text_artifact
+from src.core.chunking import token_chunks
+from src.core.segmentation import split_sentences
+from src.core.hashing_embeddings import HashingEmbedder
+
+# Compare the hashed TF-IDF backend against all-mpnet-base-v2 on a sample
+# policy set: embedding throughput, self-retrieval recall@k (a sentence taken
+# from each chunk must retrieve that chunk) and, given regulations, top-k
+# overlap with mpnet's evidence.
+# Usage: python scripts/bench_embedding_backends.py policies/*.pdf [--regulations regs.json] [--top-k 3] [--no-sbert]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("pdfs", nargs="+")
+parser.add_argument("--regulations", help="regulations JSON with Requirement_Text")
+parser.add_argument("--top-k", type=int, default=3)
+parser.add_argument("--no-sbert", action="store_true", help="only benchmark the hashing backend")
+args = parser.parse_args()
+
+chunks = []
+for path in args.pdfs:
+    chunks.extend(c["text"] for c in token_chunks(get_text_artifact(path).text))
+# Middle sentence of each multi-sentence chunk is its pseudo-query
+probes = []
+for i, chunk in enumerate(chunks):
+    sentences = split_sentences(chunk)
+    if len(sentences) >= 2:
+        probes.append((i, sentences[len(sentences) // 2]))
+regs = []
+if args.regulations:
+    regs = [r.get("Requirement_Text", "") for r in json.load(open(args.regulations, encoding="utf-8"))]
+print(f"{len(chunks)} chunks, {len(probes)} probes, {len(regs)} regulations")
+
+backends = [("hashing", HashingEmbedder().encode)]
+if not args.no_sbert:
+    from src.core.embedding_service import get_embedding_service
+    backends.append(("mpnet", get_embedding_service("all-mpnet-base-v2").encode))
+
+
+def top_k(queries, docs, k):
+    q = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    d = docs / np.maximum(np.linalg.norm(docs, axis=1, keepdims=True), 1e-12)
+    sims = q @ d.T
+    k = min(k, sims.shape[1])
+    return np.argsort(-sims, axis=1)[:, :k]
+
+
+reg_hits = {}
+for name, encode in backends:
+    encode(chunks[:8])  # warm up (model load, caches)
+    t = time.perf_counter()
+    doc_vecs = np.asarray(encode(chunks), dtype=np.float32)
+    seconds = time.perf_counter() - t
+
+    recall = 0.0
+    if probes:
+        hits = top_k(np.asarray(encode([p for _, p in probes]), dtype=np.float32), doc_vecs, args.top_k)
+        recall = float(np.mean([i in row for (i, _), row in zip(probes, hits)]))
+    if regs:
+        reg_hits[name] = top_k(np.asarray(encode(regs), dtype=np.float32), doc_vecs, args.top_k)
+
+    print(f"{name:<8} dim={doc_vecs.shape[1]:>5} embed={seconds:.3f}s "
+          f"throughput={len(chunks) / max(seconds, 1e-9):.0f} chunks/s recall@{args.top_k}={recall:.3f}")
+
+if "hashing" in reg_hits and "mpnet" in reg_hits:
+    overlap = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(reg_hits["hashing"], reg_hits["mpnet"])])
+    print(f"regulation evidence overlap@{args.top_k} hashing vs mpnet: {overlap:.3f}")
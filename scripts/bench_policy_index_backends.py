@@ -0,0 +1,71 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import time
+import hashlib
+import argparse
+import tempfile
+import numpy as np
+from src.core.policy_index import PolicyIndex
+from src.core.memmap_index import MemmapPolicyIndex
+
+# Compare Chroma (HNSW) against the memmap brute-force backend on synthetic
+# 100 / 1,000 / 10,000 chunk documents. Embeddings are deterministic random
+# vectors so both backends index identical data at negligible embedding cost.
+# Usage: python scripts/bench_policy_index_backends.py [--sizes 100 1000 10000] [--queries 50]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+parser.add_argument("--queries", type=int, default=50, help="regulations per audit")
+parser.add_argument("--dim", type=int, default=384)
+parser.add_argument("--top-k", type=int, default=1)
+args = parser.parse_args()
+
+
+class HashEmbedding:
+    """Deterministic pseudo-embeddings keyed by text hash."""
+
+    def __call__(self, input):
+        out = []
+        for text in input:
+            seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+            out.append(np.random.default_rng(seed).standard_normal(args.dim).astype(np.float32).tolist())
+        return out
+
+
+def run(index, doc_hash, chunks, queries):
+    t = time.perf_counter()
+    collection, _ = index.get_or_build(doc_hash, lambda: chunks)
+    build = time.perf_counter() - t
+
+    t = time.perf_counter()
+    collection, reused = index.get_or_build(doc_hash, lambda: chunks)
+    reopen = time.perf_counter() - t
+    assert reused
+
+    t = time.perf_counter()
+    result = collection.query(query_embeddings=queries, n_results=args.top_k,
+                              include=["documents", "distances", "metadatas"])
+    search = time.perf_counter() - t
+    return build, reopen, search, [d[0] for d in result["documents"]]
+
+
+ef = HashEmbedding()
+queries = ef([f"regulation requirement {i}" for i in range(args.queries)])
+
+with tempfile.TemporaryDirectory() as tmp:
+    backends = [
+        ("chroma", PolicyIndex(persist_dir=os.path.join(tmp, "chroma"), embedding_function=ef, embedding_model="bench")),
+        ("memmap-f16", MemmapPolicyIndex(persist_dir=os.path.join(tmp, "f16"), dtype="float16", embedding_function=ef, embedding_model="bench")),
+        ("memmap-int8", MemmapPolicyIndex(persist_dir=os.path.join(tmp, "int8"), dtype="int8", embedding_function=ef, embedding_model="bench")),
+    ]
+    for size in args.sizes:
+        chunks = [f"policy chunk {size}-{i}" for i in range(size)]
+        doc_hash = hashlib.sha256(f"bench-{size}".encode()).hexdigest()
+        baseline = None
+        for name, index in backends:
+            build, reopen, search, top = run(index, doc_hash, chunks, queries)
+            if baseline is None:
+                baseline = top
+            agree = sum(a == b for a, b in zip(top, baseline)) / len(top)
+            print(f"chunks={size:>6} {name:<11} build={build:.4f}s reopen={reopen:.4f}s "
+                  f"search={search:.4f}s top1_agreement_vs_chroma={agree:.2f}")
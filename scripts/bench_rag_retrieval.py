@@ -0,0 +1,28 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import argparse
+from src.core.RAG import ComplianceChecker
+
+# Compare per-regulation vs batched retrieval on the same policy/regulation set.
+# Usage: python scripts/bench_rag_retrieval.py policy.pdf sample_regulations.cleaned.json [--repeat 200]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("pdf_path")
+parser.add_argument("regulations_json")
+parser.add_argument("--repeat", type=int, default=1, help="replicate the regulation list N times")
+args = parser.parse_args()
+
+regs = json.load(open(args.regulations_json, encoding="utf-8")) * args.repeat
+
+checker = ComplianceChecker(pdf_path=args.pdf_path, regulations=regs)
+# Narratives are not part of the retrieval comparison
+checker.narrative_batching = False
+checker.generate_llm_narrative = lambda reg_text, evidence_chunk: "skipped"
+
+for batched in (False, True):
+    checker.run_check(batched=batched)
+    t = checker.stage_timings
+    print(f"batched={batched}: regulations={t['regulations']} "
+          f"embed={t.get('embed_queries', '-')}s retrieval={t['retrieval']}s "
+          f"scoring={t['scoring']}s total={t['total'] - t['narratives']:.4f}s")
@@ -0,0 +1,21 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import time
+import argparse
+from src.core.regulation_recommender import build_regulation_index, SOURCES, REG_INDEX_BATCH
+
+# Build the regulation recommender index (federal granules, eCFR titles,
+# Michigan rules) in checkpointed batches. Re-running resumes after the last
+# finished batch; --restart starts over.
+# Usage: python scripts/build_regulation_index.py [--sources cfr] [--cfr-titles 45 21] [--batch-size 256] [--restart]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sources", nargs="+", default=list(SOURCES), choices=list(SOURCES))
+parser.add_argument("--cfr-titles", type=int, nargs="+", default=list(range(1, 51)))
+parser.add_argument("--batch-size", type=int, default=REG_INDEX_BATCH)
+parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and rebuild everything")
+args = parser.parse_args()
+
+t = time.perf_counter()
+stats = build_regulation_index(args.sources, args.cfr_titles, batch_size=args.batch_size, restart=args.restart)
+print(f"Regulation index: {stats} in {time.perf_counter() - t:.1f}s")
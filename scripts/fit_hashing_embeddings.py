@@ -0,0 +1,25 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+from src.core.text_artifacts import get_text_artifact
+from src.core.chunking import token_chunks
+from src.core.hashing_embeddings import fit_hashing_model, HASH_EMBED_MODEL_PATH, HASH_EMBED_DIM
+
+# Fit IDF weights (and optionally an SVD projection) for the hashing
+# embedding backend from a sample of policy PDFs.
+# Usage: python scripts/fit_hashing_embeddings.py policies/*.pdf [--svd-dim 256] [--out data/hashing_embedding.npz]
+# Existing indexes keep working: the new model gets a new embedding model name.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("pdfs", nargs="+")
+parser.add_argument("--out", default=HASH_EMBED_MODEL_PATH)
+parser.add_argument("--dim", type=int, default=HASH_EMBED_DIM)
+parser.add_argument("--svd-dim", type=int, default=0, help="0 keeps the full hashed dimension")
+args = parser.parse_args()
+
+texts = []
+for path in args.pdfs:
+    texts.extend(c["text"] for c in token_chunks(get_text_artifact(path).text))
+print(f"Fitting on {len(texts)} chunks from {len(args.pdfs)} documents...")
+print(fit_hashing_model(texts, path=args.out, dim=args.dim, svd_dim=args.svd_dim or None))
+print("Saved", args.out)
@@ -12,9 +12,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from PyPDF2 import PdfReader
 import chromadb, uuid, os
 from src.core.RAG import split_into_sentences, chunk_sentences, is_informative_chunk, create_embeddings_batch
+from src.core.dedup import dedup_chunks
+from src.core.chunking import token_chunks, token_batches, chunk_stats
 
 PDF_PATH = r"C:\NOMI\uploads\6108ff6ec8b14b37a11e5254a2caacde.pdf"
 COL_NAME = "policies"
+DEDUP = True  # drop near-duplicate boilerplate chunks before embedding
+TOKEN_CHUNKS = True  # pack sentences to a token budget with overlap (src/core/chunking.py)
 client = chromadb.Client()
 try:
     client.delete_collection(name=COL_NAME)
@@ -24,19 +28,27 @@ col = client.get_or_create_collection(name=COL_NAME)
 
 reader = PdfReader(PDF_PATH)
 full_text = "\n".join([p.extract_text() or "" for p in reader.pages])
-sentences = split_into_sentences(full_text)
-raw_chunks = chunk_sentences(sentences, max_sentences=3)
+if TOKEN_CHUNKS:
+    raw_chunks = [c["text"] for c in token_chunks(full_text)]
+else:
+    sentences = split_into_sentences(full_text)
+    raw_chunks = chunk_sentences(sentences, max_sentences=3)
 clean_chunks = [c for c in raw_chunks if is_informative_chunk(c)]
 
-# embeddings
-embs = []
 batch_size = 10
-for i in range(0, len(clean_chunks), batch_size):
-    batch = clean_chunks[i:i+batch_size]
+if DEDUP:
+    clean_chunks, dedup_stats = dedup_chunks(clean_chunks, batch_size=batch_size)
+    print("Dedup:", dedup_stats)
+print("Chunks:", chunk_stats(clean_chunks))
+
+# embeddings, in batches of similar token count
+embs = []
+batches = token_batches(clean_chunks, max_batch_size=batch_size)
+for batch in batches:
     emb_batch = create_embeddings_batch(batch, model_name="text-embedding-3-small")
     embs.extend(emb_batch)
 
 ids = [str(uuid.uuid4()) for _ in clean_chunks]
 metas = [{"chunk_index": i} for i in range(len(clean_chunks))]
 col.add(ids=ids, documents=clean_chunks, metadatas=metas, embeddings=embs)
-print("Reindexed", len(clean_chunks), "chunks")
+print("Reindexed", len(clean_chunks), "chunks in", len(batches), "embedding batches")
@@ -7,7 +7,11 @@ import os
 import json
 import hashlib
 import traceback
+import threading
 from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse
@@ -68,27 +72,81 @@ def extract_flagged_departments(results: List[Dict[str, Any]]) -> List[str]:
     return sorted(list(departments))
 
 
-def upsert_audit_to_neo4j(
+CYPHER_AUDIT = """
+// Create or merge User
+MERGE (u:User {uid: $user_uid})
+ON CREATE SET u.created_at = timestamp()
+
+// Create or merge Supplier (if provided)
+MERGE (s:Supplier {supplier_id: $supplier_id})
+ON CREATE SET s.created_at = timestamp()
+
+// Create or merge File
+MERGE (f:File {file_id: $file_id})
+ON CREATE SET f.created_at = timestamp()
+
+// Create AuditRun node
+CREATE (a:AuditRun)
+SET a = $audit_props
+
+// Create relationships
+MERGE (u)-[:INITIATED_AUDIT]->(a)
+MERGE (s)-[:HAS_AUDIT]->(a)
+MERGE (a)-[:ANALYZED_FILE]->(f)
+
+RETURN a.audit_id AS audit_id
+"""
+
+CYPHER_GAPS = """
+UNWIND $gaps AS gap
+MATCH (a:AuditRun {audit_id: $audit_id})
+
+// Find regulation by regulation_id; create a stub if it was never ingested so
+// the gap (and its lazily generated narrative) is not dropped
+WITH a, gap
+WHERE gap.reg_id IS NOT NULL
+MERGE (reg:Regulation {regulation_id: gap.reg_id})
+ON CREATE SET reg.stub = true, reg.created_at = timestamp()
+
+// Create gap relationship directly to regulation (not obligation)
+MERGE (a)-[r:FOUND_GAP]->(reg)
+SET r.compliance_score = gap.score,
+    r.risk_rating = gap.risk,
+    r.narrative = gap.narrative,
+    r.narrative_status = gap.narrative_status,
+    r.requirement_text = gap.requirement_text,
+    r.evidence_chunk = gap.evidence,
+    r.evidence_doc_hash = gap.evidence_doc_hash,
+    r.evidence_page = gap.evidence_page,
+    r.evidence_page_end = gap.evidence_page_end,
+    r.evidence_char_start = gap.evidence_char_start,
+    r.evidence_char_end = gap.evidence_char_end,
+    r.evidence_chunk_hash = gap.evidence_chunk_hash,
+    r.reused = gap.reused,
+    r.created_at = timestamp()
+
+RETURN count(r) AS gap_links
+"""
+
+CYPHER_DEPTS = """
+UNWIND $departments AS dept_name
+MATCH (a:AuditRun {audit_id: $audit_id})
+MERGE (d:Department {name: dept_name})
+ON CREATE SET d.created_at = timestamp()
+MERGE (a)-[:FLAGGED_DEPT]->(d)
+RETURN count(d) AS dept_count
+"""
+
+
+def _prepare_audit(
     user_uid: str,
     file_id: str,
     supplier_id: Optional[str],
     results: List[Dict[str, Any]],
     summary: Dict[str, Any],
     metadata: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
-    """
-    Save audit run and its findings to Neo4j as a graph.
-    
-    ✅ FIXED:
-    - Uses transactions (all-or-nothing)
-    - Better error handling
-    - Fixed OPTIONAL MATCH logic
-    - Added retries for transient errors
-    - Updated for Neo4j 5.x API (execute_write)
-    """
-    if not results:
-        raise ValueError("Cannot save audit with no results")
-    
+):
+    """Build (audit_id, audit node properties, flagged departments) for one audit run."""
     metadata = metadata or {}
     
     # Generate unique audit ID
@@ -112,64 +170,41 @@ def upsert_audit_to_neo4j(
         "total_requirements": len(results),
         "gap_count": gap_count,
         "high_risk_count": high_risk_count,
+        # incremental re-audit: results assembled from stored ones, not recomputed
+        "reused_count": sum(1 for r in results if r.get("Reused")),
+        "reused_reg_ids": sorted({str(r.get("Reg_ID")) for r in results if r.get("Reused")}),
         "status": "completed",
         "summary_json": json.dumps(summary),
         "metadata_json": json.dumps(metadata)
     }
-    
-    cypher_audit = """
-    // Create or merge User
-    MERGE (u:User {uid: $user_uid})
-    ON CREATE SET u.created_at = timestamp()
-    
-    // Create or merge Supplier (if provided)
-    MERGE (s:Supplier {supplier_id: $supplier_id})
-    ON CREATE SET s.created_at = timestamp()
-    
-    // Create or merge File
-    MERGE (f:File {file_id: $file_id})
-    ON CREATE SET f.created_at = timestamp()
-    
-    // Create AuditRun node
-    CREATE (a:AuditRun)
-    SET a = $audit_props
-    
-    // Create relationships
-    MERGE (u)-[:INITIATED_AUDIT]->(a)
-    MERGE (s)-[:HAS_AUDIT]->(a)
-    MERGE (a)-[:ANALYZED_FILE]->(f)
-    
-    RETURN a.audit_id AS audit_id
-    """
-    
-    cypher_gaps = """
-    UNWIND $gaps AS gap
-    MATCH (a:AuditRun {audit_id: $audit_id})
 
-    // Find regulation by regulation_id
-    OPTIONAL MATCH (reg:Regulation {regulation_id: gap.reg_id})
+    return audit_id, audit_props, flagged_departments
 
-    // Create gap relationship directly to regulation (not obligation)
-    WITH a, gap, reg
-    WHERE reg IS NOT NULL
-    MERGE (a)-[r:FOUND_GAP]->(reg)
-    SET r.compliance_score = gap.score,
-        r.risk_rating = gap.risk,
-        r.narrative = gap.narrative,
-        r.evidence_chunk = gap.evidence,
-        r.created_at = timestamp()
 
-    RETURN count(reg) AS gap_links
+def upsert_audit_to_neo4j(
+    user_uid: str,
+    file_id: str,
+    supplier_id: Optional[str],
+    results: List[Dict[str, Any]],
+    summary: Dict[str, Any],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
+    Save audit run and its findings to Neo4j as a graph.
     
-    cypher_depts = """
-    UNWIND $departments AS dept_name
-    MATCH (a:AuditRun {audit_id: $audit_id})
-    MERGE (d:Department {name: dept_name})
-    ON CREATE SET d.created_at = timestamp()
-    MERGE (a)-[:FLAGGED_DEPT]->(d)
-    RETURN count(d) AS dept_count
+    ✅ FIXED:
+    - Uses transactions (all-or-nothing)
+    - Better error handling
+    - Fixed OPTIONAL MATCH logic
+    - Added retries for transient errors
+    - Updated for Neo4j 5.x API (execute_write)
     """
+    if not results:
+        raise ValueError("Cannot save audit with no results")
+    
+    audit_id, audit_props, flagged_departments = _prepare_audit(
+        user_uid, file_id, supplier_id, results, summary, metadata
+    )
     
     driver = get_neo4j_driver()
     max_retries = 3
@@ -180,10 +215,10 @@ def upsert_audit_to_neo4j(
                 # ✅ Neo4j 5.x: execute_write (replaces write_transaction)
                 result = session.execute_write(
                     _create_audit_tx,
-                    cypher_audit,
+                    CYPHER_AUDIT,
                     audit_props,
-                    cypher_gaps,
-                    cypher_depts,
+                    CYPHER_GAPS,
+                    CYPHER_DEPTS,
                     audit_id,
                     results,
                     flagged_departments
@@ -229,12 +264,22 @@ def _create_audit_tx(tx, cypher_audit, audit_props, cypher_gaps, cypher_depts,
     gaps = []
     for r in results:
         if not r.get("Is_Compliant", True):
+            loc = r.get("Evidence_Location") or {}
             gaps.append({
                 "reg_id": r.get("Reg_ID"),
                 "score": r.get("Compliance_Score", 0.0),
                 "risk": r.get("Risk_Rating", ""),
                 "narrative": r.get("Narrative_Gap", ""),
-                "evidence": (r.get("Evidence_Chunk", "") or "")[:500]
+                "narrative_status": r.get("Narrative_Status", "ready"),
+                "requirement_text": (r.get("Requirement_Text", "") or "")[:5000],
+                "evidence": (r.get("Evidence_Chunk", "") or "")[:500],
+                "evidence_doc_hash": loc.get("doc_hash"),
+                "evidence_page": loc.get("page"),
+                "evidence_page_end": loc.get("page_end"),
+                "evidence_char_start": loc.get("char_start"),
+                "evidence_char_end": loc.get("char_end"),
+                "evidence_chunk_hash": loc.get("chunk_hash"),
+                "reused": bool(r.get("Reused")),
             })
     
     gap_count_created = 0
@@ -256,11 +301,70 @@ def _create_audit_tx(tx, cypher_audit, audit_props, cypher_gaps, cypher_depts,
         "compliance_score": audit_props["compliance_score"],
         "gap_count": audit_props["gap_count"],
         "high_risk_count": audit_props["high_risk_count"],
+        "reused_count": audit_props["reused_count"],
         "gap_links_created": gap_count_created,
         "departments_flagged": dept_count
     }
 
 
+def upsert_audits_batch_to_neo4j(
+    user_uid: str,
+    audits: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Save several audit runs in ONE write transaction (all-or-nothing).
+
+    Each item: {"file_id", "supplier_id", "results", "summary", "metadata"}.
+    Items with no results are skipped. Returns per-file save results in
+    input order under "audits".
+    """
+    prepared = []
+    for a in audits:
+        if not a.get("results"):
+            continue
+        audit_id, audit_props, flagged_departments = _prepare_audit(
+            user_uid, a["file_id"], a.get("supplier_id"), a["results"],
+            a.get("summary") or {}, a.get("metadata")
+        )
+        prepared.append((a["file_id"], audit_id, audit_props, a["results"], flagged_departments))
+
+    if not prepared:
+        return {"ok": True, "audits": []}
+
+    def _batch_tx(tx):
+        saved = []
+        for file_id, audit_id, audit_props, results, flagged_departments in prepared:
+            r = _create_audit_tx(tx, CYPHER_AUDIT, audit_props, CYPHER_GAPS, CYPHER_DEPTS,
+                                 audit_id, results, flagged_departments)
+            r["file_id"] = file_id
+            saved.append(r)
+        return saved
+
+    driver = get_neo4j_driver()
+    max_retries = 3
+    try:
+        for attempt in range(max_retries):
+            try:
+                with driver.session() as session:
+                    saved = session.execute_write(_batch_tx)
+                return {"ok": True, "audits": saved}
+            except TransientError as e:
+                if attempt < max_retries - 1:
+                    print(f"⚠️ Transient error, retrying ({attempt + 1}/{max_retries}): {e}")
+                    continue
+                traceback.print_exc()
+                return {"ok": False, "error": f"Transient error after {max_retries} retries: {str(e)}"}
+            except ServiceUnavailable as e:
+                traceback.print_exc()
+                return {"ok": False, "error": f"Neo4j unavailable: {str(e)}"}
+            except Exception as e:
+                traceback.print_exc()
+                return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": "Max retries exceeded"}
+    finally:
+        driver.close()
+
+
 def get_audits_for_user(user_uid: str, limit: int = 50, skip: int = 0) -> List[Dict[str, Any]]:
     """Get all audit runs for a user."""
     driver = get_neo4j_driver()
@@ -474,6 +578,213 @@ async def get_audit_details(audit_id: str):
         }, status_code=500)
 
 
+# Memoized on-demand narratives: (audit_id, reg_id) -> narrative, least recently used first
+NARRATIVE_CACHE_SIZE = int(os.getenv("NARRATIVE_CACHE_SIZE", "2048"))
+_NARRATIVE_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+# (lock, number of callers using it); entries are dropped when the last caller leaves
+_NARRATIVE_LOCKS: Dict[tuple, tuple] = {}
+_NARRATIVE_LOCKS_GUARD = threading.Lock()
+
+
+def _cached_narrative(key: tuple) -> Optional[str]:
+    with _NARRATIVE_LOCKS_GUARD:
+        narrative = _NARRATIVE_CACHE.get(key)
+        if narrative is not None:
+            _NARRATIVE_CACHE.move_to_end(key)
+        return narrative
+
+
+def _cache_narrative(key: tuple, narrative: str) -> None:
+    with _NARRATIVE_LOCKS_GUARD:
+        _NARRATIVE_CACHE[key] = narrative
+        _NARRATIVE_CACHE.move_to_end(key)
+        while len(_NARRATIVE_CACHE) > NARRATIVE_CACHE_SIZE:
+            _NARRATIVE_CACHE.popitem(last=False)
+
+
+@contextmanager
+def _narrative_lock(key: tuple):
+    with _NARRATIVE_LOCKS_GUARD:
+        lock, users = _NARRATIVE_LOCKS.get(key, (threading.Lock(), 0))
+        _NARRATIVE_LOCKS[key] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _NARRATIVE_LOCKS_GUARD:
+            lock, users = _NARRATIVE_LOCKS[key]
+            if users <= 1:
+                del _NARRATIVE_LOCKS[key]
+            else:
+                _NARRATIVE_LOCKS[key] = (lock, users - 1)
+
+
+def get_or_generate_gap_narrative(audit_id: str, reg_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the narrative for one gap of an audit, generating it on first
+    access when the audit ran with lazy narratives. The generated narrative
+    is memoized in-process and stored on the FOUND_GAP relationship.
+    If generation fails (LLM error or rate limit) the fallback text is
+    returned with status "pending" and nothing is stored, so the next
+    request tries again.
+    Returns None if the gap does not exist.
+    """
+    key = (audit_id, reg_id)
+    cached = _cached_narrative(key)
+    if cached is not None:
+        return {"narrative": cached, "status": "ready", "cached": True}
+
+    # One generation per gap even if the row is expanded twice concurrently
+    with _narrative_lock(key):
+        cached = _cached_narrative(key)
+        if cached is not None:
+            return {"narrative": cached, "status": "ready", "cached": True}
+
+        driver = get_neo4j_driver()
+        try:
+            with driver.session() as session:
+                record = session.execute_read(
+                    lambda tx: tx.run("""
+                    MATCH (a:AuditRun {audit_id: $audit_id})-[g:FOUND_GAP]->(reg:Regulation {regulation_id: $reg_id})
+                    RETURN g.narrative AS narrative,
+                           g.narrative_status AS status,
+                           g.requirement_text AS requirement_text,
+                           g.evidence_chunk AS evidence_chunk,
+                           reg.regulation_text AS regulation_text,
+                           a.user_uid AS user_uid
+                    """, audit_id=audit_id, reg_id=reg_id).single()
+                )
+                if record is None:
+                    return None
+
+                if record["status"] != "pending" and record["narrative"]:
+                    _cache_narrative(key, record["narrative"])
+                    return {"narrative": record["narrative"], "status": "ready", "cached": True}
+
+                from src.core.RAG import narrative_from_gap_summary
+                from src.core.compliance_narratives import generate_gap_summary
+
+                regulation_text = record["requirement_text"] or record["regulation_text"] or ""
+                if isinstance(regulation_text, list):
+                    regulation_text = " ".join(regulation_text)
+                resp = generate_gap_summary(
+                    regulation_text=regulation_text,
+                    evidence_chunks=[record["evidence_chunk"] or ""],
+                    user_id=record["user_uid"] or "default",
+                )
+                narrative = narrative_from_gap_summary(resp)
+                if not resp or not resp.get("ok"):
+                    # Transient failure: leave the gap pending so it is generated on a later request
+                    return {"narrative": narrative, "status": "pending", "cached": False}
+
+                session.execute_write(
+                    lambda tx: tx.run("""
+                    MATCH (:AuditRun {audit_id: $audit_id})-[g:FOUND_GAP]->(:Regulation {regulation_id: $reg_id})
+                    SET g.narrative = $narrative,
+                        g.narrative_status = 'ready',
+                        g.narrative_generated_at = timestamp()
+                    """, audit_id=audit_id, reg_id=reg_id, narrative=narrative).consume()
+                )
+        finally:
+            driver.close()
+
+        _cache_narrative(key, narrative)
+        return {"narrative": narrative, "status": "ready", "cached": False}
+
+
+@lru_cache(maxsize=32)
+def _artifact_text(doc_hash: str) -> Optional[str]:
+    from src.core.text_artifacts import load_text_artifact
+    artifact = load_text_artifact(doc_hash)
+    return artifact.text if artifact else None
+
+
+def get_audit_evidence(audit_id: str, reg_id: Optional[str] = None, context: int = 0) -> List[Dict[str, Any]]:
+    """
+    Evidence locations for an audit's gaps, read from FOUND_GAP properties.
+    Full snippets come from the stored text artifact by character offset;
+    the PDF itself is never opened.
+    """
+    driver = get_neo4j_driver()
+    try:
+        with driver.session() as session:
+            records = session.execute_read(
+                lambda tx: list(tx.run("""
+                MATCH (a:AuditRun {audit_id: $audit_id})-[g:FOUND_GAP]->(reg:Regulation)
+                WHERE $reg_id IS NULL OR reg.regulation_id = $reg_id
+                RETURN reg.regulation_id AS reg_id,
+                       g.compliance_score AS score,
+                       g.evidence_chunk AS evidence_chunk,
+                       g.evidence_doc_hash AS doc_hash,
+                       g.evidence_page AS page,
+                       g.evidence_page_end AS page_end,
+                       g.evidence_char_start AS char_start,
+                       g.evidence_char_end AS char_end,
+                       g.evidence_chunk_hash AS chunk_hash
+                ORDER BY g.compliance_score ASC
+                """, audit_id=audit_id, reg_id=reg_id))
+            )
+    finally:
+        driver.close()
+
+    evidence = []
+    for rec in records:
+        item = dict(rec)
+        snippet = item.pop("evidence_chunk") or ""
+        text = _artifact_text(item["doc_hash"]) if item["doc_hash"] else None
+        if text is not None and item["char_start"] is not None and item["char_end"] is not None:
+            snippet = text[item["char_start"]:item["char_end"]]
+            if context > 0:
+                item["context_before"] = text[max(0, item["char_start"] - context):item["char_start"]]
+                item["context_after"] = text[item["char_end"]:item["char_end"] + context]
+        item["snippet"] = snippet
+        item["located"] = item["char_start"] is not None
+        evidence.append(item)
+    return evidence
+
+
+@router.get("/api/v1/audit/{audit_id}/evidence")
+def get_evidence(audit_id: str, reg_id: Optional[str] = None, context: int = Query(0, ge=0, le=2000)):
+    """Evidence snippets with page and character offsets for an audit's gaps."""
+    try:
+        evidence = get_audit_evidence(audit_id, reg_id=reg_id, context=context)
+        return JSONResponse(content={
+            "ok": True,
+            "audit_id": audit_id,
+            "count": len(evidence),
+            "evidence": evidence
+        })
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={
+            "ok": False,
+            "error": str(e)
+        }, status_code=500)
+
+
+@router.get("/api/v1/audit/{audit_id}/gap/{reg_id}/narrative")
+def get_gap_narrative(audit_id: str, reg_id: str):
+    """Get (and on first access, generate) the gap narrative for one regulation of an audit."""
+    try:
+        narrative = get_or_generate_gap_narrative(audit_id, reg_id)
+        if narrative is None:
+            raise HTTPException(status_code=404, detail="Gap not found for this audit")
+        return JSONResponse(content={
+            "ok": True,
+            "audit_id": audit_id,
+            "reg_id": reg_id,
+            **narrative
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={
+            "ok": False,
+            "error": str(e)
+        }, status_code=500)
+
+
 def ensure_audit_indexes():
     """Create Neo4j indexes for audit queries."""
     try:
@@ -18,6 +18,7 @@ from src.core.regulations.gov_reg.local_search import (
     load_all_granules,
     search_granules_in_package,
     search_local_granules,
+    search_local_granules_page,
 )
 from src.api.obligations_ingest import (
     extract_obligations_from_text,
@@ -26,7 +27,7 @@ from src.api.obligations_ingest import (
 
 from src.api.models import WorkspaceRegulation
 from src.core.regulations.state_regulations.state_engine  import normalize_regulation
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from src.core.store_file_data import save_extraction
@@ -80,7 +81,6 @@ from src.api.models import (
     TaskState,
     Base,
 )
-from PyPDF2 import PdfReader
 from src.api.db import get_db, engine, SessionLocal
 
 from src.core.LLM import (
@@ -95,12 +95,26 @@ from src.core.nomi_file_hub import (
     save_user_file,
     list_user_files,
     get_user_file_path,
+    get_previous_version,
     delete_user_file,
     get_direct_file_url,
 )
 from src.core.backend import fetch_files_from_source
 from src.core.work import DowComplianceDataFetcher
 from src.core.RAG import ComplianceChecker as RAGComplianceChecker
+from src.core.text_artifacts import get_text_artifact, content_sha256
+from src.core.RAG import run_portfolio_check, portfolio_rollup
+from src.core.result_store import save_audit_results, load_audit_results
+from src.core.jobs import submit_job, get_job, register_job_handler, resume_pending_jobs
+from src.core.compliance_matrix import schedule_matrix_update, get_matrix
+from src.core.evidence_index import schedule_evidence_update, search_evidence
+from src.core.regulation_recommender import recommend_for_policy, recommend_for_profile, apply_recommendations
+from src.core.regulation_embeddings import (
+    requirement_text_for,
+    load_regulation_embeddings,
+    rebuild_regulation_embeddings,
+    schedule_regulation_embeddings,
+)
 from src.core.extract_keywords import read_policy_text, extract_keywords
 from src.core.find_competitors import find_competitors, clean_names, get_company_filings
 
@@ -135,7 +149,7 @@ from typing import Dict, Any
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse
-from src.api.audit_ingest import router as audit_router, upsert_audit_to_neo4j, ensure_audit_indexes
+from src.api.audit_ingest import router as audit_router, upsert_audit_to_neo4j, upsert_audits_batch_to_neo4j, ensure_audit_indexes
 from src.api.cfr_api import router as cfr_router
 from src.core.client import analyze_filing_for_departments
 from contextlib import asynccontextmanager
@@ -154,6 +168,16 @@ from src.core.find_competitors import (
     generate_department_alerts
 )
 
+def _rebuild_regulation_embeddings_job():
+    db = SessionLocal()
+    try:
+        stats = rebuild_regulation_embeddings(db)
+        print(f"[Startup] Regulation embeddings ready: {stats}")
+    except Exception as e:
+        print(f"Warning: Could not rebuild regulation embeddings: {e}")
+    finally:
+        db.close()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("[Startup] Building Federal Register cache...")
@@ -167,6 +191,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Warning: Could not initialize audit indexes: {e}")
 
+    print("[Startup] Rebuilding regulation embeddings in background...")
+    threading.Thread(target=_rebuild_regulation_embeddings_job, daemon=True).start()
+
+    try:
+        resumed = resume_pending_jobs()
+        if resumed:
+            print(f"[Startup] Resumed {resumed} interrupted compliance jobs")
+    except Exception as e:
+        print(f"Warning: Could not resume compliance jobs: {e}")
+
     yield
 
     print("[Shutdown] Application shutting down...")
@@ -299,6 +333,7 @@ def import_regulations(payload: dict, db: Session = Depends(get_db)):
         return {"error": "No regulations provided"}
 
     created_ids = []
+    new_texts = []
 
     for reg in regulations:
 
@@ -333,8 +368,12 @@ def import_regulations(payload: dict, db: Session = Depends(get_db)):
 
         db.add(entry)
         created_ids.append(reg["id"])
+        new_texts.append(requirement_text_for(entry))
 
     db.commit()
+    schedule_regulation_embeddings(new_texts)
+    if created_ids:
+        schedule_matrix_update(user_uid, regulation_ids=created_ids)
 
     return {
         "success": True,
@@ -408,7 +447,8 @@ def wizard_search(payload: dict):
         }
 
     if source == "government" and mode == "topic":
-        data = search_local_granules(query)
+        data = search_local_granules(query, agency=payload.get("agency"), granule_type=payload.get("type"),
+                                     limit=payload.get("limit"), offset=int(payload.get("offset") or 0))
         return [map_granule(x) for x in data]
 
     # --- PACKAGE ID SEARCH ---
@@ -445,11 +485,19 @@ def api_all_granules():
         "granules": data
     } 
 @app.get("/api/regulations/local_search")
-def local_regulation_search(q: str = Query(..., description="Search topic across local granules")):
+def local_regulation_search(
+    q: str = Query(..., description="Search topic across local granules"),
+    agency: Optional[str] = Query(None, description="Only granules from this agency"),
+    type: Optional[str] = Query(None, description="Only granules of this type, e.g. Rule or Notice"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
 
     try:
-        results = search_local_granules(q)
-        return {"query": q,"results_count": len(results), "results": results,}
+        page = search_local_granules_page(q, agency=agency, granule_type=type, limit=limit, offset=offset)
+        results = page["results"]
+        return {"query": q, "total": page["total"], "offset": offset, "limit": limit,
+                "results_count": len(results), "results": results,}
     except Exception as e:
         return JSONResponse( content={"error": str(e)},status_code=500 )
 
@@ -559,8 +607,214 @@ async def get_regulation_text(granule_id: str):
         }
     }
 
+def _previous_content_hash(user_uid, file_entry):
+    """Content hash of the FileHub version this file supersedes, if any."""
+    previous = get_previous_version(user_uid, file_entry)
+    return previous.get("content_hash") if previous else None
+
+
+def _load_previous_results(db, checker, incremental=True):
+    """
+    Stored results for this checker's configuration: this document's own
+    (incremental re-audit, only missing or stale regulations are scored) and
+    the previous document version's (carrying forward unchanged regulations).
+    """
+    for attr, doc_hash in (
+        ("stored_results", checker.doc_hash if incremental else None),
+        ("previous_results", checker.previous_doc_hash),
+    ):
+        if not doc_hash:
+            continue
+        try:
+            setattr(checker, attr, load_audit_results(
+                db,
+                doc_hash,
+                checker.compliance_threshold,
+                checker.top_k,
+                checker.result_model_key,
+            ))
+        except Exception as e:
+            print(f"⚠️ Could not load stored audit results: {e}")
+
+
+def _store_audit_results(db, checker, results, user_uid, file_id):
+    """Store the newly computed results (reused ones are already stored)."""
+    computed = [r for r in results if not r.get("Reused")]
+    if not computed:
+        return
+    try:
+        save_audit_results(
+            db,
+            checker.doc_hash,
+            checker.regulations,
+            computed,
+            checker.compliance_threshold,
+            checker.top_k,
+            checker.result_model_key,
+            user_uid=user_uid,
+            file_id=file_id,
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Could not store audit results (non-fatal): {e}")
+
+
+def _failed_rag_summary(regulation_count):
+    """Fallback summary with the same keys the UI expects."""
+    return {
+        "status": "error",
+        "action": "RAG Compliance Check",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "industry": None,
+        "regulations_checked": regulation_count,
+        "compliance_score": 0.0,
+        "high_risk_gaps": 0,
+        "gap_details": [],
+        "details": "Compliance engine failed. Please retry or review logs."
+    }
+
+
+def _workspace_regulation_objs(regs):
+    """Compliance regulation objects from workspace regulations."""
+    return [
+        {
+            "Reg_ID": reg.regulation_id,
+            "Requirement_Text": requirement_text_for(reg),
+            "Risk_Rating": reg.risk or "",
+            "Target_Area": reg.category or "",
+            "Dow_Focus": reg.region or ""
+        }
+        for reg in regs
+    ]
+
+
+def _obligation_regulation_objs(regs):
+    """
+    Compliance regulation objects whose requirement text is the first
+    obligations extracted from each regulation's full text.
+    """
+    from src.api.obligations_ingest import extract_obligations_from_text
+
+    regulation_objs = []
+    for reg in regs:
+        # Use the document number (regulation_id) to fetch full text
+        try:
+            # Fetch regulation text from file system
+            filename = f"{reg.regulation_id}.txt"
+            full_text = read_file(filename)
+
+            if not full_text or full_text.startswith("Error"):
+                print(f"⚠️ Could not load text for {reg.regulation_id}")
+                continue
+
+            # Extract obligations from the full text
+            obligations = extract_obligations_from_text(
+                doc_id=reg.regulation_id,
+                raw_text=full_text,
+                meta={}
+            )
+
+            # Use obligations text as requirement text (concatenate if multiple)
+            if obligations:
+                requirement_text = " ".join([obl.get("text", "") for obl in obligations[:3]])  # Use first 3 obligations
+            else:
+                requirement_text = full_text[:500]  # Fallback to first 500 chars
+
+            regulation_objs.append({
+                "Reg_ID": reg.regulation_id,
+                "Requirement_Text": requirement_text,
+                "Risk_Rating": reg.risk or "",
+                "Target_Area": reg.category or "",
+                "Dow_Focus": reg.region or ""
+            })
+        except Exception as e:
+            print(f"❌ Error processing regulation {reg.regulation_id}: {e}")
+            continue
+    return regulation_objs
+
+
+def _ndjson(events):
+    for event in events:
+        yield json.dumps(event, default=str) + "\n"
+
+
+def _compliance_events(user_uid, file_id, file_path, file_entry, regulation_objs,
+                       narrative_mode="eager", supplier_id=None, metadata=None, incremental=True):
+    """
+    Events of one compliance run: "start", one "result" per scored
+    regulation result, one "narrative" per finished gap narrative, then a
+    final "summary" (dashboard summary and audit id) once the audit is saved.
+    Used by the NDJSON streaming endpoints and compliance jobs; opens its
+    own DB session because a streamed body outlives the request's session.
+    """
+    db = SessionLocal()
+    try:
+        yield {
+            "event": "start",
+            "file": file_entry.get("original_name"),
+            "regulations": len(regulation_objs),
+            "narrative_mode": narrative_mode,
+        }
+
+        error_msg = None
+        results = []
+        try:
+            stored_embeddings = load_regulation_embeddings(
+                db, [r["Requirement_Text"] for r in regulation_objs]
+            )
+            checker = RAGComplianceChecker(
+                pdf_path=file_path,
+                regulations=regulation_objs,
+                regulation_embeddings=stored_embeddings,
+                previous_doc_hash=_previous_content_hash(user_uid, file_entry),
+                user_id=user_uid
+            )
+            _load_previous_results(db, checker, incremental=incremental)
+            for event in checker.run_check_iter(narratives=narrative_mode):
+                if event["event"] == "result":
+                    results.append(event["result"])
+                yield event
+            summary = checker.dashboard_summary(results)
+            _store_audit_results(db, checker, results, user_uid, file_id)
+        except Exception as e:
+            print("RAG ERROR:", e)
+            traceback.print_exc()
+            error_msg = str(e)
+            summary = _failed_rag_summary(len(regulation_objs))
+
+        audit_id = None
+        try:
+            audit_save = upsert_audit_to_neo4j(
+                user_uid=user_uid,
+                file_id=file_id,
+                supplier_id=supplier_id,
+                results=results,
+                summary=summary,
+                metadata=metadata or {}
+            )
+            if audit_save.get("ok"):
+                audit_id = audit_save.get("audit_id")
+            else:
+                print(f"⚠️ Failed to save audit to Neo4j: {audit_save.get('error')}")
+        except Exception as e:
+            print(f" Neo4j save error (non-fatal): {e}")
+            traceback.print_exc()
+
+        yield {
+            "event": "summary",
+            "status": "success" if error_msg is None else "error",
+            "audit_id": audit_id if error_msg is None else None,
+            "file": file_entry.get("original_name"),
+            "summary": summary,
+            "gap_count": len([r for r in results if not r.get("Is_Compliant")]),
+            "error": error_msg,
+        }
+    finally:
+        db.close()
+
+
 @app.post("/api/rag/run_compliance")
-async def run_rag_compliance(
+def run_rag_compliance(
     payload: dict,
     db: Session = Depends(get_db)
 ):
@@ -572,6 +826,9 @@ async def run_rag_compliance(
     file_id = payload.get("file_id")
     regulation_ids = payload.get("regulation_ids", [])
     supplier_id = payload.get("supplier_id")  # Optional supplier ID
+    # Lazy mode: return scores/evidence now, narratives via
+    # GET /api/v1/audit/{audit_id}/gap/{reg_id}/narrative on first access
+    narrative_mode = "lazy" if payload.get("lazy_narratives") else "eager"
     
     if not user_uid or not file_id:
         raise HTTPException(status_code=400, detail="Missing user_uid or file_id")
@@ -599,43 +856,32 @@ async def run_rag_compliance(
         raise HTTPException(status_code=404, detail="No matching regulations found")
     
     # Build compliance regulation objects
-    regulation_objs = []
-    for reg in regs:
-        regulation_objs.append({
-            "Reg_ID": reg.regulation_id,
-            "Requirement_Text": reg.description or reg.name or "",
-            "Risk_Rating": reg.risk or "",
-            "Target_Area": reg.category or "",
-            "Dow_Focus": reg.region or ""
-        })
+    regulation_objs = _workspace_regulation_objs(regs)
     
     # Run compliance check
     # Run compliance check with error handling
     error_msg = None
     try:
+        stored_embeddings = load_regulation_embeddings(
+            db, [r["Requirement_Text"] for r in regulation_objs]
+        )
         checker = RAGComplianceChecker(
             pdf_path=file_path,
-            regulations=regulation_objs
+            regulations=regulation_objs,
+            regulation_embeddings=stored_embeddings,
+            previous_doc_hash=_previous_content_hash(user_uid, file_entry),
+            user_id=user_uid
         )
-        results = checker.run_check()
+        _load_previous_results(db, checker, incremental=payload.get("incremental", True))
+        results = checker.run_check(narratives=narrative_mode)
         summary = checker.dashboard_summary(results)
+        _store_audit_results(db, checker, results, user_uid, file_id)
     except Exception as e:
         print("RAG ERROR:", e)
         traceback.print_exc()
         error_msg = str(e)
         results = []
-        # Fallback summary with same keys UI expects
-        summary = {
-            "status": "error",
-            "action": "RAG Compliance Check",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "industry": None,
-            "regulations_checked": len(regulation_objs),
-            "compliance_score": 0.0,
-            "high_risk_gaps": 0,
-            "gap_details": [],
-            "details": "Compliance engine failed. Please retry or review logs."
-        }
+        summary = _failed_rag_summary(len(regulation_objs))
 
 
     try:
@@ -673,6 +919,127 @@ async def run_rag_compliance(
 
 
 
+@app.post("/api/rag/run_compliance_batch")
+def run_rag_compliance_batch(
+    payload: dict,
+    db: Session = Depends(get_db)
+):
+    """
+    Runs the RAG compliance check on several uploaded files against the same
+    workspace regulations. The regulation set is embedded once and shared;
+    each file is scored with one matrix multiply over its chunk embeddings.
+    Narratives default to lazy here (pass "lazy_narratives": false for eager).
+    """
+    user_uid = payload.get("user_uid")
+    file_ids = payload.get("file_ids", [])
+    regulation_ids = payload.get("regulation_ids", [])
+    supplier_ids = payload.get("supplier_ids", {})  # optional {file_id: supplier_id}
+    narrative_mode = "lazy" if payload.get("lazy_narratives", True) else "eager"
+
+    if not user_uid or not file_ids:
+        raise HTTPException(status_code=400, detail="Missing user_uid or file_ids")
+
+    if not regulation_ids:
+        raise HTTPException(status_code=400, detail="No regulations selected")
+
+    regs = (
+        db.query(WorkspaceRegulation)
+        .filter(
+            WorkspaceRegulation.user_uid == user_uid,
+            WorkspaceRegulation.regulation_id.in_(regulation_ids)
+        )
+        .all()
+    )
+
+    if not regs:
+        raise HTTPException(status_code=404, detail="No matching regulations found")
+
+    regulation_objs = _workspace_regulation_objs(regs)
+
+    files, entries, missing = [], {}, []
+    for file_id in dict.fromkeys(file_ids):
+        found = get_user_file_path(user_uid, file_id)
+        if not found:
+            missing.append(file_id)
+            continue
+        entries[file_id] = found[1]
+        files.append((file_id, found[0]))
+
+    stored_embeddings = load_regulation_embeddings(
+        db, [r["Requirement_Text"] for r in regulation_objs]
+    )
+    outcomes = run_portfolio_check(
+        files,
+        regulation_objs,
+        regulation_embeddings=stored_embeddings,
+        narratives=narrative_mode,
+        user_id=user_uid,
+    )
+
+    audit_ids = {}
+    try:
+        saved = upsert_audits_batch_to_neo4j(
+            user_uid=user_uid,
+            audits=[
+                {
+                    "file_id": o["file_key"],
+                    "supplier_id": supplier_ids.get(o["file_key"]),
+                    "results": o["results"],
+                    "summary": o["summary"],
+                    "metadata": {
+                        "file_name": entries[o["file_key"]].get("original_name"),
+                        "regulation_count": len(regulation_objs),
+                        "batch": True,
+                    },
+                }
+                for o in outcomes if o["error"] is None
+            ],
+        )
+        if saved.get("ok"):
+            audit_ids = {a["file_id"]: a["audit_id"] for a in saved["audits"]}
+            print(f"✅ Saved {len(audit_ids)} batch audits to Neo4j")
+        else:
+            print(f"⚠️ Failed to save batch audits to Neo4j: {saved.get('error')}")
+    except Exception as e:
+        print(f" Neo4j batch save error (non-fatal): {e}")
+        traceback.print_exc()
+
+    return {
+        "status": "success",
+        "files": [
+            {
+                "file_id": o["file_key"],
+                "file": entries[o["file_key"]].get("original_name"),
+                "status": "success" if o["error"] is None else "error",
+                "summary": o["summary"],
+                "results": o["results"],
+                "audit_id": audit_ids.get(o["file_key"]),
+                "error": o["error"],
+            }
+            for o in outcomes
+        ],
+        "missing_files": missing,
+        "portfolio": portfolio_rollup(outcomes),
+    }
+
+
+@app.get("/api/embeddings/stats")
+def get_embedding_stats():
+    """Queue depth, micro-batch size and latency stats for this worker's embedding services."""
+    from src.core.embedding_service import embedding_service_stats
+    return {"services": embedding_service_stats()}
+
+
+@app.post("/api/regulations/embeddings/rebuild")
+def rebuild_regulation_embeddings_endpoint(db: Session = Depends(get_db)):
+    """Re-embed every workspace regulation under the current embedding model."""
+    try:
+        return {"ok": True, **rebuild_regulation_embeddings(db)}
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/api/v1/obligations/all")
 def get_all_obligations():
     driver = get_neo4j_driver()
@@ -723,6 +1090,11 @@ def toggle_regulation(user_uid: str, regulation_id: str, db: Session = Depends(g
     db.commit()
     db.refresh(item)
 
+    if item.workspace_status == "added":
+        schedule_regulation_embeddings([requirement_text_for(item)])
+    # adds or drops this regulation's column in the precomputed matrix
+    schedule_matrix_update(user_uid, regulation_ids=[regulation_id])
+
     #  ONLY RETURN WHAT FRONTEND NEEDS
     return {"status": item.workspace_status}
 
@@ -882,39 +1254,13 @@ async def filehub_direct(file_id: str, user_uid: str):
         headers={"Content-Disposition": "inline"}
     )
 def extract_text_from_pdf_bytes(pdf_bytes):
-    import io
-
-    # 1. Try PyMuPDF
+    # Parsed once per content hash (PyMuPDF -> PDFMiner -> PyPDF2), then read
+    # from the stored artifact; see src/core/text_artifacts.py
     try:
-        import fitz
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = "".join([page.get_text("text") for page in doc])
-        if text.strip():
-            return text
+        return get_text_artifact(pdf_bytes).text
     except Exception as e:
-        print("PyMuPDF failed:", e)
-
-    # 2. Try PDFMiner
-    try:
-        from pdfminer.high_level import extract_text as pdfminer_extract
-        text = pdfminer_extract(io.BytesIO(pdf_bytes))
-        if text.strip():
-            return text
-    except Exception as e:
-        print("PDFMiner failed:", e)
-
-    # 3. Fallback: PyPDF2
-    try:
-
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
-    except Exception as e:
-        print("PyPDF2 failed:", e)
-
-    return ""
+        print("PDF extraction failed:", e)
+        return ""
 
 @app.get("/api/filehub/{file_id}")
 async def filehub_get(file_id: str, user_uid: str):
@@ -968,7 +1314,8 @@ async def filehub_upload(
     user_uid: str = Form(...),
     file_type: str = Form(...),
     used_for: str = Form(...),
-    department: str = Form(...)
+    department: str = Form(...),
+    supersedes: Optional[str] = Form(None)
 ):
     print("Saving file for user:", user_uid)
     print("Received filename:", file.filename)
@@ -986,7 +1333,8 @@ async def filehub_upload(
         user_uid,
         file_type,
         used_for,
-        department
+        department,
+        supersedes
     )
 
     # ✅ Correct key name
@@ -998,8 +1346,7 @@ async def filehub_upload(
 
     # Extract text
     try:
-        reader = PdfReader(pdf_path)
-        text = "\n".join([(p.extract_text() or "") for p in reader.pages])
+        text = get_text_artifact(pdf_path, entry.get("content_hash")).text
     except Exception as e:
         print(" PDF extraction failed:", e)
         text = ""
@@ -1024,6 +1371,10 @@ async def filehub_upload(
     db.commit()
     db.close()
 
+    # score the new file (and drop the version it supersedes) in the matrix
+    schedule_matrix_update(user_uid, file_ids=[file_id])
+    schedule_evidence_update(user_uid, entry=entry, path=pdf_path)
+
     return {
         "status": "success",
         "file": entry,
@@ -1074,6 +1425,8 @@ async def filehub_delete(file_id: str, user_uid: str):
     ok = delete_user_file(user_uid, file_id)
     if not ok:
         raise HTTPException(status_code=404, detail="File not found")
+    schedule_matrix_update(user_uid, file_ids=[])
+    schedule_evidence_update(user_uid, removed_file_id=file_id)
 
     return {"status": "deleted", "file_id": file_id}
 
@@ -1639,10 +1992,11 @@ class ComplianceRequest(BaseModel):
     regulation_ids: list[str]
 
 @app.post("/api/rag/run_compliance_payload")
-async def run_compliance_payload(payload: dict):
+def run_compliance_payload(payload: dict):
     user_uid = payload.get("user_uid")
     file_id = payload.get("file_id")
     regulation_ids = payload.get("regulation_ids", [])
+    narrative_mode = "lazy" if payload.get("lazy_narratives") else "eager"
     
     if not user_uid or not file_id:
         raise HTTPException(status_code=400, detail="Missing user_uid or file_id")
@@ -1663,50 +2017,25 @@ async def run_compliance_payload(payload: dict):
         raise HTTPException(status_code=404, detail="No regulations found")
     
     # NEW: Fetch obligations from regulation text instead of using description
-    regulation_objs = []
-    for reg in regs:
-        # Use the document number (regulation_id) to fetch full text
-        try:
-            # Fetch regulation text from file system
-            from src.api.obligations_ingest import extract_obligations_from_text
-            filename = f"{reg.regulation_id}.txt"
-            full_text = read_file(filename)
-            
-            if not full_text or full_text.startswith("Error"):
-                print(f"⚠️ Could not load text for {reg.regulation_id}")
-                continue
-            
-            # Extract obligations from the full text
-            from src.api.obligations_ingest import extract_obligations_from_text
-            obligations = extract_obligations_from_text(
-                doc_id=reg.regulation_id,
-                raw_text=full_text,
-                meta={}
-            )
-            
-            # Use obligations text as requirement text (concatenate if multiple)
-            if obligations:
-                requirement_text = " ".join([obl.get("text", "") for obl in obligations[:3]])  # Use first 3 obligations
-            else:
-                requirement_text = full_text[:500]  # Fallback to first 500 chars
-            
-            regulation_objs.append({
-                "Reg_ID": reg.regulation_id,
-                "Requirement_Text": requirement_text,
-                "Risk_Rating": reg.risk or "",
-                "Target_Area": reg.category or "",
-                "Dow_Focus": reg.region or ""
-            })
-        except Exception as e:
-            print(f"❌ Error processing regulation {reg.regulation_id}: {e}")
-            continue
+    regulation_objs = _obligation_regulation_objs(regs)
 
 # Run compliance check with error handling
     error_msg = None
     try:
-        checker = RAGComplianceChecker(pdf_path=pdf_path, regulations=regulation_objs)
-        results = checker.run_check()
+        stored_embeddings = load_regulation_embeddings(
+            db, [r["Requirement_Text"] for r in regulation_objs]
+        )
+        checker = RAGComplianceChecker(
+            pdf_path=pdf_path,
+            regulations=regulation_objs,
+            regulation_embeddings=stored_embeddings,
+            previous_doc_hash=_previous_content_hash(user_uid, entry),
+            user_id=user_uid
+        )
+        _load_previous_results(db, checker, incremental=payload.get("incremental", True))
+        results = checker.run_check(narratives=narrative_mode)
         summary = checker.dashboard_summary(results)
+        _store_audit_results(db, checker, results, user_uid, file_id)
         
         print("✅ DEBUG: RAW RESULTS")
         print(results)
@@ -1719,18 +2048,7 @@ async def run_compliance_payload(payload: dict):
         traceback.print_exc()
         error_msg = str(e)
         results = []
-        # Fallback summary with same keys UI expects
-        summary = {
-            "status": "error",
-            "action": "RAG Compliance Check",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "industry": None,
-            "regulations_checked": len(regulation_objs),
-            "compliance_score": 0.0,
-            "high_risk_gaps": 0,
-            "gap_details": [],
-            "details": "Compliance engine failed. Please retry or review logs."
-        }
+        summary = _failed_rag_summary(len(regulation_objs))
 
     # Save audit (even if RAG failed)
     audit_save = upsert_audit_to_neo4j(
@@ -1762,6 +2080,269 @@ async def run_compliance_payload(payload: dict):
     }
 
 
+@app.post("/api/rag/run_compliance/stream")
+def run_rag_compliance_stream(
+    payload: dict,
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming /api/rag/run_compliance: NDJSON events, one per line. Each
+    regulation's result is sent as soon as it is scored, gap narratives as
+    they finish, and a final "summary" event once the audit is saved.
+    """
+    user_uid = payload.get("user_uid")
+    file_id = payload.get("file_id")
+    regulation_ids = payload.get("regulation_ids", [])
+    narrative_mode = "lazy" if payload.get("lazy_narratives") else "eager"
+
+    if not user_uid or not file_id:
+        raise HTTPException(status_code=400, detail="Missing user_uid or file_id")
+
+    if not regulation_ids:
+        raise HTTPException(status_code=400, detail="No regulations selected")
+
+    result = get_user_file_path(user_uid, file_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    file_path, file_entry = result
+    regs = (
+        db.query(WorkspaceRegulation)
+        .filter(
+            WorkspaceRegulation.user_uid == user_uid,
+            WorkspaceRegulation.regulation_id.in_(regulation_ids)
+        )
+        .all()
+    )
+    if not regs:
+        raise HTTPException(status_code=404, detail="No matching regulations found")
+
+    regulation_objs = _workspace_regulation_objs(regs)
+    return StreamingResponse(
+        _ndjson(_compliance_events(
+            user_uid, file_id, file_path, file_entry, regulation_objs,
+            narrative_mode=narrative_mode,
+            supplier_id=payload.get("supplier_id"),
+            metadata={
+                "file_name": file_entry.get("original_name"),
+                "regulation_count": len(regulation_objs)
+            },
+            incremental=payload.get("incremental", True),
+        )),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/rag/run_compliance_payload/stream")
+def run_compliance_payload_stream(
+    payload: dict,
+    db: Session = Depends(get_db)
+):
+    """Streaming /api/rag/run_compliance_payload (same NDJSON events as /api/rag/run_compliance/stream)."""
+    user_uid = payload.get("user_uid")
+    file_id = payload.get("file_id")
+    regulation_ids = payload.get("regulation_ids", [])
+    narrative_mode = "lazy" if payload.get("lazy_narratives") else "eager"
+
+    if not user_uid or not file_id:
+        raise HTTPException(status_code=400, detail="Missing user_uid or file_id")
+
+    result = get_user_file_path(user_uid, file_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Evidence file not found")
+
+    pdf_path, entry = result
+    regs = db.query(WorkspaceRegulation).filter(
+        WorkspaceRegulation.user_uid == user_uid,
+        WorkspaceRegulation.regulation_id.in_(regulation_ids)
+    ).all()
+    if not regs:
+        raise HTTPException(status_code=404, detail="No regulations found")
+
+    regulation_objs = _obligation_regulation_objs(regs)
+    return StreamingResponse(
+        _ndjson(_compliance_events(
+            user_uid, file_id, pdf_path, entry, regulation_objs,
+            narrative_mode=narrative_mode,
+            incremental=payload.get("incremental", True),
+        )),
+        media_type="application/x-ndjson",
+    )
+
+
+def _compliance_job(payload, progress):
+    """
+    Job handler for "rag_compliance": runs one file audit, reporting each
+    regulation's results as partial results. payload is the
+    /api/rag/run_compliance body plus optional "source": "obligations" to
+    use obligation text like /api/rag/run_compliance_payload.
+    """
+    user_uid = payload.get("user_uid")
+    file_id = payload.get("file_id")
+    found = get_user_file_path(user_uid, file_id)
+    if not found:
+        raise ValueError("File not found")
+    file_path, file_entry = found
+
+    db = SessionLocal()
+    try:
+        regs = (
+            db.query(WorkspaceRegulation)
+            .filter(
+                WorkspaceRegulation.user_uid == user_uid,
+                WorkspaceRegulation.regulation_id.in_(payload.get("regulation_ids", []))
+            )
+            .all()
+        )
+        if payload.get("source") == "obligations":
+            regulation_objs = _obligation_regulation_objs(regs)
+        else:
+            regulation_objs = _workspace_regulation_objs(regs)
+    finally:
+        db.close()
+    if not regulation_objs:
+        raise ValueError("No matching regulations found")
+
+    scored = set()
+    summary = None
+    for event in _compliance_events(
+        user_uid, file_id, file_path, file_entry, regulation_objs,
+        narrative_mode="lazy" if payload.get("lazy_narratives") else "eager",
+        supplier_id=payload.get("supplier_id"),
+        metadata={
+            "file_name": file_entry.get("original_name"),
+            "regulation_count": len(regulation_objs),
+            "job": True,
+        },
+        incremental=payload.get("incremental", True),
+    ):
+        if event["event"] == "start":
+            progress.set_total(event["regulations"])
+        elif event["event"] == "result":
+            # result dicts are updated in place when their narrative finishes
+            scored.add(event["result"].get("Reg_ID"))
+            progress.add(event["result"], done=len(scored))
+        elif event["event"] == "summary":
+            summary = event
+
+    if summary is None or summary["status"] != "success":
+        raise RuntimeError((summary or {}).get("error") or "Compliance run failed")
+    summary.pop("event", None)
+    return summary
+
+
+register_job_handler("rag_compliance", _compliance_job)
+
+
+@app.post("/api/jobs/compliance")
+def submit_compliance_job(
+    payload: dict,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a RAG compliance audit (same body as /api/rag/run_compliance) and
+    return its job_id at once; poll GET /api/jobs/{job_id} for progress.
+    """
+    user_uid = payload.get("user_uid")
+    if not user_uid or not payload.get("file_id"):
+        raise HTTPException(status_code=400, detail="Missing user_uid or file_id")
+    if not payload.get("regulation_ids"):
+        raise HTTPException(status_code=400, detail="No regulations selected")
+
+    job_id = submit_job(db, "rag_compliance", payload, user_uid=user_uid)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_compliance_job(
+    job_id: str,
+    include_results: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Job status, progress (regulations scored / total), partial results, result and error."""
+    job = get_job(db, job_id, include_results=include_results)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/compliance/matrix/{user_uid}")
+def compliance_matrix(user_uid: str, db: Session = Depends(get_db)):
+    """Precomputed file x regulation scores with per-file and per-regulation rollups (no audit run)."""
+    return get_matrix(db, user_uid)
+
+
+@app.post("/api/compliance/matrix/{user_uid}/rebuild")
+def rebuild_compliance_matrix(user_uid: str):
+    """Queue a full recompute of the user's matrix."""
+    schedule_matrix_update(user_uid)
+    return {"status": "scheduled", "user_uid": user_uid}
+
+
+@app.get("/api/evidence/search")
+def evidence_search(
+    user_uid: str,
+    q: str,
+    top_k: int = 10,
+    department: Optional[str] = None,
+    file_type: Optional[str] = None,
+    file_id: Optional[str] = None,
+):
+    """
+    Search every FileHub document of a user with one ANN query
+    (e.g. "MFA for privileged accounts"), optionally filtered by
+    department, file type or file.
+    """
+    if not user_uid:
+        raise HTTPException(status_code=400, detail="Missing user_uid")
+    return search_evidence(
+        user_uid, q,
+        top_k=max(1, min(int(top_k), 100)),
+        department=department,
+        file_type=file_type,
+        file_id=file_id,
+    )
+
+
+@app.post("/api/regulations/recommend")
+def recommend_regulations(payload: dict, db: Session = Depends(get_db)):
+    """
+    Top-N regulations (federal, CFR, Michigan) for an uploaded policy
+    ("file_id") or a user profile ("industry", "departments"), from the
+    prebuilt regulation index (scripts/build_regulation_index.py).
+    They are marked as recommended in the user's workspace unless "apply" is false.
+    """
+    user_uid = payload.get("user_uid")
+    file_id = payload.get("file_id")
+    top_n = max(1, min(int(payload.get("top_n", 20)), 100))
+    sources = payload.get("sources")  # optional subset of ["federal", "cfr", "michigan"]
+
+    if not user_uid:
+        raise HTTPException(status_code=400, detail="Missing user_uid")
+
+    if file_id:
+        found = get_user_file_path(user_uid, file_id)
+        if not found:
+            raise HTTPException(status_code=404, detail="File not found")
+        file_path, entry = found
+        recs = recommend_for_policy(entry.get("content_hash") or content_sha256(file_path), file_path,
+                                    top_n=top_n, sources=sources)
+    else:
+        industry = payload.get("industry")
+        departments = payload.get("departments")
+        if not industry:
+            user = db.query(User).filter(User.uid == user_uid).first()
+            industry = user.industry if user else None
+            departments = departments or ([user.department] if user and user.department else None)
+        recs = recommend_for_profile(industry, departments, top_n=top_n, sources=sources)
+
+    applied = apply_recommendations(db, user_uid, recs) if payload.get("apply", True) else 0
+    return {
+        "recommendations": [{k: v for k, v in r.items() if k != "meta"} for r in recs],
+        "applied": applied,
+    }
+
+
 # external_intelligence endpoint updated to use safe_chat_completion
 
 
@@ -2058,11 +2639,6 @@ async def run_audit_on_file(file_id: str, user_uid: str):
 
     file_path, entry = result
 
-    with open(file_path, "rb") as f:
-        pdf_bytes = f.read()
-
-    text = extract_text_from_pdf_bytes(pdf_bytes)
-
     if not os.path.exists("sample_regulations.json"):
         raise HTTPException(status_code=500, detail="sample_regulations.json missing")
 
@@ -2280,10 +2856,11 @@ async def extract_file(file_id: str, user_uid: str, db: Session = Depends(get_db
 
     file_path, entry = result
 
-    with open(file_path, "rb") as f:
-        file_bytes = f.read()
-
-    text = extract_text_from_pdf_bytes(file_bytes)
+    try:
+        text = get_text_artifact(file_path, entry.get("content_hash")).text
+    except Exception as e:
+        print("PDF extraction failed:", e)
+        text = ""
     metadata = extract_document_metadata(text)
 
     if not metadata.get("ok"):
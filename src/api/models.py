@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, JSON, LargeBinary, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -161,4 +161,98 @@ class WorkspaceRegulation(Base):
     description = Column(String, nullable=True)
     recommended = Column(Boolean, default=False)
     
-    source = Column(String, nullable=True)
\ No newline at end of file
+    source = Column(String, nullable=True)
+
+
+class RegulationEmbedding(Base):
+    __tablename__ = "regulation_embeddings"
+    __table_args__ = (UniqueConstraint("text_hash", "model_name", name="uq_regulation_embedding"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # sha256 of the normalized requirement text the audit queries with
+    text_hash = Column(String, index=True, nullable=False)
+    model_name = Column(String, index=True, nullable=False)
+
+    dim = Column(Integer)
+    vector = Column(LargeBinary)  # float32 bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AuditResultRecord(Base):
+    """Per-regulation RAG results for one document version (see src/core/result_store.py)."""
+    __tablename__ = "audit_result_records"
+    __table_args__ = (
+        UniqueConstraint("doc_hash", "reg_text_hash", "embedding_model", "threshold", "top_k",
+                         name="uq_audit_result_record"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_uid = Column(String, index=True)
+    file_id = Column(String, index=True)
+
+    # content sha256 of the audited file
+    doc_hash = Column(String, index=True, nullable=False)
+    reg_id = Column(String)
+    reg_text_hash = Column(String, index=True, nullable=False)
+
+    # scoring configuration the results are valid for
+    embedding_model = Column(String, nullable=False)
+    threshold = Column(String, nullable=False)
+    top_k = Column(Integer, nullable=False)
+
+    # comma-joined chunk hashes of the retrieved evidence, best first
+    evidence_hashes = Column(String)
+    results = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ComplianceJob(Base):
+    """Queued/running compliance audit (see src/core/jobs.py)."""
+    __tablename__ = "compliance_jobs"
+
+    job_id = Column(String, primary_key=True, index=True)
+    user_uid = Column(String, index=True)
+    kind = Column(String, nullable=False)
+
+    # queued | running | succeeded | failed
+    status = Column(String, index=True, nullable=False, default="queued")
+    payload = Column(JSON)
+
+    progress = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    partial_results = Column(JSON)
+    result = Column(JSON)
+    error = Column(String)
+    attempts = Column(Integer, default=0)
+
+    # worker process that queued or resumed the job, refreshed while it runs there
+    owner = Column(String)
+    heartbeat_at = Column(DateTime, index=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ComplianceMatrixCell(Base):
+    """Precomputed best score of one workspace file against one regulation (see src/core/compliance_matrix.py)."""
+    __tablename__ = "compliance_matrix"
+    __table_args__ = (UniqueConstraint("user_uid", "file_id", "regulation_id", name="uq_compliance_matrix_cell"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_uid = Column(String, index=True, nullable=False)
+    file_id = Column(String, index=True, nullable=False)
+    regulation_id = Column(String, index=True, nullable=False)
+
+    # inputs the cell was computed from
+    doc_hash = Column(String)
+    reg_text_hash = Column(String)
+    model_key = Column(String)
+
+    score = Column(Float)
+    is_compliant = Column(Boolean)
+    evidence_chunk = Column(String)
+    evidence_location = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
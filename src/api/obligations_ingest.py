@@ -21,6 +21,7 @@ except Exception as e:
 
 # Safe LLM wrapper (your repo)
 from src.core.client import safe_chat_completion
+from src.core.segmentation import split_sentences
 
 # Neo4j driver
 from neo4j import GraphDatabase, basic_auth
@@ -33,7 +34,6 @@ DEONTIC_PATTERNS = {
     "prohibition": re.compile(r"\b(shall not|must not|is prohibited|may not|prohibited from)\b", re.I),
     "permission": re.compile(r"\b(may|is permitted|allowed to)\b", re.I),
 }
-SENT_SPLIT_RE = re.compile(r'(?<=[\.\?\!;])\s+(?=[A-Z0-9"])')
 
 
 def normalize_text(s: str) -> str:
@@ -262,7 +262,8 @@ def extract_obligations_from_text(
     auto_create_threshold: float = 0.85,
 ) -> List[Dict[str, Any]]:
     meta = meta or {}
-    sents = SENT_SPLIT_RE.split(raw_text or "")
+    # Shared segmenter; ";" also ends a clause for obligation extraction
+    sents = split_sentences(raw_text or "", semicolons=True)
     out: List[Dict[str, Any]] = []
 
     for sent in sents:
@@ -1,14 +1,24 @@
 import os
-import uuid
-import re
-import chromadb
 import math
+import time
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime, timezone
-from PyPDF2 import PdfReader
+from src.core.text_artifacts import get_text_artifact
+from src.core.policy_index import get_policy_index, file_sha256, EMBED_BATCH_SIZE, AUDIT_CHUNK_VARIANT
+from src.core.dedup import dedup_chunks
+from src.core.chunking import token_chunks, chunk_stats, CHUNK_TARGET_TOKENS, CHUNK_OVERLAP_TOKENS
+from src.core.regulation_embeddings import lookup_query_vectors, regulation_text_hash
+from src.core.result_store import evidence_hashes
+from src.core.segmentation import sentence_spans, split_sentences, group_spans
+
 FALLBACK_NARRATIVE = (
     "The system could not generate an AI gap narrative for this requirement. "
     "Treat this as not fully assessed and review the evidence manually."
 )
+# Placeholder narrative for gaps whose narrative is generated on demand
+NARRATIVE_PENDING = "pending"
 
 # --- Helpers required by scripts/reindex_chroma.py and others ---
 
@@ -20,16 +30,48 @@ except Exception:
     except Exception:
         get_llm = None
 
+try:
+    from src.core.client import rate_limit_wait_time
+except Exception:
+    def rate_limit_wait_time(user_id: str = "default") -> float:
+        return 0.0
+
+# Gap narratives run on a bounded thread pool with a per-run deadline.
+NARRATIVE_WORKERS = int(os.getenv("RAG_NARRATIVE_WORKERS", "4"))
+NARRATIVE_DEADLINE_SECONDS = float(os.getenv("RAG_NARRATIVE_DEADLINE", "90"))
+# Pack several gaps into one LLM prompt (compliance_narratives.generate_gap_summaries_batch)
+NARRATIVE_BATCHING = os.getenv("RAG_NARRATIVE_BATCHING", "1") == "1"
+# Drop near-duplicate chunks (boilerplate, headers/footers) before embedding
+DEDUP_CHUNKS = os.getenv("RAG_DEDUP_CHUNKS", "0") == "1"
+# "sentences" (~3 sentences per chunk) or "tokens" (token budget with overlap, see chunking.py)
+CHUNKER = os.getenv("RAG_CHUNKER", "sentences")
+# "auto" (OpenAI, then local sentence-transformers) or "hashing" (model-free, see hashing_embeddings.py)
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "auto").strip().lower()
+
 
 def split_into_sentences(text: str):
     """
-    Return list of sentences using the same pattern used in the class.
+    Return list of sentences (shared segmenter, see src/core/segmentation.py).
     Re-usable by scripts that want to chunk the PDF text.
     """
-    if not text:
-        return []
-    sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
-    return [s.strip() for s in sentences if s and s.strip()]
+    return split_sentences(text)
+
+
+def chunk_text_with_spans(text: str, max_sentences=3):
+    """
+    Group sentences into ~max_sentences chunks, keeping where each chunk
+    sits in text: [{"text", "char_start", "char_end", "chunk_hash"}].
+    """
+    chunks = []
+    for group in group_spans(sentence_spans(text), max_sentences):
+        chunk = " ".join(text[s:e] for s, e in group)
+        chunks.append({
+            "text": chunk,
+            "char_start": group[0][0],
+            "char_end": group[-1][1],
+            "chunk_hash": hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16],
+        })
+    return chunks
 
 
 def chunk_sentences(sentences, max_sentences=3):
@@ -73,11 +115,17 @@ def create_embeddings_batch(text_batch, model_name="text-embedding-3-small"):
       1. If src.core.client.get_llm() exists and returns a client, call client.embeddings.create(...)
       2. Else, if sentence-transformers is installed, use it as fallback (local embeddings)
       3. Otherwise raise a clear error.
+    RAG_EMBEDDING_BACKEND=hashing skips all of the above and returns hashed
+    TF-IDF vectors (no network, no model download).
     Returns: list of embeddings (list of lists/floats) in same order as text_batch.
     """
     if not isinstance(text_batch, (list, tuple)):
         raise ValueError("text_batch must be a list of strings")
 
+    if EMBEDDING_BACKEND == "hashing":
+        from src.core.hashing_embeddings import get_hashing_embedder
+        return get_hashing_embedder()(list(text_batch))
+
     # Try OpenAI via centralized client
     if get_llm is not None:
         client = get_llm()
@@ -103,12 +151,11 @@ def create_embeddings_batch(text_batch, model_name="text-embedding-3-small"):
                 except Exception:
                     pass
 
-    # Fallback: sentence-transformers if available
+    # Fallback: sentence-transformers via the shared per-worker embedding service
     try:
-        from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer("all-mpnet-base-v2")
-        embs = model.encode(text_batch, convert_to_numpy=False, show_progress_bar=False)
-        return [list(e) for e in embs]
+        from src.core.embedding_service import get_embedding_service
+        embs = get_embedding_service("all-mpnet-base-v2").encode(list(text_batch))
+        return [list(map(float, e)) for e in embs]
     except Exception:
         pass
 
@@ -133,6 +180,33 @@ except Exception:
     except Exception:
         USE_CENTRALIZED_LLM = False
 
+try:
+    from src.core.compliance_narratives import generate_gap_summaries_batch
+except Exception:
+    generate_gap_summaries_batch = None
+
+
+def narrative_from_gap_summary(resp):
+    """Format a generate_gap_summary response as a one-line narrative (FALLBACK_NARRATIVE on error)."""
+    if not resp or not resp.get("ok"):
+        # Helper returned error or falsey response
+        return FALLBACK_NARRATIVE
+    result = resp.get("result") or {}
+    summary = result.get("summary") or ""
+    missing = result.get("missing_items", [])
+    confidence = result.get("confidence", None)
+
+    parts = []
+    if summary:
+        parts.append(f"GAP SUMMARY: {str(summary).strip()}")
+    if missing:
+        parts.append(f"MISSING: {', '.join(str(m) for m in missing[:5])}")
+    if confidence is not None:
+        parts.append(f"CONFIDENCE: {confidence}")
+
+    return " | ".join([p for p in parts if p]) if parts else FALLBACK_NARRATIVE
+
+
 # Import OpenAI only if needed for fallback behavior.
 OpenAI = None
 if not USE_CENTRALIZED_LLM:
@@ -144,14 +218,42 @@ if not USE_CENTRALIZED_LLM:
 
 class ComplianceChecker:
     def __init__(self, pdf_path, regulations, collection_name="policies",
-                 compliance_threshold=0.60, top_k=1):
+                 compliance_threshold=0.60, top_k=1, policy_index=None,
+                 narrative_workers=NARRATIVE_WORKERS,
+                 narrative_deadline=NARRATIVE_DEADLINE_SECONDS,
+                 narrative_batching=NARRATIVE_BATCHING,
+                 regulation_embeddings=None,
+                 previous_doc_hash=None,
+                 previous_results=None,
+                 stored_results=None,
+                 dedup=DEDUP_CHUNKS,
+                 chunker=CHUNKER,
+                 user_id="default"):
         self.pdf_path = pdf_path
         self.regulations = regulations
         self.collection_name = collection_name
         self.compliance_threshold = compliance_threshold
         self.top_k = top_k
+        self.stage_timings = {}
+        self.narrative_workers = narrative_workers
+        self.narrative_deadline = narrative_deadline
+        self.narrative_batching = narrative_batching
+        # {regulation_text_hash: vector} precomputed for the index's embedding model
+        self.regulation_embeddings = regulation_embeddings or {}
+        # Previous version of this document (FileHub lineage): its vectors are
+        # reused for unchanged chunks, and its stored results
+        # {reg_text_hash: {"evidence_hashes", "results"}} for unchanged evidence
+        self.previous_doc_hash = previous_doc_hash
+        self.previous_results = previous_results or {}
+        # Stored results for this same document and configuration (same
+        # shape): regulations found here are assembled, not re-scored
+        self.stored_results = stored_results or {}
+        self.dedup = dedup
+        self.dedup_stats = None
+        self.chunker = chunker
+        self.chunk_stats = None
+        self.user_id = user_id
 
-        
         self.llm_client = None
         if not USE_CENTRALIZED_LLM:
             openai_key = os.environ.get("OPENAI_API_KEY")
@@ -161,48 +263,62 @@ class ComplianceChecker:
                 raise ImportError("openai package not installed but OPENAI_API_KEY is required for inline LLM fallback.")
             self.llm_client = OpenAI(api_key=openai_key)
 
-        # ChromaDB setup
-        self.chroma_client = chromadb.Client()
-        self.collection = self.chroma_client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
+        # Persistent, content-hash-keyed index: one namespace per document.
+        # Re-auditing the same file skips extraction and embedding entirely.
+        if not os.path.exists(self.pdf_path):
+            raise FileNotFoundError(f"PDF not found at: {self.pdf_path}")
+        self.policy_index = policy_index or get_policy_index()
+        self.doc_hash = file_sha256(self.pdf_path)
+        self.index_variant = self._index_variant()
+        self.collection, self.index_reused = self.policy_index.get_or_build(
+            self.doc_hash,
+            self.read_pdf_and_chunk,
+            namespace=self.collection_name,
+            variant=self.index_variant,
+            reuse_from=self.previous_doc_hash,
         )
+        if self.index_reused:
+            print(f"Reusing {self.collection.count()} indexed chunks for document {self.doc_hash[:12]}.")
 
-        # Load and insert policy text
-        self.policies = self.read_pdf_and_chunk()
-        if self.collection.count() == 0:
-            self.collection.add(
-                ids=[str(uuid.uuid4()) for _ in self.policies],
-                documents=self.policies,
-                metadatas=[{"chunk": i} for i in range(len(self.policies))]
-            )
-            print(f"Inserted {len(self.policies)} chunks into Chroma collection '{self.collection_name}'.")
+    def _index_variant(self):
+        if self.chunker == "tokens":
+            variant = f"tok{CHUNK_TARGET_TOKENS}o{CHUNK_OVERLAP_TOKENS}-loc"
+        else:
+            variant = AUDIT_CHUNK_VARIANT
+        return f"{variant}-dedup" if self.dedup else variant
+
+    @property
+    def result_model_key(self):
+        """Embedding model plus chunking variant: stored results are only valid for both."""
+        return f"{self.policy_index.embedding_model}:{self.index_variant}"
 
     def read_pdf_and_chunk(self, max_sentences=3):
-        """Read PDF and return list of ~3-sentence chunks."""
+        """
+        Read PDF and return ~3-sentence (or token-budget) chunks with their evidence location:
+        page range, character span in the document's text artifact and a
+        chunk hash, so evidence can be highlighted without re-parsing.
+        """
         if not os.path.exists(self.pdf_path):
             raise FileNotFoundError(f"PDF not found at: {self.pdf_path}")
 
-        reader = PdfReader(self.pdf_path)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + " "
-
-        # Split into sentences and group into chunks
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
-        chunks, current_chunk = [], []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            if len(current_chunk) >= max_sentences:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = []
-            current_chunk.append(sentence)
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        # Parsed once per file content; later runs read the stored artifact
+        artifact = get_text_artifact(self.pdf_path, content_hash=getattr(self, "doc_hash", None))
+        self.extraction_stats = artifact.stats
+
+        if self.chunker == "tokens":
+            chunks = token_chunks(artifact.text)
+        else:
+            chunks = chunk_text_with_spans(artifact.text, max_sentences=max_sentences)
+        for c in chunks:
+            c["page"] = artifact.page_for_offset(c["char_start"])
+            c["page_end"] = artifact.page_for_offset(max(c["char_end"] - 1, c["char_start"]))
+
+        if self.dedup:
+            chunks, self.dedup_stats = dedup_chunks(chunks, batch_size=EMBED_BATCH_SIZE)
+            print(f"Dedup: kept {self.dedup_stats['chunks_kept']}/{self.dedup_stats['chunks_in']} chunks "
+                  f"(ratio {self.dedup_stats['dedup_ratio']}, "
+                  f"{self.dedup_stats['embedding_calls_saved']} embedding calls saved).")
+        self.chunk_stats = chunk_stats(chunks)
         return chunks
 
     def _extract_content_from_completion(self, completion):
@@ -255,25 +371,8 @@ class ComplianceChecker:
         """
         if USE_CENTRALIZED_LLM:
             try:
-                resp = generate_gap_summary(regulation_text=reg_text, evidence_chunks=[evidence_chunk])
-                if resp and resp.get("ok"):
-                    result = resp.get("result") or {}
-                    summary = result.get("summary") or ""
-                    missing = result.get("missing_items", [])
-                    confidence = result.get("confidence", None)
-                    
-                    parts = []
-                    if summary:
-                        parts.append(f"GAP SUMMARY: {summary.strip()}")
-                    if missing:
-                        parts.append(f"MISSING: {', '.join(missing[:5])}")
-                    if confidence is not None:
-                        parts.append(f"CONFIDENCE: {confidence}")
-                    
-                    return " | ".join([p for p in parts if p]) if parts else FALLBACK_NARRATIVE
-                else:
-                    # Helper returned error or falsey response
-                    return FALLBACK_NARRATIVE
+                resp = generate_gap_summary(regulation_text=reg_text, evidence_chunks=[evidence_chunk], user_id=self.user_id)
+                return narrative_from_gap_summary(resp)
             except Exception:
                 # Unexpected helper failure
                 return FALLBACK_NARRATIVE
@@ -307,17 +406,322 @@ GAP SUMMARY:"""
         except Exception:
             return FALLBACK_NARRATIVE
 
-    def run_check(self):
+    def _embed_queries(self, texts):
+        """
+        Query vectors for all requirement texts. Precomputed regulation
+        embeddings are used where available; the rest are embedded with one
+        call to the index's embedding function.
+        """
+        if not texts:
+            return []
+        vectors = lookup_query_vectors(texts, self.regulation_embeddings)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = self.policy_index.embedding_function([texts[i] for i in missing])
+            for i, v in zip(missing, fresh):
+                vectors[i] = list(map(float, v))
+        self.stage_timings["query_embeddings_reused"] = len(texts) - len(missing)
+        return vectors
+
+    def _retrieve_matrix(self, query_matrix, n_results):
+        """
+        Exact retrieval against a precomputed, L2-normalized regulation
+        matrix: load this document's chunk embeddings once, score every
+        regulation with a single matrix multiply and keep the top n_results.
+        Distances are 1 - cosine, matching the Chroma collections.
+        """
+        t = time.perf_counter()
+        stored = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        documents = stored.get("documents") or []
+        metadatas = stored.get("metadatas") or [{} for _ in documents]
+        chunk_matrix = _normalize_rows(np.asarray(stored.get("embeddings"), dtype=np.float32))
+        self.stage_timings["load_chunk_embeddings"] = round(time.perf_counter() - t, 4)
+
+        t = time.perf_counter()
+        sims = query_matrix @ chunk_matrix.T
+        k = min(n_results, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        self.stage_timings["retrieval"] = round(time.perf_counter() - t, 4)
+
+        docs = [[documents[j] for j in row] for row in top]
+        dists = (1.0 - top_sims).tolist()
+        metas = [[metadatas[j] for j in row] for row in top]
+        return docs, dists, metas
+
+    def _retrieve(self, query_texts, n_results, batched=True, query_matrix=None):
+        """
+        Return (documents, distances, metadatas) lists with one row per query.
+        Batched mode embeds every query in one call and sends a single
+        collection.query; the per-regulation loop is kept for comparison.
+        A precomputed query_matrix (see run_portfolio_check) skips both.
+        """
+        if query_matrix is not None:
+            return self._retrieve_matrix(query_matrix, n_results)
+
+        if batched:
+            t = time.perf_counter()
+            query_embeddings = self._embed_queries(query_texts)
+            self.stage_timings["embed_queries"] = round(time.perf_counter() - t, 4)
+
+            t = time.perf_counter()
+            result = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                include=["documents", "distances", "metadatas"],
+            )
+            self.stage_timings["retrieval"] = round(time.perf_counter() - t, 4)
+            docs = result.get("documents") or [[] for _ in query_texts]
+            dists = result.get("distances") or [[] for _ in query_texts]
+            metas = result.get("metadatas") or [[{} for _ in d] for d in docs]
+            return docs, dists, metas
+
+        docs, dists, metas = [], [], []
+        t = time.perf_counter()
+        for query_text in query_texts:
+            result = self.collection.query(query_texts=[query_text], n_results=n_results)
+            d = result["documents"][0] if result.get("documents") else []
+            docs.append(d)
+            dists.append(result["distances"][0] if result.get("distances") else [])
+            metas.append(result.get("metadatas", [[]])[0] if result.get("metadatas") else [{} for _ in d])
+        self.stage_timings["retrieval"] = round(time.perf_counter() - t, 4)
+        return docs, dists, metas
+
+    def _carried_forward_narratives(self, reg_text, reg_results):
+        """
+        Narratives (one per rank, None where not reusable) from the previous
+        document version if this regulation retrieved exactly the same
+        evidence chunks there; None if the evidence changed.
+        """
+        previous = self.previous_results.get(regulation_text_hash(reg_text)) if self.previous_results else None
+        if not previous or not reg_results:
+            return None
+        current = evidence_hashes(reg_results)
+        if not all(current.split(",")) or previous.get("evidence_hashes") != current:
+            return None
+
+        self.stage_timings["carried_forward"] += 1
+        narratives = []
+        for r in previous.get("results") or []:
+            narrative = r.get("Narrative_Gap")
+            ready = r.get("Narrative_Status", "ready") != "pending" and narrative not in (None, "", FALLBACK_NARRATIVE)
+            narratives.append(narrative if ready else None)
+        return narratives
+
+    def _stored_results_for(self, reg, reg_text, narratives):
+        """
+        Copies of this document's stored results for a regulation, or None if
+        there are none or they are stale (eager run but a narrative is still
+        pending or fell back).
+        """
+        stored = self.stored_results.get(regulation_text_hash(reg_text)) if self.stored_results else None
+        if not stored or not stored.get("results"):
+            return None
+        results = []
+        for r in stored["results"]:
+            if narratives != "lazy" and not r.get("Is_Compliant") and (
+                r.get("Narrative_Status") == "pending" or r.get("Narrative_Gap") == FALLBACK_NARRATIVE
+            ):
+                return None
+            results.append({
+                **r,
+                "Reg_ID": reg.get("Reg_ID"),
+                "Risk_Rating": reg.get("Risk_Rating"),
+                "Target_Area": reg.get("Target_Area"),
+                "Dow_Focus": reg.get("Dow_Focus"),
+                "Reused": True,
+            })
+        return results
+
+    def _evidence_location(self, meta):
+        """Where an evidence chunk sits in the source document (None for legacy chunks)."""
+        if not meta or "char_start" not in meta:
+            return None
+        return {
+            "doc_hash": self.doc_hash,
+            "chunk": meta.get("chunk"),
+            "page": meta.get("page"),
+            "page_end": meta.get("page_end"),
+            "char_start": meta.get("char_start"),
+            "char_end": meta.get("char_end"),
+            "chunk_hash": meta.get("chunk_hash"),
+        }
+
+    @staticmethod
+    def _similarity_matrix(dists, width):
+        """Cosine distances (ragged, may contain None) -> similarity matrix, missing = 0."""
+        sims = np.zeros((len(dists), width), dtype=np.float64)
+        for i, row in enumerate(dists):
+            if not row:
+                continue
+            vals = np.array([np.nan if d is None else d for d in row[:width]], dtype=np.float64)
+            sims[i, :len(vals)] = np.nan_to_num(1.0 - vals, nan=0.0)
+        return sims
+
+    def _wait_for_rate_limit(self, deadline):
+        """Block until the shared LLM rate limiter has a free slot; False if that would pass the deadline."""
+        while True:
+            wait = rate_limit_wait_time(self.user_id)
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    def _narrative_units(self, gaps):
+        """
+        Split gaps into units of work: (gap indexes, callable returning one
+        narrative per index). With batching enabled, each unit is a multi-gap
+        prompt sized by compliance_narratives' token budget.
+        """
+        if self.narrative_batching and USE_CENTRALIZED_LLM and generate_gap_summaries_batch is not None and len(gaps) > 1:
+            from src.core.compliance_narratives import plan_gap_batches
+            items = [
+                {"Reg_ID": reg_id, "regulation_text": reg_text, "evidence_chunks": [doc]}
+                for reg_id, reg_text, doc in gaps
+            ]
+            units = []
+            for batch in plan_gap_batches(items):
+                def run(batch=batch):
+                    responses = generate_gap_summaries_batch([items[i] for i in batch], user_id=self.user_id)
+                    return [narrative_from_gap_summary(r) for r in responses]
+                units.append((batch, run))
+            return units
+
+        return [
+            ([i], lambda reg_text=reg_text, doc=doc: [self.generate_llm_narrative(reg_text, doc)])
+            for i, (_, reg_text, doc) in enumerate(gaps)
+        ]
+
+    def _generate_narratives(self, gaps):
+        """
+        Generate narratives for (reg_id, reg_text, evidence_chunk) gaps on a
+        bounded thread pool. Output order matches the input order. Gaps that
+        have not finished when the run deadline passes get FALLBACK_NARRATIVE.
+        """
+        narratives = [FALLBACK_NARRATIVE] * len(gaps)
+        for i, narrative in self._iter_narratives(gaps):
+            narratives[i] = narrative
+        return narratives
+
+    def _iter_narratives(self, gaps):
+        """
+        Yield (gap index, narrative) as each narrative finishes; gaps still
+        running at the deadline are yielded last with FALLBACK_NARRATIVE.
+        """
+        if not gaps:
+            return
+
+        deadline = time.monotonic() + float(self.narrative_deadline)
+        units = self._narrative_units(gaps)
+        workers = max(1, min(int(self.narrative_workers), len(units)))
+        self.stage_timings["narrative_requests"] = len(units)
+
+        def task(run):
+            if time.monotonic() >= deadline or not self._wait_for_rate_limit(deadline):
+                return None
+            return run()
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-narrative")
+        futures = {pool.submit(task, run): indexes for indexes, run in units}
+        done = set()
+        try:
+            for fut in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+                try:
+                    produced = list(fut.result() or [])
+                except Exception:
+                    produced = []
+                for pos, i in enumerate(futures[fut]):
+                    narrative = produced[pos] if pos < len(produced) else None
+                    done.add(i)
+                    yield i, narrative or FALLBACK_NARRATIVE
+        except FuturesTimeout:
+            unfinished = len(gaps) - len(done)
+            print(f"Narrative deadline of {self.narrative_deadline}s reached; {unfinished} gaps use the fallback narrative.")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for i in range(len(gaps)):
+            if i not in done:
+                yield i, FALLBACK_NARRATIVE
+
+    def run_check(self, batched=True, narratives="eager", query_matrix=None):
+        """
+        Score every regulation against the indexed policy chunks.
+        Per-stage wall times are recorded in self.stage_timings.
+
+        narratives="lazy" skips the LLM stage: gaps come back with
+        Narrative_Status "pending" (plus their Requirement_Text) so the
+        narrative can be generated on first access instead.
+
+        query_matrix: optional normalized (regulations x dim) matrix shared
+        across several documents; see regulation_query_matrix.
+        """
         compliance_results = []
-        for reg in self.regulations:
-            reg_id = reg.get("Reg_ID")
-            query_text = reg.get("Requirement_Text", "")
-            result = self.collection.query(query_texts=[query_text], n_results=self.top_k)
-            docs = result["documents"][0] if result.get("documents") else []
-            dists = result["distances"][0] if result.get("distances") else []
-            metas = result.get("metadatas", [[]])[0] if result.get("metadatas") else [{} for _ in docs]
+        for event in self.run_check_iter(batched=batched, narratives=narratives, query_matrix=query_matrix):
+            if event["event"] == "result":
+                compliance_results.append(event["result"])
+        return compliance_results
+
+    def run_check_iter(self, batched=True, narratives="eager", query_matrix=None):
+        """
+        Streaming run_check. Yields, in order:
+          {"event": "result", "index": i, "result": {...}} for every result as
+              soon as retrieval and scoring finish (gaps awaiting a narrative
+              carry Narrative_Status "generating");
+          {"event": "narrative", "index": i, "Reg_ID", "Narrative_Gap"} as each
+              eager narrative finishes.
+        Result dicts are updated in place, so collecting the "result" events
+        gives the same list run_check returns.
+        """
+        self.stage_timings = {}
+        run_start = time.perf_counter()
+
+        query_texts = [reg.get("Requirement_Text", "") or "" for reg in self.regulations]
+
+        # Incremental re-audit: only regulations without usable stored results are scored
+        reused = {}
+        for i, reg in enumerate(self.regulations):
+            stored = self._stored_results_for(reg, query_texts[i], narratives)
+            if stored is not None:
+                reused[i] = stored
+        todo = [i for i in range(len(query_texts)) if i not in reused]
+        self.stage_timings["reused_regulations"] = len(reused)
+
+        docs = [[] for _ in query_texts]
+        dists = [[] for _ in query_texts]
+        metas = [[] for _ in query_texts]
+        n_results = min(int(self.top_k), self.collection.count())
+        if n_results > 0 and todo:
+            sub_matrix = query_matrix[todo] if query_matrix is not None else None
+            sub_docs, sub_dists, sub_metas = self._retrieve(
+                [query_texts[i] for i in todo], n_results, batched=batched, query_matrix=sub_matrix
+            )
+            for pos, i in enumerate(todo):
+                docs[i], dists[i] = sub_docs[pos], sub_dists[pos]
+                metas[i] = sub_metas[pos] if pos < len(sub_metas) else []
+
+        # Vectorized scoring over the (regulation x rank) distance matrix
+        t = time.perf_counter()
+        width = max(n_results, 1)
+        similarity = self._similarity_matrix(dists, width)
+        scores = similarity * 100
+        compliant = similarity >= float(self.compliance_threshold)
+        self.stage_timings["scoring"] = round(time.perf_counter() - t, 4)
 
-            if not docs:
+        compliance_results = []
+        pending = []  # (result index, requirement text, evidence chunk)
+        self.stage_timings["carried_forward"] = 0
+        for i, reg in enumerate(self.regulations):
+            reg_id = reg.get("Reg_ID")
+            if i in reused:
+                for result in reused[i]:
+                    compliance_results.append(result)
+                    yield {"event": "result", "index": len(compliance_results) - 1, "result": result}
+                continue
+            if not docs[i]:
                 # still record the requirement with no matching evidence (optional)
                 compliance_results.append({
                     "Reg_ID": reg_id,
@@ -329,36 +733,64 @@ GAP SUMMARY:"""
                     "Is_Compliant": False,
                     "Narrative_Gap": "No evidence found in policy documents."
                 })
+                yield {"event": "result", "index": len(compliance_results) - 1, "result": compliance_results[-1]}
                 continue
 
-            for rank, (doc, dist, meta) in enumerate(zip(docs, dists, metas), start=1):
-                try:
-                    similarity = 1 - float(dist)
-                except Exception:
-                    # if dist is missing or not numeric, treat as low similarity
-                    similarity = 0.0
-                score_percent = similarity * 100
-                is_compliant = similarity >= float(self.compliance_threshold)
-
-                narrative = ""
-                if not is_compliant:
-                    narrative = self.generate_llm_narrative(query_text, doc)
-                
-                # Ensure every non-compliant result has a narrative
-                if not is_compliant and not narrative:
-                    narrative = FALLBACK_NARRATIVE
-
-                compliance_results.append({
+            row_metas = metas[i] if i < len(metas) and metas[i] else []
+            reg_results = []
+            for rank, doc in enumerate(docs[i][:width]):
+                reg_results.append({
                     "Reg_ID": reg_id,
                     "Risk_Rating": reg.get('Risk_Rating'),
                     "Target_Area": reg.get('Target_Area'),
                     "Dow_Focus": reg.get('Dow_Focus'),
-                    "Compliance_Score": score_percent,
+                    "Compliance_Score": float(scores[i, rank]),
                     "Evidence_Chunk": doc,
-                    "Is_Compliant": is_compliant,
-                    "Narrative_Gap": narrative
+                    "Evidence_Location": self._evidence_location(row_metas[rank] if rank < len(row_metas) else None),
+                    "Is_Compliant": bool(compliant[i, rank]),
+                    "Narrative_Gap": ""
                 })
-        return compliance_results
+
+            # Unchanged evidence since the previous version: reuse its narratives
+            carried = self._carried_forward_narratives(query_texts[i], reg_results)
+            for rank, result in enumerate(reg_results):
+                if carried is not None:
+                    result["Carried_Forward"] = True
+                if not result["Is_Compliant"]:
+                    narrative = carried[rank] if carried and rank < len(carried) else None
+                    if narrative:
+                        result["Narrative_Gap"] = narrative
+                    elif narratives == "lazy":
+                        result["Narrative_Gap"] = NARRATIVE_PENDING
+                        result["Narrative_Status"] = "pending"
+                        result["Requirement_Text"] = query_texts[i]
+                        pending.append((len(compliance_results), query_texts[i], result["Evidence_Chunk"]))
+                    else:
+                        result["Narrative_Status"] = "generating"
+                        pending.append((len(compliance_results), query_texts[i], result["Evidence_Chunk"]))
+                compliance_results.append(result)
+                yield {"event": "result", "index": len(compliance_results) - 1, "result": result}
+
+        t = time.perf_counter()
+        if narratives != "lazy":
+            gaps = [(compliance_results[idx]["Reg_ID"], reg_text, doc) for idx, reg_text, doc in pending]
+            for g, narrative in self._iter_narratives(gaps):
+                idx = pending[g][0]
+                # Ensure every non-compliant result has a narrative
+                compliance_results[idx]["Narrative_Gap"] = narrative or FALLBACK_NARRATIVE
+                compliance_results[idx].pop("Narrative_Status", None)
+                yield {"event": "narrative", "index": idx, "Reg_ID": compliance_results[idx]["Reg_ID"],
+                       "Narrative_Gap": compliance_results[idx]["Narrative_Gap"]}
+        self.stage_timings["narratives"] = round(time.perf_counter() - t, 4)
+        self.stage_timings["narrative_count"] = len(pending)
+        self.stage_timings["narrative_mode"] = narratives
+
+        if self.dedup_stats:
+            self.stage_timings["dedup"] = self.dedup_stats
+        self.stage_timings["total"] = round(time.perf_counter() - run_start, 4)
+        self.stage_timings["regulations"] = len(self.regulations)
+        self.stage_timings["batched"] = bool(batched)
+        print(f"RAG run_check timings: {self.stage_timings}")
 
     def dashboard_summary(self, compliance_results, industry=None):
         total_requirements = len(compliance_results)
@@ -395,6 +827,7 @@ GAP SUMMARY:"""
             "compliance_score": round(overall_compliance, 2),
             "high_risk_gaps": high_risk_count,
             "gap_details": gap_details[:3],  # only top 3 for quick viewing
+            "timings": dict(getattr(self, "stage_timings", {}) or {}),
             "details": (
                 f"RAG check complete. Score: {overall_compliance:.2f}%. "
                 f"Gaps found: {len(gaps)}. "
@@ -402,6 +835,104 @@ GAP SUMMARY:"""
             )
         }
 
+def _normalize_rows(matrix):
+    if matrix.ndim != 2 or matrix.size == 0:
+        return matrix.astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def regulation_query_matrix(regulations, policy_index=None, regulation_embeddings=None):
+    """
+    Embed a regulation set once (stored vectors first, the rest in one call)
+    and return an L2-normalized float32 matrix, one row per regulation.
+    """
+    policy_index = policy_index or get_policy_index()
+    texts = [reg.get("Requirement_Text", "") or "" for reg in regulations]
+    vectors = lookup_query_vectors(texts, regulation_embeddings)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        fresh = policy_index.embedding_function([texts[i] for i in missing])
+        for i, v in zip(missing, fresh):
+            vectors[i] = list(map(float, v))
+    return _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+
+def run_portfolio_check(files, regulations, compliance_threshold=0.60, top_k=1,
+                        regulation_embeddings=None, narratives="lazy",
+                        policy_index=None, user_id="default"):
+    """
+    Audit several policy documents against the same regulation set.
+
+    files: list of (file_key, pdf_path). The regulation matrix is built once
+    and each document is scored with one matrix multiply over its chunk
+    embeddings. Returns one dict per file, in input order:
+    {"file_key", "results", "summary", "error"}.
+    """
+    policy_index = policy_index or get_policy_index()
+    t = time.perf_counter()
+    query_matrix = regulation_query_matrix(regulations, policy_index, regulation_embeddings)
+    embed_seconds = round(time.perf_counter() - t, 4)
+    print(f"Portfolio check: embedded {len(regulations)} regulations once in {embed_seconds}s.")
+
+    outcomes = []
+    for file_key, pdf_path in files:
+        try:
+            checker = ComplianceChecker(
+                pdf_path=pdf_path,
+                regulations=regulations,
+                compliance_threshold=compliance_threshold,
+                top_k=top_k,
+                policy_index=policy_index,
+                user_id=user_id,
+            )
+            results = checker.run_check(narratives=narratives, query_matrix=query_matrix)
+            checker.stage_timings["embed_queries_shared"] = embed_seconds
+            outcomes.append({
+                "file_key": file_key,
+                "results": results,
+                "summary": checker.dashboard_summary(results),
+                "error": None,
+            })
+        except Exception as e:
+            print(f"Portfolio check failed for {file_key}: {e}")
+            outcomes.append({"file_key": file_key, "results": [], "summary": None, "error": str(e)})
+    return outcomes
+
+
+def portfolio_rollup(outcomes):
+    """Aggregate per-file outcomes from run_portfolio_check into one portfolio view."""
+    audited = [o for o in outcomes if o.get("summary")]
+    scores = [o["summary"]["compliance_score"] for o in audited]
+
+    gaps_by_reg = {}
+    for o in audited:
+        for reg_id in {r.get("Reg_ID") for r in o["results"] if not r.get("Is_Compliant")}:
+            gaps_by_reg[reg_id] = gaps_by_reg.get(reg_id, 0) + 1
+
+    worst = sorted(audited, key=lambda o: o["summary"]["compliance_score"])[:5]
+    return {
+        "files_requested": len(outcomes),
+        "files_audited": len(audited),
+        "files_failed": len(outcomes) - len(audited),
+        "average_compliance_score": round(sum(scores) / len(scores), 2) if scores else 0.0,
+        "min_compliance_score": min(scores) if scores else 0.0,
+        "max_compliance_score": max(scores) if scores else 0.0,
+        "total_gaps": sum(1 for o in audited for r in o["results"] if not r.get("Is_Compliant")),
+        "high_risk_gaps": sum(o["summary"].get("high_risk_gaps", 0) for o in audited),
+        # regulations failing in the most files first
+        "regulation_gap_counts": sorted(
+            ({"Reg_ID": k, "files_with_gap": v} for k, v in gaps_by_reg.items()),
+            key=lambda x: -x["files_with_gap"],
+        ),
+        "lowest_scoring_files": [
+            {"file_key": o["file_key"], "compliance_score": o["summary"]["compliance_score"]}
+            for o in worst
+        ],
+    }
+
+
 if __name__ == "__main__":
     REGULATION_LIBRARY = [
         {
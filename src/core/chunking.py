@@ -0,0 +1,166 @@
+# src/core/chunking.py
+"""
+Token-aware chunking for RAG indexing.
+
+Sentence-count chunks vary from a few words to thousands of characters.
+token_chunks packs adjacent sentences (from the shared segmenter) up to a
+token target, carries a configurable token overlap into the next chunk and
+hard-splits sentences longer than the maximum. token_batches then groups
+chunks into embedding requests of similar total size.
+
+Tokens are counted with tiktoken (cl100k_base, the text-embedding-3-*
+encoding) when it is installed, otherwise estimated at ~4 characters per
+token.
+"""
+import os
+import math
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from src.core.segmentation import sentence_spans
+
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "8000"))
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _chunk_tokens(chunk: Any) -> int:
+    if isinstance(chunk, dict):
+        return chunk.get("tokens") or count_tokens(chunk.get("text", ""))
+    return count_tokens(chunk)
+
+
+def _split_long_span(text: str, start: int, end: int, max_tokens: int) -> List[tuple]:
+    """Cut an over-long sentence into word-aligned pieces of at most ~max_tokens."""
+    pieces = []
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    pos = start
+    while pos < end:
+        cut = min(end, pos + max_chars)
+        if cut < end:
+            space = text.rfind(" ", pos, cut)
+            if space > pos:
+                cut = space
+        piece = text[pos:cut]
+        stripped = piece.strip()
+        if stripped:
+            s = pos + (len(piece) - len(piece.lstrip()))
+            pieces.append((s, s + len(stripped)))
+        pos = cut
+    return pieces
+
+
+def token_chunks(
+    text: str,
+    target_tokens: int = CHUNK_TARGET_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+) -> List[Dict[str, Any]]:
+    """
+    Chunks of roughly target_tokens, each starting with up to overlap_tokens
+    of trailing sentences from the previous chunk:
+    [{"text", "char_start", "char_end", "tokens", "chunk_hash"}].
+    """
+    units = []  # (start, end, tokens)
+    for s, e in sentence_spans(text):
+        n = count_tokens(text[s:e])
+        if n > max_tokens:
+            for ps, pe in _split_long_span(text, s, e, max_tokens):
+                units.append((ps, pe, count_tokens(text[ps:pe])))
+        else:
+            units.append((s, e, n))
+
+    chunks: List[Dict[str, Any]] = []
+    i = 0
+    while i < len(units):
+        j, total = i, 0
+        while j < len(units) and (j == i or total + units[j][2] <= target_tokens):
+            total += units[j][2]
+            j += 1
+
+        start, end = units[i][0], units[j - 1][1]
+        chunk = text[start:end]
+        chunks.append({
+            "text": chunk,
+            "char_start": start,
+            "char_end": end,
+            "tokens": total,
+            "chunk_hash": hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16],
+        })
+        if j >= len(units):
+            break
+
+        # Step back over trailing sentences that fit in the overlap budget,
+        # always advancing at least one sentence
+        back, carried = j, 0
+        while back - 1 > i and carried + units[back - 1][2] <= overlap_tokens:
+            back -= 1
+            carried += units[back][2]
+        i = back
+    return chunks
+
+
+def token_batches(
+    chunks: List[Any],
+    max_batch_tokens: int = EMBED_BATCH_TOKENS,
+    max_batch_size: int = 64,
+) -> List[List[Any]]:
+    """
+    Group chunks (strings or dicts with "text"/"tokens") into embedding
+    batches of similar total token count, preserving order.
+    """
+    sizes = [_chunk_tokens(c) for c in chunks]
+    if not chunks:
+        return []
+    total = sum(sizes)
+
+    # Even target: spread the tokens over the minimum number of batches
+    n_batches = max(math.ceil(total / max_batch_tokens), math.ceil(len(chunks) / max_batch_size), 1)
+    target = min(max_batch_tokens, math.ceil(total / n_batches))
+
+    batches, current, current_tokens = [], [], 0
+    for chunk, n in zip(chunks, sizes):
+        if current and (current_tokens + n > target or len(current) >= max_batch_size):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def chunk_stats(chunks: List[Any]) -> Dict[str, Any]:
+    """Chunk count and token distribution, for indexing logs and scripts."""
+    sizes = [_chunk_tokens(c) for c in chunks]
+    if not sizes:
+        return {"chunks": 0, "tokens": 0, "min_tokens": 0, "mean_tokens": 0.0, "max_tokens": 0}
+    return {
+        "chunks": len(sizes),
+        "tokens": sum(sizes),
+        "min_tokens": min(sizes),
+        "mean_tokens": round(sum(sizes) / len(sizes), 1),
+        "max_tokens": max(sizes),
+        "tokenizer": "tiktoken" if _encoder() is not None else "estimate",
+    }
@@ -4,6 +4,7 @@ import os
 import time
 import logging
 import json
+import threading
 from typing import Optional, Dict, List, Any
 from datetime import datetime, timedelta
 from collections import defaultdict
@@ -41,8 +42,9 @@ TOKEN_USAGE = {
     "last_reset": datetime.utcnow()
 }
 
-# Rate limiting tracker
+# Rate limiting tracker (shared by concurrent narrative workers, so guard with a lock)
 REQUEST_TRACKER = defaultdict(list)
+RATE_LIMIT_LOCK = threading.Lock()
 
 def reset_token_stats():
     """Reset token usage statistics."""
@@ -67,20 +69,37 @@ def check_rate_limit(user_id: str = "default") -> bool:
     now = time.time()
     window_start = now - RATE_LIMIT_WINDOW
     
-    # Clean old requests
-    REQUEST_TRACKER[user_id] = [
-        req_time for req_time in REQUEST_TRACKER[user_id]
-        if req_time > window_start
-    ]
-    
-    # Check limit
-    if len(REQUEST_TRACKER[user_id]) >= RATE_LIMIT_MAX_REQUESTS:
-        logger.warning(f"Rate limit exceeded for user {user_id}")
-        return False
+    with RATE_LIMIT_LOCK:
+        # Clean old requests
+        REQUEST_TRACKER[user_id] = [
+            req_time for req_time in REQUEST_TRACKER[user_id]
+            if req_time > window_start
+        ]
+        
+        # Check limit
+        if len(REQUEST_TRACKER[user_id]) >= RATE_LIMIT_MAX_REQUESTS:
+            logger.warning(f"Rate limit exceeded for user {user_id}")
+            return False
+        
+        # Record this request
+        REQUEST_TRACKER[user_id].append(now)
+        return True
+
+def rate_limit_wait_time(user_id: str = "default") -> float:
+    """
+    Seconds until check_rate_limit(user_id) would allow another request.
+    Returns 0.0 if a slot is free now. Does not record a request.
+    """
+    now = time.time()
+    window_start = now - RATE_LIMIT_WINDOW
     
-    # Record this request
-    REQUEST_TRACKER[user_id].append(now)
-    return True
+    with RATE_LIMIT_LOCK:
+        recent = sorted(t for t in REQUEST_TRACKER[user_id] if t > window_start)
+        if len(recent) < RATE_LIMIT_MAX_REQUESTS:
+            return 0.0
+        # Oldest request that must age out before a slot frees up
+        oldest = recent[len(recent) - RATE_LIMIT_MAX_REQUESTS]
+        return max(0.0, oldest + RATE_LIMIT_WINDOW - now)
 
 def get_llm(api_key: Optional[str] = None) -> Optional[OpenAI]:
     """
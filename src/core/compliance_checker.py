@@ -1,13 +1,10 @@
 import os
 import numpy as np
-import re
 import json
 import requests
-from PyPDF2 import PdfReader
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
-import os
-from huggingface_hub import InferenceClient
+from src.core.text_artifacts import get_text_artifact
+from src.core.embedding_service import get_embedding_service
+from src.core.segmentation import split_sentences
 
 SBERT_MODEL_NAME = 'all-mpnet-base-v2' 
 COMPLIANCE_THRESHOLD = 60.0 
@@ -15,17 +12,19 @@ COMPLIANCE_THRESHOLD = 60.0
 HF_API_TOKEN = os.environ.get("HF_API_TOKEN")
 HEADERS = {"Authorization": f"Bearer {HF_API_TOKEN}"} if HF_API_TOKEN else {}
 
-client = InferenceClient(
-    provider="featherless-ai",
-    api_key=os.environ["HF_API_TOKEN"],
-)
+_client = None
+
+# Shared per-worker embedding service (model loads on first encode)
+MODEL = get_embedding_service(SBERT_MODEL_NAME)
 
-try:
-    MODEL = SentenceTransformer(SBERT_MODEL_NAME)
-    print(f"SBERT Model loaded successfully: {SBERT_MODEL_NAME}")
-except Exception as e:
-    print(f"FATAL ERROR: Could not load SBERT model. Error: {e}")
-    exit(1)
+
+def get_inference_client():
+    """Hugging Face InferenceClient, created on first narrative request."""
+    global _client
+    if _client is None:
+        from huggingface_hub import InferenceClient
+        _client = InferenceClient(provider="featherless-ai", api_key=HF_API_TOKEN)
+    return _client
 
 # The Regulation Library (Customized for Dow's focus areas)
 REGULATION_LIBRARY = [
@@ -53,24 +52,19 @@ REGULATION_LIBRARY = [
 ]
 
 def extract_text_from_pdf(pdf_path):
-    """Extracts all text from a local PDF file using PyPDF2."""
-    text = ""
+    """Extracts all text from a local PDF file (PyMuPDF -> pdfminer -> PyPDF2)."""
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() or ""
-        return text
+        return get_text_artifact(pdf_path).joined("")
     except FileNotFoundError:
         return None
     except Exception as e:
         print(f"An error occurred during PDF reading: {e}")
         return None
 
-def chunk_text_by_sentences(text, max_sentences=4):
-    """Splits text into context-preserving chunks for embedding."""
-    # Simple regex to split text into sentences (a rough split for the MVP)
-    sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
+def split_text_into_chunks(text, max_sentences=4):
+    """Splits text into context-preserving chunks of up to max_sentences sentences."""
+    # Shared abbreviation-aware segmenter (offsets cached per text)
+    sentences = split_sentences(text)
     
     chunks = []
     current_chunk = []
@@ -83,10 +77,15 @@ def chunk_text_by_sentences(text, max_sentences=4):
 
     if current_chunk:
         chunks.append(" ".join(current_chunk))
-        
-    # Generate embeddings for each chunk
-    # This must be run on the final list of chunks
-    chunk_embeddings = MODEL.encode(chunks, convert_to_numpy=True)
+    return chunks
+
+
+def chunk_text_by_sentences(text, max_sentences=4):
+    """Splits text into chunks and embeds them; returns (chunk_text, (1, d) embedding) tuples."""
+    chunks = split_text_into_chunks(text, max_sentences)
+
+    # Generate embeddings for each chunk in one batched call
+    chunk_embeddings = MODEL.encode(chunks)
     
     # Return a list of tuples: (original_chunk_text, embedding)
     return [(chunk, embedding.reshape(1, -1)) for chunk, embedding in zip(chunks, chunk_embeddings)]
@@ -98,13 +97,82 @@ def get_sbert_embedding(text):
     """Generates an embedding vector for the given text using the local SBERT model."""
     if not text:
         return None
-    return MODEL.encode([text], convert_to_numpy=True).reshape(1, -1)
+    return MODEL.encode([text]).reshape(1, -1)
 
 def calculate_cosine_similarity(emb1, emb2):
     """Calculates the cosine similarity between two embeddings."""
     if emb1 is None or emb2 is None:
         return 0.0
-    return cosine_similarity(emb1, emb2)[0][0]
+    return float(similarity_matrix(emb1, emb2)[0, 0])
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row (zero rows stay zero)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def similarity_matrix(chunk_embeddings, reg_embeddings):
+    """Cosine similarity of every chunk against every regulation: (n_chunks, n_regs)."""
+    return normalize_rows(chunk_embeddings) @ normalize_rows(reg_embeddings).T
+
+
+def top_k_evidence(sim, k=1):
+    """
+    Indices of the k best chunks per regulation, best first: (n_regs, k).
+    Uses argpartition so only the k candidates per column are sorted.
+    """
+    n_chunks = sim.shape[0]
+    k = max(1, min(int(k), n_chunks))
+    if k == n_chunks:
+        top = np.argsort(-sim, axis=0)
+    else:
+        top = np.argpartition(-sim, k - 1, axis=0)[:k]
+        order = np.argsort(-np.take_along_axis(sim, top, axis=0), axis=0)
+        top = np.take_along_axis(top, order, axis=0)
+    return top.T
+
+
+def score_regulations(chunks, regulations, top_k=1, threshold=COMPLIANCE_THRESHOLD, chunk_embeddings=None):
+    """
+    Score every regulation against every chunk in one matrix multiply.
+
+    Each result carries the best-matching chunk as Evidence_Chunk and, when
+    top_k > 1, the ranked top-k chunks with scores under Top_Evidence.
+    """
+    if not chunks or not regulations:
+        return []
+
+    if chunk_embeddings is None:
+        chunk_embeddings = MODEL.encode(chunks)
+    reg_embeddings = MODEL.encode([r.get("Requirement_Text", "") or "" for r in regulations])
+
+    sim = similarity_matrix(chunk_embeddings, reg_embeddings)
+    top = top_k_evidence(sim, top_k)
+
+    results = []
+    for j, regulation in enumerate(regulations):
+        ranked = [(int(i), float(sim[i, j]) * 100) for i in top[j]]
+        best_idx, best_score = ranked[0]
+        result = {
+            "Reg_ID": regulation.get("Reg_ID"),
+            "Risk_Rating": regulation.get("Risk_Rating"),
+            "Target_Area": regulation.get("Target_Area"),
+            "Dow_Focus": regulation.get("Dow_Focus"),
+            "Compliance_Score": best_score,
+            "Evidence_Chunk": chunks[best_idx],
+            "Is_Compliant": best_score >= threshold,
+            "Narrative_Gap": "",
+        }
+        if top_k > 1:
+            result["Top_Evidence"] = [{"chunk": chunks[i], "score": score} for i, score in ranked]
+        results.append(result)
+    return results
+
 def generate_llm_narrative(reg_text, evidence_chunk):
     """
     Generates a narrative explanation for a compliance gap using the Hugging Face InferenceClient.
@@ -125,7 +193,7 @@ def generate_llm_narrative(reg_text, evidence_chunk):
     """
 
     try:
-        completion = client.chat.completions.create(
+        completion = get_inference_client().chat.completions.create(
             model="mistralai/Mistral-7B-Instruct-v0.2",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=200,
@@ -152,56 +220,24 @@ if __name__ == "__main__":
         
     # 2. Chunk and Embed the Policy Document
     print(f"2. Successfully extracted {len(policy_text)} characters. Chunking and embedding with {SBERT_MODEL_NAME}...")
-    policy_chunks_with_embeddings = chunk_text_by_sentences(policy_text)
+    policy_chunks = split_text_into_chunks(policy_text)
     
-    if not policy_chunks_with_embeddings:
+    if not policy_chunks:
         print("Error: Policy text could not be processed into chunks. Exiting.")
         exit(1)
         
-    print(f"Policy successfully chunked into {len(policy_chunks_with_embeddings)} segments.")
-    print("\n--- Running Nested Compliance Check (SBERT Local) ---")
+    print(f"Policy successfully chunked into {len(policy_chunks)} segments.")
+    print("\n--- Running Vectorized Compliance Check (SBERT Local) ---")
 
-    compliance_results = []
-    
-    # 3. Outer Loop: Iterate through each Regulation Requirement
-    for regulation in REGULATION_LIBRARY:
-        reg_id = regulation['Reg_ID']
-        reg_text = regulation['Requirement_Text']
-        
-        # Embed the regulation text once
-        reg_embedding = get_sbert_embedding(reg_text)
-        
-        best_match_score = 0.0
-        best_match_chunk = "N/A"
-        
-        # 4. Inner Loop: Compare Regulation to EVERY Policy Chunk
-        for chunk_text, chunk_embedding in policy_chunks_with_embeddings:
-            score = calculate_cosine_similarity(chunk_embedding, reg_embedding)
-            
-            if score > best_match_score:
-                best_match_score = score
-                best_match_chunk = chunk_text
-
-        # 5. Aggregate Results for the Dashboard
-        final_score = best_match_score * 100
-        is_compliant = final_score >= COMPLIANCE_THRESHOLD # Use the adjusted threshold
-        
-        # Generate Narrative for Gaps Only (Value-Add Feature)
-        narrative = ""
-        if not is_compliant:
-            print(f"   [Processing Narrative for {reg_id}...] (Requires internet/HF_TOKEN)")
-            narrative = generate_llm_narrative(reg_text, best_match_chunk)
-
-        compliance_results.append({
-            "Reg_ID": reg_id,
-            "Risk_Rating": regulation['Risk_Rating'],
-            "Target_Area": regulation['Target_Area'],
-            "Dow_Focus": regulation['Dow_Focus'],
-            "Compliance_Score": final_score,
-            "Evidence_Chunk": best_match_chunk,
-            "Is_Compliant": is_compliant,
-            "Narrative_Gap": narrative
-        })
+    # 3. Score all regulations against all chunks in one matrix multiply
+    compliance_results = score_regulations(policy_chunks, REGULATION_LIBRARY)
+
+    # 4. Generate Narrative for Gaps Only (Value-Add Feature)
+    reg_text_by_id = {r['Reg_ID']: r['Requirement_Text'] for r in REGULATION_LIBRARY}
+    for result in compliance_results:
+        if not result['Is_Compliant']:
+            print(f"   [Processing Narrative for {result['Reg_ID']}...] (Requires internet/HF_TOKEN)")
+            result['Narrative_Gap'] = generate_llm_narrative(reg_text_by_id[result['Reg_ID']], result['Evidence_Chunk'])
 
     # --- 6. Generate Dow-Specific Report ---
     
@@ -1,8 +1,8 @@
 import os
 import uuid
-import re
 import chromadb
-from PyPDF2 import PdfReader
+from src.core.text_artifacts import get_text_artifact
+from src.core.segmentation import split_sentences
 from huggingface_hub import InferenceClient
 class ComplianceChecker:
     def __init__(self, pdf_path, regulations, collection_name="policies",
@@ -41,15 +41,10 @@ class ComplianceChecker:
         if not os.path.exists(self.pdf_path):
             raise FileNotFoundError(f"PDF not found at: {self.pdf_path}")
 
-        reader = PdfReader(self.pdf_path)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + " "
+        text = " ".join(t for t in get_text_artifact(self.pdf_path).page_texts() if t)
 
         # Split into sentences and group into chunks
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
+        sentences = split_sentences(text)
         chunks, current_chunk = [], []
         for sentence in sentences:
             if len(current_chunk) >= max_sentences:
@@ -0,0 +1,254 @@
+# src/core/compliance_matrix.py
+"""
+Background-maintained (file x regulation) compliance score matrix.
+
+Every user's current FileHub PDFs are scored against their active
+("added") workspace regulations and the best score per pair is kept in the
+compliance_matrix table, so dashboards can read scores without running an
+audit.
+
+Changes schedule partial updates: an upload refreshes that file's row, a
+regulation toggle or import refreshes those columns (or drops them when a
+regulation is removed). Requests are coalesced per user and processed by a
+single daemon worker; each update scores only the affected files and
+regulations through run_portfolio_check (lazy narratives, shared regulation
+embeddings).
+"""
+import os
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+MATRIX_THRESHOLD = float(os.getenv("MATRIX_THRESHOLD", "0.60"))
+MATRIX_ENABLED = os.getenv("COMPLIANCE_MATRIX", "1") == "1"
+
+# {user_uid: {"files": set | None, "regulations": set | None}}; None means "all"
+_pending: Dict[str, Dict[str, Optional[set]]] = {}
+_cond = threading.Condition()
+_worker: Optional[threading.Thread] = None
+
+
+def _merge(current: Optional[set], new: Optional[Iterable[str]], first: bool) -> Optional[set]:
+    if new is None:
+        return None
+    if first:
+        return set(new)
+    return None if current is None else current | set(new)
+
+
+def schedule_matrix_update(
+    user_uid: str,
+    file_ids: Optional[Iterable[str]] = None,
+    regulation_ids: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Queue a matrix refresh for user_uid. file_ids / regulation_ids limit
+    the update to those rows / columns (None = all of them).
+    """
+    if not MATRIX_ENABLED or not user_uid:
+        return
+    global _worker
+    with _cond:
+        first = user_uid not in _pending
+        entry = _pending.setdefault(user_uid, {"files": None, "regulations": None})
+        entry["files"] = _merge(entry["files"], file_ids, first)
+        entry["regulations"] = _merge(entry["regulations"], regulation_ids, first)
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="compliance-matrix", daemon=True)
+            _worker.start()
+        _cond.notify()
+
+
+def _run() -> None:
+    from src.api.db import SessionLocal
+
+    while True:
+        with _cond:
+            while not _pending:
+                _cond.wait()
+            user_uid, scope = _pending.popitem()
+
+        db = SessionLocal()
+        try:
+            stats = update_matrix(db, user_uid, scope["files"], scope["regulations"])
+            print(f"[ComplianceMatrix] {user_uid}: {stats}")
+        except Exception:
+            traceback.print_exc()
+        finally:
+            db.close()
+
+
+def current_pdf_files(user_uid: str) -> List[Dict[str, Any]]:
+    """Latest version of each FileHub PDF (entries superseded by a newer upload are skipped)."""
+    from src.core.nomi_file_hub import list_user_files
+
+    entries = list_user_files(user_uid) or []
+    superseded = {e.get("supersedes") for e in entries if e.get("supersedes")}
+    return [
+        e for e in entries
+        if e["id"] not in superseded and (e.get("original_name") or "").lower().endswith(".pdf")
+    ]
+
+
+def prune_matrix(db, user_uid: str) -> int:
+    """Delete cells for files or regulations no longer in the user's workspace."""
+    from src.api.models import ComplianceMatrixCell, WorkspaceRegulation
+
+    file_ids = {e["id"] for e in current_pdf_files(user_uid)}
+    active = {
+        r.regulation_id for r in db.query(WorkspaceRegulation.regulation_id).filter(
+            WorkspaceRegulation.user_uid == user_uid,
+            WorkspaceRegulation.workspace_status == "added",
+        )
+    }
+    stale = [
+        c for c in db.query(ComplianceMatrixCell).filter(ComplianceMatrixCell.user_uid == user_uid)
+        if c.file_id not in file_ids or c.regulation_id not in active
+    ]
+    for cell in stale:
+        db.delete(cell)
+    db.commit()
+    return len(stale)
+
+
+def update_matrix(
+    db,
+    user_uid: str,
+    file_ids: Optional[Iterable[str]] = None,
+    regulation_ids: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """Recompute the cells for the given files x regulations (None = all) and prune removed ones."""
+    from src.api.models import ComplianceMatrixCell, WorkspaceRegulation
+    from src.core.nomi_file_hub import get_user_file_path
+    from src.core.policy_index import get_policy_index
+    from src.core.RAG import run_portfolio_check
+    from src.core.regulation_embeddings import (
+        requirement_text_for, regulation_text_hash, load_regulation_embeddings,
+    )
+
+    pruned = prune_matrix(db, user_uid)
+
+    files = current_pdf_files(user_uid)
+    if file_ids is not None:
+        wanted = set(file_ids)
+        files = [e for e in files if e["id"] in wanted]
+
+    query = db.query(WorkspaceRegulation).filter(
+        WorkspaceRegulation.user_uid == user_uid,
+        WorkspaceRegulation.workspace_status == "added",
+    )
+    if regulation_ids is not None:
+        query = query.filter(WorkspaceRegulation.regulation_id.in_(list(regulation_ids)))
+    regs = query.all()
+
+    if not files or not regs:
+        return {"files": len(files), "regulations": len(regs), "cells": 0, "pruned": pruned}
+
+    regulation_objs = [
+        {
+            "Reg_ID": reg.regulation_id,
+            "Requirement_Text": requirement_text_for(reg),
+            "Risk_Rating": reg.risk or "",
+            "Target_Area": reg.category or "",
+            "Dow_Focus": reg.region or "",
+        }
+        for reg in regs
+    ]
+    text_hashes = {r["Reg_ID"]: regulation_text_hash(r["Requirement_Text"]) for r in regulation_objs}
+
+    paths = []
+    for entry in files:
+        found = get_user_file_path(user_uid, entry["id"])
+        if found and os.path.exists(found[0]):
+            paths.append((entry["id"], found[0]))
+
+    policy_index = get_policy_index()
+    outcomes = run_portfolio_check(
+        paths,
+        regulation_objs,
+        compliance_threshold=MATRIX_THRESHOLD,
+        regulation_embeddings=load_regulation_embeddings(db, [r["Requirement_Text"] for r in regulation_objs]),
+        narratives="lazy",
+        policy_index=policy_index,
+        user_id=user_uid,
+    )
+
+    doc_hashes = {e["id"]: e.get("content_hash") for e in files}
+    existing = {
+        (c.file_id, c.regulation_id): c
+        for c in db.query(ComplianceMatrixCell).filter(
+            ComplianceMatrixCell.user_uid == user_uid,
+            ComplianceMatrixCell.file_id.in_([fid for fid, _ in paths]),
+            ComplianceMatrixCell.regulation_id.in_(list(text_hashes)),
+        )
+    }
+
+    written, failed = 0, 0
+    for outcome in outcomes:
+        if outcome["error"]:
+            failed += 1
+            continue
+        file_id = outcome["file_key"]
+        best: Dict[str, Dict[str, Any]] = {}
+        for r in outcome["results"]:
+            reg_id = r.get("Reg_ID")
+            if reg_id not in best or (r.get("Compliance_Score") or 0) > (best[reg_id].get("Compliance_Score") or 0):
+                best[reg_id] = r
+        for reg_id, r in best.items():
+            cell = existing.get((file_id, reg_id))
+            if cell is None:
+                cell = ComplianceMatrixCell(user_uid=user_uid, file_id=file_id, regulation_id=reg_id)
+                db.add(cell)
+            cell.doc_hash = doc_hashes.get(file_id)
+            cell.reg_text_hash = text_hashes.get(reg_id)
+            cell.model_key = policy_index.embedding_model
+            cell.score = float(r.get("Compliance_Score") or 0.0)
+            cell.is_compliant = bool(r.get("Is_Compliant"))
+            cell.evidence_chunk = (r.get("Evidence_Chunk") or "")[:500]
+            cell.evidence_location = r.get("Evidence_Location")
+            cell.updated_at = datetime.utcnow()
+            written += 1
+    db.commit()
+    return {"files": len(paths), "regulations": len(regs), "cells": written, "failed_files": failed, "pruned": pruned}
+
+
+def get_matrix(db, user_uid: str) -> Dict[str, Any]:
+    """All cells for a user plus per-file and per-regulation rollups."""
+    from src.api.models import ComplianceMatrixCell
+
+    cells = db.query(ComplianceMatrixCell).filter(ComplianceMatrixCell.user_uid == user_uid).all()
+    by_file: Dict[str, List[Any]] = {}
+    by_reg: Dict[str, List[Any]] = {}
+    for c in cells:
+        by_file.setdefault(c.file_id, []).append(c)
+        by_reg.setdefault(c.regulation_id, []).append(c)
+
+    def rollup(group):
+        compliant = sum(1 for c in group if c.is_compliant)
+        return {
+            "cells": len(group),
+            "compliant": compliant,
+            "gaps": len(group) - compliant,
+            "compliance_score": round(compliant / len(group) * 100, 2) if group else 0.0,
+            "average_score": round(sum(c.score or 0.0 for c in group) / len(group), 2) if group else 0.0,
+        }
+
+    return {
+        "user_uid": user_uid,
+        "cells": [
+            {
+                "file_id": c.file_id,
+                "regulation_id": c.regulation_id,
+                "score": c.score,
+                "is_compliant": c.is_compliant,
+                "evidence_chunk": c.evidence_chunk,
+                "evidence_location": c.evidence_location,
+                "updated_at": c.updated_at.isoformat() if c.updated_at else None,
+            }
+            for c in cells
+        ],
+        "files": {fid: rollup(group) for fid, group in by_file.items()},
+        "regulations": {rid: rollup(group) for rid, group in by_reg.items()},
+        "pending_update": user_uid in _pending,
+    }
@@ -1,13 +1,21 @@
 # llm/compliance_narratives.py
 import json
-from typing import Iterable
+from typing import Any, Dict, Iterable, List
 from src.core.client import safe_chat_completion
 import logging
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
-def generate_gap_summary(regulation_text: str, evidence_chunks: Iterable[str], max_evidence_chunks: int = 8):
+# Multi-gap batching: gaps are packed into one prompt until the estimated
+# prompt + answer size reaches the token budget.
+CHARS_PER_TOKEN = 4
+BATCH_TOKEN_BUDGET = 6000
+BATCH_MAX_GAPS = 20
+BATCH_OUTPUT_TOKENS_PER_GAP = 160
+BATCH_TEXT_LIMIT = 1500  # chars of regulation / evidence per gap
+
+def generate_gap_summary(regulation_text: str, evidence_chunks: Iterable[str], max_evidence_chunks: int = 8, user_id: str = "default"):
     """
     Returns: {"ok": True, "result": {...}} or {"ok": False, "error": "..."}
     result expected keys: summary (str), missing_items (list), confidence (float 0-1)
@@ -34,7 +42,7 @@ Evidence (most relevant chunks):
         {"role": "system", "content": "You are a concise compliance analyst. Return JSON only."},
         {"role": "user", "content": prompt},
     ]
-    resp = safe_chat_completion(messages, model="gpt-4o-mini", temperature=0.0, max_tokens=800)
+    resp = safe_chat_completion(messages, model="gpt-4o-mini", temperature=0.0, max_tokens=800, user_id=user_id)
     if not resp.get("ok"):
         return {"ok": False, "error": resp.get("error")}
     raw = resp["text"].strip()
@@ -53,3 +61,142 @@ Evidence (most relevant chunks):
                 logger.exception("Failed to parse LLM JSON substring: %s", ex)
                 return {"ok": False, "error": "failed to parse LLM JSON substring", "raw": raw}
         return {"ok": False, "error": "unexpected LLM output", "raw": raw}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token); good enough for batch sizing."""
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def _gap_block(gap: Dict[str, Any]) -> str:
+    evidence = "\n---\n".join(list(gap.get("evidence_chunks") or [])[:3])
+    return (
+        f"Reg_ID: {gap.get('Reg_ID')}\n"
+        f"Regulation: {(gap.get('regulation_text') or '')[:BATCH_TEXT_LIMIT]}\n"
+        f"Evidence: {evidence[:BATCH_TEXT_LIMIT]}\n"
+    )
+
+
+def plan_gap_batches(
+    gaps: List[Dict[str, Any]],
+    token_budget: int = BATCH_TOKEN_BUDGET,
+    max_batch_size: int = BATCH_MAX_GAPS,
+) -> List[List[int]]:
+    """
+    Greedily pack gap indexes into batches whose estimated prompt + output
+    tokens stay within token_budget. A Reg_ID appears at most once per batch
+    so the JSON answer can be keyed by it.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_ids = set()
+    used = 0
+    for i, gap in enumerate(gaps):
+        cost = estimate_tokens(_gap_block(gap)) + BATCH_OUTPUT_TOKENS_PER_GAP
+        reg_id = str(gap.get("Reg_ID"))
+        if current and (
+            used + cost > token_budget
+            or len(current) >= max_batch_size
+            or reg_id in current_ids
+        ):
+            batches.append(current)
+            current, current_ids, used = [], set(), 0
+        current.append(i)
+        current_ids.add(reg_id)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _parse_json_array(raw: str):
+    text = (raw or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:]
+    try:
+        parsed = json.loads(text)
+    except Exception:
+        s = text.find("[")
+        e = text.rfind("]")
+        if s == -1 or e <= s:
+            return None
+        try:
+            parsed = json.loads(text[s:e+1])
+        except Exception:
+            return None
+    if isinstance(parsed, dict):
+        parsed = parsed.get("results") or parsed.get("gaps")
+    return parsed if isinstance(parsed, list) else None
+
+
+def _summarize_batch(batch: List[Dict[str, Any]], user_id: str) -> Dict[str, Dict[str, Any]]:
+    """One LLM round-trip for several gaps. Returns {Reg_ID: result} for items that parsed."""
+    blocks = "\n".join(f"[{n}]\n{_gap_block(g)}" for n, g in enumerate(batch, start=1))
+    prompt = f"""
+You are a compliance analyst. For EACH gap below, compare the regulation with the policy evidence.
+Return EXACTLY one JSON array with one object per gap, each with keys:
+  - Reg_ID: copied exactly from the gap
+  - summary: a one-paragraph summary about compliance (<=75 words)
+  - missing_items: array of up to 8 missing items or responsibilities
+  - confidence: a number from 0.0 to 1.0 indicating confidence
+
+Gaps:
+{blocks}
+"""
+    messages = [
+        {"role": "system", "content": "You are a concise compliance analyst. Return JSON only."},
+        {"role": "user", "content": prompt},
+    ]
+    max_tokens = min(4000, BATCH_OUTPUT_TOKENS_PER_GAP * len(batch) + 200)
+    resp = safe_chat_completion(messages, model="gpt-4o-mini", temperature=0.0, max_tokens=max_tokens, user_id=user_id)
+    if not resp.get("ok"):
+        logger.warning("Batched gap summary failed: %s", resp.get("error"))
+        return {}
+
+    items = _parse_json_array(resp.get("text", ""))
+    if items is None:
+        logger.warning("Batched gap summary returned unparseable JSON; falling back per item")
+        return {}
+
+    wanted = {str(g.get("Reg_ID")) for g in batch}
+    out: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        reg_id = str(item.get("Reg_ID"))
+        if reg_id in wanted and reg_id not in out:
+            out[reg_id] = {"ok": True, "result": item, "note": "batched"}
+    return out
+
+
+def generate_gap_summaries_batch(
+    gaps: List[Dict[str, Any]],
+    token_budget: int = BATCH_TOKEN_BUDGET,
+    max_batch_size: int = BATCH_MAX_GAPS,
+    user_id: str = "default",
+) -> List[Dict[str, Any]]:
+    """
+    Batched variant of generate_gap_summary.
+
+    gaps: [{"Reg_ID": ..., "regulation_text": ..., "evidence_chunks": [...]}, ...]
+    Returns one response per gap, in input order, with the same shape as
+    generate_gap_summary. Gaps missing from a batch answer (or whose batch
+    did not parse) are retried with a per-item call.
+    """
+    responses: List[Dict[str, Any]] = [None] * len(gaps)
+    for batch_idx in plan_gap_batches(gaps, token_budget=token_budget, max_batch_size=max_batch_size):
+        batch = [gaps[i] for i in batch_idx]
+        answered = _summarize_batch(batch, user_id) if len(batch) > 1 else {}
+        for i in batch_idx:
+            gap = gaps[i]
+            resp = answered.get(str(gap.get("Reg_ID")))
+            if resp is None:
+                resp = generate_gap_summary(
+                    regulation_text=gap.get("regulation_text") or "",
+                    evidence_chunks=gap.get("evidence_chunks") or [],
+                    user_id=user_id,
+                )
+            responses[i] = resp
+    return responses
@@ -0,0 +1,115 @@
+# src/core/dedup.py
+"""
+Near-duplicate chunk elimination with MinHash + LSH.
+
+Repeated headers, footers and boilerplate clauses produce many chunks that
+are almost identical. Each chunk gets a MinHash signature over word
+shingles; LSH banding finds candidate pairs in roughly linear time, and a
+candidate is treated as a duplicate when its estimated Jaccard similarity
+to an already kept chunk reaches the threshold. The first occurrence is
+kept and records how many duplicates were merged into it.
+"""
+import os
+import re
+import math
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 16  # 16 bands x 8 rows: candidates from ~0.7 Jaccard upwards
+DEDUP_SHINGLE = 3
+
+_MERSENNE = np.uint64((1 << 31) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=DEDUP_NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=DEDUP_NUM_PERM).astype(np.uint64)
+
+
+def _shingles(text: str, k: int = DEDUP_SHINGLE) -> np.ndarray:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < k:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    # 31-bit hashes keep a * x + b inside uint64 without overflow
+    return np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) & 0x7FFFFFFF for g in grams), dtype=np.uint64, count=len(grams)
+    )
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """DEDUP_NUM_PERM-long MinHash signature of text's word shingles."""
+    hashes = _shingles(text)
+    if hashes.size == 0:
+        return np.full(DEDUP_NUM_PERM, _MERSENNE, dtype=np.uint64)
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % _MERSENNE
+    return permuted.min(axis=0)
+
+
+def dedup_chunks(
+    chunks: List[Any],
+    threshold: float = DEDUP_THRESHOLD,
+    key=None,
+    batch_size: int = 64,
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Drop near-duplicate chunks, keeping the first occurrence.
+
+    chunks may be strings or dicts (pass key to get the text, defaults to
+    c["text"] for dicts). Kept dict chunks get "dup_count" (duplicates
+    merged into them). batch_size is the embedding batch size used to
+    report how many embedding calls were saved. Returns (kept_chunks, stats).
+    """
+    if key is None:
+        key = lambda c: c["text"] if isinstance(c, dict) else c
+
+    rows = DEDUP_NUM_PERM // DEDUP_BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    signatures: List[np.ndarray] = []
+    kept_idx: List[int] = []
+    dup_counts: Dict[int, int] = {}
+
+    for i, chunk in enumerate(chunks):
+        sig = minhash_signature(key(chunk) or "")
+        signatures.append(sig)
+        bands = [(b, sig[b * rows:(b + 1) * rows].tobytes()) for b in range(DEDUP_BANDS)]
+
+        original: Optional[int] = None
+        candidates = {j for band in bands for j in buckets.get(band, ())}
+        for j in sorted(candidates):
+            if float(np.mean(signatures[j] == sig)) >= threshold:
+                original = j
+                break
+
+        if original is not None:
+            dup_counts[original] = dup_counts.get(original, 0) + 1
+            continue
+
+        kept_idx.append(i)
+        for band in bands:
+            buckets.setdefault(band, []).append(i)
+
+    kept = []
+    for i in kept_idx:
+        chunk = chunks[i]
+        if isinstance(chunk, dict):
+            chunk = {**chunk, "dup_count": dup_counts.get(i, 0)}
+        kept.append(chunk)
+
+    total = len(chunks)
+    dropped = total - len(kept)
+    stats = {
+        "chunks_in": total,
+        "chunks_kept": len(kept),
+        "chunks_dropped": dropped,
+        "dedup_ratio": round(dropped / total, 4) if total else 0.0,
+        "embedding_texts_saved": dropped,
+        "embedding_calls_saved": math.ceil(total / batch_size) - math.ceil(len(kept) / batch_size),
+        "threshold": threshold,
+    }
+    return kept, stats
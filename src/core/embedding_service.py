@@ -0,0 +1,206 @@
+# src/core/embedding_service.py
+"""
+Process-wide sentence-transformers embedding service.
+
+One model copy is loaded per worker (lazily, on first use). Concurrent
+callers put their texts on a shared queue; a background thread coalesces
+requests into micro-batches (up to EMBED_MAX_BATCH texts, waiting at most
+EMBED_MAX_WAIT_MS for more work) and runs a single model.encode per batch.
+
+Instances are also Chroma-compatible embedding functions (callable on a
+list of documents), so they can back a collection directly.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DEFAULT_SBERT_MODEL = "all-mpnet-base-v2"
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+
+
+class _EmbedRequest:
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingService:
+    """Micro-batching wrapper around a single SentenceTransformer instance."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_SBERT_MODEL,
+        max_batch_size: int = EMBED_MAX_BATCH,
+        max_wait_ms: float = EMBED_MAX_WAIT_MS,
+    ):
+        self.model_name = model_name
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._queue: "queue.Queue[_EmbedRequest]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "max_batch_texts": 0,
+            "total_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "total_encode_ms": 0.0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def encode(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+        """Embed texts; returns a float32 array of shape (len(texts), dim)."""
+        texts = [t if isinstance(t, str) else str(t or "") for t in (texts or [])]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        self._ensure_worker()
+        req = _EmbedRequest(texts)
+        self._queue.put(req)
+        return req.future.result(timeout=timeout)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Chroma EmbeddingFunction protocol."""
+        return self.encode(list(input)).tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            s = dict(self._stats)
+        batches = s["batches"] or 1
+        requests = s["requests"] or 1
+        return {
+            "model": self.model_name,
+            "model_loaded": self._model is not None,
+            "queue_depth": self._queue.qsize(),
+            "requests": s["requests"],
+            "texts": s["texts"],
+            "batches": s["batches"],
+            "avg_batch_texts": round(s["texts"] / batches, 2) if s["batches"] else 0.0,
+            "avg_requests_per_batch": round(s["requests"] / batches, 2) if s["batches"] else 0.0,
+            "max_batch_texts": s["max_batch_texts"],
+            "avg_latency_ms": round(s["total_latency_ms"] / requests, 2) if s["requests"] else 0.0,
+            "max_latency_ms": round(s["max_latency_ms"], 2),
+            "avg_encode_ms": round(s["total_encode_ms"] / batches, 2) if s["batches"] else 0.0,
+            "errors": s["errors"],
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    print(f"[EmbeddingService] Loading {self.model_name}...")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f"embed-{self.model_name}", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self) -> List[_EmbedRequest]:
+        batch = [self._queue.get()]
+        n_texts = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while n_texts < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(req)
+            n_texts += len(req.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            texts = [t for req in batch for t in req.texts]
+            started = time.perf_counter()
+            try:
+                vectors = self._get_model().encode(
+                    texts,
+                    batch_size=self.max_batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                ).astype(np.float32, copy=False)
+            except Exception as e:
+                logger.exception("Embedding batch failed: %s", e)
+                for req in batch:
+                    req.future.set_exception(e)
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                continue
+
+            finished = time.perf_counter()
+            offset = 0
+            latencies = []
+            for req in batch:
+                req.future.set_result(vectors[offset:offset + len(req.texts)])
+                offset += len(req.texts)
+                latencies.append((finished - req.enqueued_at) * 1000.0)
+
+            with self._stats_lock:
+                self._stats["requests"] += len(batch)
+                self._stats["texts"] += len(texts)
+                self._stats["batches"] += 1
+                self._stats["max_batch_texts"] = max(self._stats["max_batch_texts"], len(texts))
+                self._stats["total_latency_ms"] += sum(latencies)
+                self._stats["max_latency_ms"] = max(self._stats["max_latency_ms"], max(latencies))
+                self._stats["total_encode_ms"] += (finished - started) * 1000.0
+
+
+_SERVICES: Dict[str, EmbeddingService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_embedding_service(model_name: str = DEFAULT_SBERT_MODEL) -> EmbeddingService:
+    """Return the worker-wide EmbeddingService for model_name (created on first call)."""
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(model_name)
+        if service is None:
+            service = EmbeddingService(model_name)
+            _SERVICES[model_name] = service
+        return service
+
+
+def embedding_service_stats() -> List[Dict[str, Any]]:
+    """Stats for every embedding service started in this worker."""
+    with _SERVICES_LOCK:
+        services = list(_SERVICES.values())
+    return [s.stats() for s in services]
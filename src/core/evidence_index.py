@@ -0,0 +1,254 @@
+# src/core/evidence_index.py
+"""
+Per-user evidence search over every FileHub document.
+
+Each user has one Chroma collection (HNSW) holding the chunks of all their
+current PDFs, with file, department, file type and location metadata, so
+"which of my policies mentions X" is one ANN query instead of a scan per
+file. Chunks are the same ~3-sentence chunks audits index, and vectors are
+copied from a document's audit index when it exists, so indexing a file
+that has already been audited costs no embedding calls.
+
+Uploads add the file (and remove the version it supersedes), deletes
+remove it; sync_user_evidence_index backfills files uploaded before the
+index existed.
+"""
+import os
+import hashlib
+import threading
+import traceback
+from typing import Any, Dict, List, Optional
+
+import chromadb
+
+EVIDENCE_INDEX_DIR = os.getenv("EVIDENCE_INDEX_DIR", os.path.join("data", "evidence_index"))
+EVIDENCE_ADD_BATCH = 512
+
+_client = None
+_client_lock = threading.Lock()
+_user_locks: Dict[str, threading.Lock] = {}
+_synced_users = set()   # backfilled in this process
+_syncing_users = set()  # backfill running
+
+
+def _chroma():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                os.makedirs(EVIDENCE_INDEX_DIR, exist_ok=True)
+                _client = chromadb.PersistentClient(path=os.path.abspath(EVIDENCE_INDEX_DIR))
+    return _client
+
+
+def _lock_for(user_uid: str) -> threading.Lock:
+    with _client_lock:
+        return _user_locks.setdefault(user_uid, threading.Lock())
+
+
+def _policy_index():
+    from src.core.policy_index import get_policy_index
+    return get_policy_index()
+
+
+def _collection(user_uid: str):
+    """The user's collection for the current embedding model (Chroma caps names at 63 chars)."""
+    index = _policy_index()
+    key = hashlib.sha256(f"{user_uid}|{index.embedding_model}".encode("utf-8")).hexdigest()
+    return _chroma().get_or_create_collection(name=f"evidence_{key[:40]}", metadata={"hnsw:space": "cosine"})
+
+
+def _file_chunks(path: str, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from src.core.RAG import chunk_text_with_spans, is_informative_chunk
+    from src.core.text_artifacts import get_text_artifact
+
+    artifact = get_text_artifact(path, entry.get("content_hash"))
+    chunks = []
+    for c in chunk_text_with_spans(artifact.text):
+        if not is_informative_chunk(c["text"]):
+            continue
+        c["page"] = artifact.page_for_offset(c["char_start"])
+        c["page_end"] = artifact.page_for_offset(max(c["char_end"] - 1, c["char_start"]))
+        chunks.append(c)
+    return chunks
+
+
+def index_file(user_uid: str, entry: Dict[str, Any], path: str) -> int:
+    """Add one FileHub file's chunks to the user's index; returns the number of chunks added."""
+    if not (entry.get("original_name") or "").lower().endswith(".pdf") or not os.path.exists(path):
+        return 0
+    index = _policy_index()
+    doc_hash = entry.get("content_hash") or ""
+    chunks = _file_chunks(path, entry)
+    if not chunks:
+        return 0
+
+    # Vectors of chunks already embedded for an audit of this document
+    known = index.vectors_for(doc_hash) if doc_hash else {}
+    missing = [c["text"] for c in chunks if c["chunk_hash"] not in known]
+    fresh = iter(index.embed(missing)) if missing else iter(())
+    embeddings = [known[c["chunk_hash"]] if c["chunk_hash"] in known else next(fresh) for c in chunks]
+
+    ids, metadatas = [], []
+    for i, c in enumerate(chunks):
+        ids.append(f"{entry['id']}:{i}")
+        meta = {
+            "file_id": entry["id"],
+            "file_name": entry.get("original_name"),
+            "department": entry.get("department"),
+            "file_type": entry.get("file_type"),
+            "doc_hash": doc_hash,
+            "version": entry.get("version"),
+            "chunk": i,
+            "page": c["page"],
+            "page_end": c["page_end"],
+            "char_start": c["char_start"],
+            "char_end": c["char_end"],
+            "chunk_hash": c["chunk_hash"],
+        }
+        # Chroma metadata values cannot be None
+        metadatas.append({k: v for k, v in meta.items() if v is not None})
+
+    with _lock_for(user_uid):
+        collection = _collection(user_uid)
+        collection.delete(where={"file_id": entry["id"]})
+        for start in range(0, len(ids), EVIDENCE_ADD_BATCH):
+            end = start + EVIDENCE_ADD_BATCH
+            collection.add(
+                ids=ids[start:end],
+                documents=[c["text"] for c in chunks[start:end]],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+            )
+    print(f"[EvidenceIndex] {user_uid}: indexed {len(ids)} chunks of {entry.get('original_name')} "
+          f"({len(ids) - len(missing)} vectors reused).")
+    return len(ids)
+
+
+def remove_file(user_uid: str, file_id: str) -> None:
+    with _lock_for(user_uid):
+        _collection(user_uid).delete(where={"file_id": file_id})
+
+
+def indexed_file_ids(user_uid: str) -> set:
+    stored = _collection(user_uid).get(include=["metadatas"])
+    return {m.get("file_id") for m in stored.get("metadatas") or [] if m}
+
+
+def sync_user_evidence_index(user_uid: str) -> Dict[str, int]:
+    """Index current files missing from the user's index and drop deleted or superseded ones."""
+    from src.core.compliance_matrix import current_pdf_files
+    from src.core.nomi_file_hub import get_user_file_path
+
+    files = {e["id"]: e for e in current_pdf_files(user_uid)}
+    indexed = indexed_file_ids(user_uid)
+
+    removed = 0
+    for file_id in indexed - set(files):
+        remove_file(user_uid, file_id)
+        removed += 1
+
+    added = 0
+    for file_id in set(files) - indexed:
+        found = get_user_file_path(user_uid, file_id)
+        if found:
+            try:
+                added += 1 if index_file(user_uid, files[file_id], found[0]) else 0
+            except Exception as e:
+                print(f"[EvidenceIndex] Could not index {file_id}: {e}")
+    _synced_users.add(user_uid)
+    return {"files": len(files), "added": added, "removed": removed}
+
+
+def _background_sync(user_uid: str) -> None:
+    try:
+        sync_user_evidence_index(user_uid)
+    except Exception:
+        traceback.print_exc()
+    finally:
+        with _client_lock:
+            _syncing_users.discard(user_uid)
+
+
+def schedule_evidence_update(user_uid: str, entry: Optional[Dict[str, Any]] = None,
+                             path: Optional[str] = None, removed_file_id: Optional[str] = None) -> None:
+    """
+    Update the user's index on a daemon thread: index entry (removing the
+    version it supersedes) and/or drop removed_file_id.
+    """
+    def run():
+        try:
+            if removed_file_id:
+                remove_file(user_uid, removed_file_id)
+            if entry is not None and path:
+                if entry.get("supersedes"):
+                    remove_file(user_uid, entry["supersedes"])
+                index_file(user_uid, entry, path)
+        except Exception:
+            traceback.print_exc()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def search_evidence(
+    user_uid: str,
+    query: str,
+    top_k: int = 10,
+    department: Optional[str] = None,
+    file_type: Optional[str] = None,
+    file_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Best-matching chunks across the user's documents:
+    {"results": [{"file_id", "file_name", "score", "text", "location", ...}], "indexing": bool}.
+    """
+    indexing = user_uid not in _synced_users
+    if indexing:
+        # first search in this process: backfill in the background (retried by later searches if it fails)
+        with _client_lock:
+            start = user_uid not in _syncing_users
+            _syncing_users.add(user_uid)
+        if start:
+            threading.Thread(target=_background_sync, args=(user_uid,), daemon=True).start()
+
+    collection = _collection(user_uid)
+    total = collection.count()
+    if not query or total == 0:
+        return {"query": query, "results": [], "indexed_chunks": total, "indexing": indexing}
+
+    filters = [{k: v} for k, v in (("department", department), ("file_type", file_type), ("file_id", file_id)) if v]
+    where = None
+    if len(filters) == 1:
+        where = filters[0]
+    elif filters:
+        where = {"$and": filters}
+
+    query_vector = _policy_index().embed([query])[0]
+    result = collection.query(
+        query_embeddings=[query_vector],
+        n_results=min(int(top_k), total),
+        where=where,
+        include=["documents", "distances", "metadatas"],
+    )
+
+    hits = []
+    for doc, dist, meta in zip(result["documents"][0], result["distances"][0], result["metadatas"][0]):
+        meta = meta or {}
+        hits.append({
+            "file_id": meta.get("file_id"),
+            "file_name": meta.get("file_name"),
+            "department": meta.get("department"),
+            "file_type": meta.get("file_type"),
+            "score": round((1.0 - float(dist)) * 100, 2),
+            "text": doc,
+            "location": {
+                "doc_hash": meta.get("doc_hash"),
+                "chunk": meta.get("chunk"),
+                "page": meta.get("page"),
+                "page_end": meta.get("page_end"),
+                "char_start": meta.get("char_start"),
+                "char_end": meta.get("char_end"),
+                "chunk_hash": meta.get("chunk_hash"),
+            },
+        })
+    return {"query": query, "results": hits, "indexed_chunks": total, "indexing": indexing}
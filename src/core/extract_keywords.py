@@ -1,16 +1,12 @@
 import re
 import os
-from PyPDF2 import PdfReader
+from src.core.text_artifacts import get_text_artifact
 from docx import Document
 
 def read_policy_text(file_path):
     """Read text from PDF, DOCX, or TXT file."""
     if file_path.lower().endswith(".pdf"):
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
+        return get_text_artifact(file_path).joined("")
 
     elif file_path.lower().endswith(".docx"):
         doc = Document(file_path)
@@ -0,0 +1,159 @@
+# src/core/hashing_embeddings.py
+"""
+Model-free hashed n-gram TF-IDF embeddings.
+
+For CPU-only or air-gapped deployments where neither OpenAI nor the
+sentence-transformers download is available. Word 1-2 grams and character
+3-5 grams are hashed (crc32) into HASH_EMBED_DIM buckets, built as one
+SciPy sparse matrix per batch, weighted with sublinear TF and IDF and
+L2-normalised.
+
+Without a fitted model every bucket has IDF 1. fit_hashing_model() learns
+bucket IDF weights from a reference corpus and, optionally, a truncated-SVD
+projection down to svd_dim dimensions; the result is a small .npz file
+loaded from HASH_EMBED_MODEL_PATH. The embedding model name includes the
+model's fingerprint, so indexes built with different weights never mix.
+
+Select it with POLICY_EMBEDDING_BACKEND=hashing (policy index) and
+RAG_EMBEDDING_BACKEND=hashing (create_embeddings_batch).
+"""
+import os
+import re
+import zlib
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+HASH_EMBED_DIM = int(os.getenv("HASH_EMBED_DIM", "2048"))
+HASH_EMBED_MODEL_PATH = os.getenv("HASH_EMBED_MODEL_PATH", os.path.join("data", "hashing_embedding.npz"))
+
+_WORD_RE = re.compile(r"\w+")
+# Character n-grams give robustness to inflection and OCR noise
+CHAR_NGRAMS = (3, 5)
+
+
+def _features(text: str) -> List[str]:
+    words = _WORD_RE.findall(text.lower())
+    feats = ["w:" + w for w in words]
+    feats += ["b:" + a + " " + b for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        for n in range(CHAR_NGRAMS[0], CHAR_NGRAMS[1] + 1):
+            feats += ["c:" + padded[i:i + n] for i in range(max(1, len(padded) - n + 1))]
+    return feats
+
+
+def hashed_counts(texts: List[str], dim: int = HASH_EMBED_DIM) -> sp.csr_matrix:
+    """(len(texts), dim) sparse term-count matrix over hashed n-gram features."""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        buckets = [zlib.crc32(f.encode("utf-8")) % dim for f in _features(text or "")]
+        rows.append(np.full(len(buckets), i, dtype=np.int32))
+        cols.append(np.asarray(buckets, dtype=np.int32))
+    row = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+    col = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int32)
+    data = np.ones(len(row), dtype=np.float32)
+    # duplicate (row, col) entries are summed into counts
+    x = sp.csr_matrix((data, (row, col)), shape=(len(texts), dim))
+    x.sum_duplicates()
+    return x
+
+
+def _l2_normalize(x):
+    if sp.issparse(x):
+        norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.diags(1.0 / norms) @ x
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+class HashingEmbedder:
+    """Hashed TF-IDF embedding function (Chroma-compatible callable)."""
+
+    def __init__(self, dim: int = HASH_EMBED_DIM, model_path: Optional[str] = HASH_EMBED_MODEL_PATH):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        self.projection: Optional[np.ndarray] = None
+        self.fingerprint = "noidf"
+
+        if model_path and os.path.exists(model_path):
+            data = np.load(model_path)
+            if int(data["dim"]) != dim:
+                print(f"[HashingEmbedder] Ignoring {model_path}: fitted for dim={int(data['dim'])}, not {dim}")
+            else:
+                self.idf = data["idf"].astype(np.float32)
+                self.projection = data["projection"].astype(np.float32) if "projection" in data else None
+                self.fingerprint = hashlib.sha256(open(model_path, "rb").read()).hexdigest()[:8]
+
+    @property
+    def model_name(self) -> str:
+        out_dim = self.projection.shape[1] if self.projection is not None else self.dim
+        return f"hashing-tfidf-{self.dim}-{out_dim}-{self.fingerprint}"
+
+    def sparse(self, texts: List[str]) -> sp.csr_matrix:
+        """L2-normalised sparse TF-IDF rows (before any SVD projection)."""
+        x = hashed_counts(texts, self.dim)
+        x.data = 1.0 + np.log(x.data)
+        x = x @ sp.diags(self.idf)
+        return _l2_normalize(x.tocsr())
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Dense float32 array of shape (len(texts), output dim)."""
+        texts = [t if isinstance(t, str) else str(t or "") for t in (texts or [])]
+        x = self.sparse(texts)
+        if self.projection is not None:
+            return _l2_normalize(np.asarray(x @ self.projection, dtype=np.float32))
+        return x.toarray().astype(np.float32)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Chroma EmbeddingFunction protocol."""
+        return self.encode(list(input)).tolist()
+
+
+def fit_hashing_model(
+    texts: List[str],
+    path: str = HASH_EMBED_MODEL_PATH,
+    dim: int = HASH_EMBED_DIM,
+    svd_dim: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Learn bucket IDF weights (and optionally an SVD projection to svd_dim)
+    from a reference corpus and save them to path.
+    """
+    counts = hashed_counts(texts, dim)
+    df = np.bincount(counts.indices, minlength=dim)
+    n = max(1, len(texts))
+    idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+
+    arrays = {"dim": np.array(dim), "idf": idf}
+    if svd_dim:
+        from scipy.sparse.linalg import svds
+        x = counts.copy()
+        x.data = 1.0 + np.log(x.data)
+        x = _l2_normalize((x @ sp.diags(idf)).tocsr())
+        k = min(int(svd_dim), min(x.shape) - 1)
+        _, _, vt = svds(x.astype(np.float64), k=k)
+        arrays["projection"] = vt.T.astype(np.float32)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, **arrays)
+    return {"texts": len(texts), "dim": dim, "svd_dim": int(arrays["projection"].shape[1]) if svd_dim else 0}
+
+
+_embedder: Optional[HashingEmbedder] = None
+_embedder_lock = threading.Lock()
+
+
+def get_hashing_embedder() -> HashingEmbedder:
+    """Process-wide HashingEmbedder using the env-configured model file."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = HashingEmbedder()
+    return _embedder
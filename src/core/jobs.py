@@ -0,0 +1,295 @@
+# src/core/jobs.py
+"""
+SQL-backed job queue for long-running compliance audits.
+
+submit_job stores a compliance_jobs row and hands it to a bounded worker
+pool (JOB_WORKERS threads), so request handlers return a job_id at once
+instead of blocking a server worker. Handlers are registered per job kind
+and report progress and partial results through a JobProgress, which is
+written to the row at most every JOB_PROGRESS_INTERVAL seconds.
+
+Every job row records the worker process that owns it, and that process
+refreshes heartbeat_at every JOB_HEARTBEAT_INTERVAL seconds while the job
+is queued or running in its pool. resume_pending_jobs() (called at
+startup) takes over only queued/running jobs whose heartbeat is older than
+JOB_STALE_SECONDS, i.e. whose owner has stopped, so sibling workers and
+rolling restarts never run a job twice. Jobs are retried up to
+JOB_MAX_ATTEMPTS attempts.
+"""
+import os
+import time
+import socket
+import uuid
+import threading
+import traceback
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+
+# Identifies this process as the owner of the jobs it queues or resumes
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_HANDLERS: Dict[str, Callable[[Dict[str, Any], "JobProgress"], Any]] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_heartbeat: Optional[threading.Thread] = None
+_local_jobs: set = set()  # job ids queued or running in this process's pool
+_local_jobs_lock = threading.Lock()
+
+
+def register_job_handler(kind: str, handler: Callable[[Dict[str, Any], "JobProgress"], Any]) -> None:
+    """handler(payload, progress) runs the job and returns its JSON-serializable result."""
+    _HANDLERS[kind] = handler
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix="compliance-job")
+    _start_heartbeat()
+    return _executor
+
+
+def _schedule(job_id: str) -> None:
+    with _local_jobs_lock:
+        _local_jobs.add(job_id)
+    _pool().submit(_run_job, job_id)
+
+
+def _start_heartbeat() -> None:
+    global _heartbeat
+    with _executor_lock:
+        if _heartbeat is None or not _heartbeat.is_alive():
+            _heartbeat = threading.Thread(target=_heartbeat_loop, name="compliance-job-heartbeat", daemon=True)
+            _heartbeat.start()
+
+
+def beat() -> int:
+    """Refresh heartbeat_at on every job this process owns and still has in its pool."""
+    from src.api.models import ComplianceJob
+
+    with _local_jobs_lock:
+        job_ids = list(_local_jobs)
+    if not job_ids:
+        return 0
+    db = _session()
+    try:
+        updated = (
+            db.query(ComplianceJob)
+            .filter(ComplianceJob.job_id.in_(job_ids), ComplianceJob.owner == WORKER_ID)
+            .update({ComplianceJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        )
+        db.commit()
+        return updated
+    finally:
+        db.close()
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        try:
+            beat()
+        except Exception as e:
+            print(f"[Jobs] Heartbeat failed: {e}")
+
+
+def _session():
+    from src.api.db import SessionLocal
+    return SessionLocal()
+
+
+class JobProgress:
+    """Progress reporter handed to job handlers; throttles writes to the job row."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.done = 0
+        self.total = 0
+        self.partial: List[Any] = []
+        self._last_flush = 0.0
+
+    def set_total(self, total: int) -> None:
+        self.total = int(total)
+        self.flush()
+
+    def add(self, item: Any = None, done: Optional[int] = None) -> None:
+        """Record one partial result (and optionally an explicit done count)."""
+        if item is not None:
+            self.partial.append(item)
+        self.done = self.done + 1 if done is None else int(done)
+        if time.monotonic() - self._last_flush >= JOB_PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        _update_job(self.job_id, progress=self.done, total=self.total, partial_results=list(self.partial))
+        self._last_flush = time.monotonic()
+
+
+def _update_job(job_id: str, **fields) -> None:
+    """Write fields to a job this process owns (a job taken over elsewhere is left alone)."""
+    from src.api.models import ComplianceJob
+
+    db = _session()
+    try:
+        job = (
+            db.query(ComplianceJob)
+            .filter(ComplianceJob.job_id == job_id, ComplianceJob.owner == WORKER_ID)
+            .first()
+        )
+        if job is None:
+            return
+        job.heartbeat_at = datetime.utcnow()
+        for key, value in fields.items():
+            setattr(job, key, value)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[Jobs] Could not update job {job_id}: {e}")
+    finally:
+        db.close()
+
+
+def _run_job(job_id: str) -> None:
+    try:
+        _execute_job(job_id)
+    finally:
+        with _local_jobs_lock:
+            _local_jobs.discard(job_id)
+
+
+def _execute_job(job_id: str) -> None:
+    from src.api.models import ComplianceJob
+
+    db = _session()
+    try:
+        job = (
+            db.query(ComplianceJob)
+            .filter(ComplianceJob.job_id == job_id, ComplianceJob.owner == WORKER_ID)
+            .first()
+        )
+        if job is None or job.status != "queued":
+            return
+        kind, payload = job.kind, dict(job.payload or {})
+        job.status = "running"
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = datetime.utcnow()
+        job.heartbeat_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+    handler = _HANDLERS.get(kind)
+    if handler is None:
+        _update_job(job_id, status="failed", error=f"No handler for job kind '{kind}'",
+                    finished_at=datetime.utcnow())
+        return
+
+    progress = JobProgress(job_id)
+    try:
+        result = handler(payload, progress)
+        _update_job(job_id, status="succeeded", result=result, progress=progress.done, total=progress.total,
+                    partial_results=list(progress.partial), finished_at=datetime.utcnow())
+    except Exception as e:
+        traceback.print_exc()
+        _update_job(job_id, status="failed", error=str(e), progress=progress.done, total=progress.total,
+                    partial_results=list(progress.partial), finished_at=datetime.utcnow())
+
+
+def submit_job(db, kind: str, payload: Dict[str, Any], user_uid: Optional[str] = None) -> str:
+    """Persist a queued job and schedule it; returns the job_id."""
+    from src.api.models import ComplianceJob
+
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    job_id = uuid.uuid4().hex
+    db.add(ComplianceJob(job_id=job_id, user_uid=user_uid, kind=kind, status="queued", payload=payload,
+                         owner=WORKER_ID, heartbeat_at=datetime.utcnow()))
+    db.commit()
+    _schedule(job_id)
+    return job_id
+
+
+def job_to_dict(job, include_results: bool = True) -> Dict[str, Any]:
+    out = {
+        "job_id": job.job_id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress or 0,
+        "total": job.total or 0,
+        "error": job.error,
+        "attempts": job.attempts or 0,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if include_results:
+        out["partial_results"] = job.partial_results or []
+        out["result"] = job.result
+    return out
+
+
+def get_job(db, job_id: str, include_results: bool = True) -> Optional[Dict[str, Any]]:
+    from src.api.models import ComplianceJob
+
+    job = db.query(ComplianceJob).filter(ComplianceJob.job_id == job_id).first()
+    return job_to_dict(job, include_results) if job else None
+
+
+def resume_pending_jobs() -> int:
+    """
+    Take over queued/running jobs whose owner stopped heartbeating and
+    re-queue them here; returns how many were resumed.
+    """
+    from sqlalchemy import or_
+    from src.api.models import ComplianceJob
+
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    db = _session()
+    resumed = []
+    try:
+        stale = (
+            db.query(ComplianceJob.job_id, ComplianceJob.attempts)
+            .filter(
+                ComplianceJob.status.in_(["queued", "running"]),
+                or_(ComplianceJob.heartbeat_at.is_(None), ComplianceJob.heartbeat_at < cutoff),
+            )
+            .order_by(ComplianceJob.created_at.asc())
+            .all()
+        )
+        for job_id, attempts in stale:
+            give_up = (attempts or 0) >= JOB_MAX_ATTEMPTS
+            values = {"owner": WORKER_ID, "heartbeat_at": datetime.utcnow()}
+            if give_up:
+                values.update(status="failed", error=f"Interrupted {attempts} times; giving up",
+                              finished_at=datetime.utcnow())
+            else:
+                values["status"] = "queued"
+            # Conditional claim: if another worker resumed the job first, its heartbeat is fresh and no row matches
+            claimed = (
+                db.query(ComplianceJob)
+                .filter(
+                    ComplianceJob.job_id == job_id,
+                    ComplianceJob.status.in_(["queued", "running"]),
+                    or_(ComplianceJob.heartbeat_at.is_(None), ComplianceJob.heartbeat_at < cutoff),
+                )
+                .update(values, synchronize_session=False)
+            )
+            db.commit()
+            if claimed and not give_up:
+                resumed.append(job_id)
+    finally:
+        db.close()
+
+    for job_id in resumed:
+        _schedule(job_id)
+    return len(resumed)
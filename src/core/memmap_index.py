@@ -0,0 +1,215 @@
+# src/core/memmap_index.py
+"""
+Brute-force policy index on memory-mapped, quantized NumPy arrays.
+
+For single-document audits the corpus is a few hundred to a few thousand
+chunks, where an exact scan is cheaper than building and querying an HNSW
+graph. Each document namespace is a directory holding:
+
+    vectors.npy    L2-normalized chunk embeddings (float16 or int8)
+    scales.npy     per-row dequantization scales (int8 only)
+    documents.json chunk texts and metadatas
+
+Vectors are opened with mmap_mode="r" and scanned in blocks of
+MEMMAP_SCORE_BLOCK rows, keeping a running top-k, so a query never holds
+more than one dequantized block in memory.
+
+MemmapPolicyIndex reuses PolicyIndex's manifest, content-hash keys and LRU
+eviction; only the storage hooks differ. MemmapCollection implements the
+subset of the Chroma collection API that ComplianceChecker uses (count,
+query, get), so the checker runs unchanged on either backend.
+"""
+import os
+import json
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.policy_index import PolicyIndex
+
+POLICY_MEMMAP_DIR = os.getenv("POLICY_MEMMAP_DIR", os.path.join("data", "policy_memmap"))
+POLICY_MEMMAP_DTYPE = os.getenv("POLICY_MEMMAP_DTYPE", "float16").strip().lower()  # float16 | int8
+MEMMAP_SCORE_BLOCK = int(os.getenv("MEMMAP_SCORE_BLOCK", "4096"))  # rows dequantized per scan step
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+DOCUMENTS_FILE = "documents.json"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize(matrix: np.ndarray, dtype: str):
+    """Return (stored array, per-row scales or None) for a normalized float32 matrix."""
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else np.zeros(len(matrix))
+        scales = scales.astype(np.float32)
+        scales[scales == 0] = 1.0
+        q = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return q, scales
+    return matrix.astype(np.float16), None
+
+
+class MemmapCollection:
+    """Read-only, Chroma-shaped view over one document's memory-mapped vectors."""
+
+    def __init__(self, path: str, embedding_function=None):
+        self.path = path
+        self.embedding_function = embedding_function
+        with open(os.path.join(path, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        self.ids: List[str] = stored["ids"]
+        self.documents: List[str] = stored["documents"]
+        self.metadatas: List[Dict[str, Any]] = stored["metadatas"]
+        self.dtype: str = stored.get("dtype", "float16")
+
+        # numpy cannot memory-map a zero-length array
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if self.ids else None)
+        scales_path = os.path.join(path, SCALES_FILE)
+        self.scales = np.load(scales_path) if os.path.exists(scales_path) else None
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def _rows(self, rows) -> np.ndarray:
+        """Dequantized float32 copies of the selected rows (a slice or index array)."""
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows][:, None]
+        return block
+
+    def _top_k(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (indices, cosine similarities) of the k best rows per query, best first.
+        Vectors are stored normalized, so cosine is a dot product.
+        """
+        queries = _normalize(queries)
+        best_idx = np.zeros((len(queries), 0), dtype=np.int64)
+        best_sims = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, self.count(), MEMMAP_SCORE_BLOCK):
+            end = min(start + MEMMAP_SCORE_BLOCK, self.count())
+            sims = queries @ self._rows(slice(start, end)).T
+            idx = np.broadcast_to(np.arange(start, end), sims.shape)
+            cand_sims = np.concatenate([best_sims, sims], axis=1)
+            cand_idx = np.concatenate([best_idx, idx], axis=1)
+            if cand_sims.shape[1] > k:
+                keep = np.argpartition(-cand_sims, k - 1, axis=1)[:, :k]
+                cand_sims = np.take_along_axis(cand_sims, keep, axis=1)
+                cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+            best_sims, best_idx = cand_sims, cand_idx
+        order = np.argsort(-best_sims, axis=1)
+        return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_sims, order, axis=1)
+
+    def query(self, query_embeddings=None, query_texts=None, n_results: int = 10,
+              include=("documents", "distances", "metadatas")) -> Dict[str, Any]:
+        if query_embeddings is None:
+            if self.embedding_function is None:
+                raise ValueError("query_texts requires an embedding function")
+            query_embeddings = self.embedding_function(list(query_texts or []))
+        k = min(int(n_results), self.count())
+        if k <= 0 or len(query_embeddings) == 0:
+            empty = [[] for _ in range(len(query_embeddings))]
+            return {"ids": empty, "documents": empty, "distances": empty, "metadatas": empty}
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.vectors.shape[1])
+        top, top_sims = self._top_k(queries, k)
+
+        result: Dict[str, Any] = {"ids": [[self.ids[j] for j in row] for row in top]}
+        if "documents" in include:
+            result["documents"] = [[self.documents[j] for j in row] for row in top]
+        if "distances" in include:
+            result["distances"] = (1.0 - top_sims).tolist()
+        if "metadatas" in include:
+            result["metadatas"] = [[self.metadatas[j] for j in row] for row in top]
+        if "embeddings" in include:
+            result["embeddings"] = [self._rows(np.asarray(row)) for row in top]
+        return result
+
+    def get(self, ids: Optional[Sequence[str]] = None,
+            include=("documents", "metadatas")) -> Dict[str, Any]:
+        """Stored rows (all, or only ids); embeddings are dequantized for the returned rows only."""
+        if ids is None:
+            rows = np.arange(self.count())
+        else:
+            position = {cid: i for i, cid in enumerate(self.ids)}
+            rows = np.asarray([position[cid] for cid in ids if cid in position], dtype=np.int64)
+
+        result: Dict[str, Any] = {"ids": [self.ids[i] for i in rows]}
+        if "documents" in include:
+            result["documents"] = [self.documents[i] for i in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[i] for i in rows]
+        if "embeddings" in include:
+            dim = self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+            result["embeddings"] = self._rows(rows) if len(rows) else np.zeros((0, dim), dtype=np.float32)
+        return result
+
+
+class MemmapPolicyIndex(PolicyIndex):
+    """PolicyIndex storing each namespace as quantized memory-mapped arrays."""
+
+    backend = "memmap"
+
+    def __init__(self, persist_dir: str = POLICY_MEMMAP_DIR, dtype: str = POLICY_MEMMAP_DTYPE, **kwargs):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported memmap dtype: {dtype}")
+        self.dtype = dtype
+        super().__init__(persist_dir=persist_dir, **kwargs)
+
+    def namespace_for(self, doc_hash: str, namespace: str = "policies", variant: str = "") -> str:
+        # Quantization is part of the key so float16 and int8 stores never mix
+        return super().namespace_for(doc_hash, namespace, f"{variant}|{self.dtype}")
+
+    def stats(self) -> Dict[str, Any]:
+        out = super().stats()
+        out["dtype"] = self.dtype
+        return out
+
+    # Storage hooks ------------------------------------------------------
+    def _make_client(self):
+        return None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_dir, name)
+
+    def _open_collection(self, name: str) -> MemmapCollection:
+        return MemmapCollection(self._path(name), embedding_function=self.embedding_function)
+
+    def _write_collection(self, name: str, doc_hash: str, variant: str, chunks: List[str],
+                          embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> MemmapCollection:
+        path = self._path(name)
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        if chunks:
+            matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        stored, scales = quantize(matrix, self.dtype)
+        np.save(os.path.join(tmp, VECTORS_FILE), stored)
+        if scales is not None:
+            np.save(os.path.join(tmp, SCALES_FILE), scales)
+        with open(os.path.join(tmp, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "doc_hash": doc_hash,
+                "embedding_model": self.embedding_model,
+                "variant": variant,
+                "dtype": self.dtype,
+                "ids": [f"{doc_hash[:16]}-{i}" for i in range(len(chunks))],
+                "documents": chunks,
+                "metadatas": metadatas,
+            }, f)
+
+        os.replace(tmp, path)
+        return self._open_collection(name)
+
+    def _delete_collection(self, name: str) -> None:
+        shutil.rmtree(self._path(name), ignore_errors=True)
@@ -1,6 +1,7 @@
 import os
 import json
 import uuid
+import hashlib
 from datetime import datetime
 
 # This will create a folder NEXT TO main_api.py:
@@ -47,7 +48,8 @@ def save_user_file(
     
     file_type: str,
     used_for: str,
-    department: str
+    department: str,
+    supersedes: str = None
 ):
 
     """
@@ -60,6 +62,8 @@ def save_user_file(
       - uploaded_at
       - file_type
       - used_for
+      - content_hash
+      - supersedes / lineage_id / version (document lineage)
     """
 
     folder = get_user_folder(user_uid)
@@ -77,6 +81,8 @@ def save_user_file(
         "original_name": filename,
         "stored_name": stored_name,
         "size": len(file_bytes),
+        # keys the extracted-text artifact (src/core/text_artifacts.py)
+        "content_hash": hashlib.sha256(file_bytes).hexdigest(),
         "uploaded_at": datetime.utcnow().isoformat(),
         "file_type": file_type,
         "used_for": used_for,
@@ -85,11 +91,37 @@ def save_user_file(
 
     # Update index
     index = load_index(user_uid)
+
+    # Lineage: explicit supersedes, else the latest upload with the same
+    # original name and department is treated as the previous version
+    previous = find_previous_version(index, filename, department, supersedes)
+    entry["supersedes"] = previous["id"] if previous else None
+    entry["lineage_id"] = (previous.get("lineage_id") or previous["id"]) if previous else file_id
+    entry["version"] = (previous.get("version") or 1) + 1 if previous else 1
+
     index.append(entry)
     save_index(user_uid, index)
 
     return entry
 
+def find_previous_version(index, original_name: str, department: str, supersedes: str = None):
+    """Entry this upload replaces, from an explicit id or a name/department match."""
+    if supersedes:
+        return next((f for f in index if f["id"] == supersedes), None)
+    matches = [
+        f for f in index
+        if f.get("original_name") == original_name and f.get("department") == department
+    ]
+    return max(matches, key=lambda f: f.get("uploaded_at", "")) if matches else None
+
+
+def get_previous_version(user_uid: str, entry):
+    """The FileHub entry a file supersedes, or None for a first version."""
+    if not entry or not entry.get("supersedes"):
+        return None
+    return next((f for f in load_index(user_uid) if f["id"] == entry["supersedes"]), None)
+
+
 def list_user_files(user_uid: str):
     """Return all metadata entries."""
     return load_index(user_uid)
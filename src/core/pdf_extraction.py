@@ -0,0 +1,189 @@
+# src/core/pdf_extraction.py
+"""
+Shared PDF text extraction.
+
+Every PDF consumer (RAG chunking, file hub upload, compliance checker,
+keyword extraction, byte uploads in main_api) goes through iter_pdf_pages,
+which yields one page at a time instead of building the whole document
+string up front.
+
+Engines are tried in order PyMuPDF -> pdfminer -> PyPDF2. An engine is
+used as soon as it produces text for any page; empty leading pages are held
+back until then so a later engine can take over if the first one yields
+nothing at all (scanned or malformed PDFs).
+
+Documents with at least PDF_PARALLEL_MIN_PAGES pages, given as a path, are
+split into page ranges and extracted on a process pool. Results are
+yielded in page order with at most 2 x workers ranges in flight, so memory
+stays bounded for very long policies.
+"""
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
+ENGINES = ("pymupdf", "pdfminer", "pypdf2")
+
+Source = Union[str, bytes]
+
+
+# ----------------------------------------------------------------------
+# Engine adapters: page count and text for a page range
+# ----------------------------------------------------------------------
+def _open_fp(source: Source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else open(source, "rb")
+
+
+def _fitz_open(source: Source):
+    import fitz
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _page_count(engine: str, source: Source) -> int:
+    if engine == "pymupdf":
+        with _fitz_open(source) as doc:
+            return len(doc)
+    if engine == "pdfminer":
+        from pdfminer.pdfpage import PDFPage
+        with _open_fp(source) as fp:
+            return sum(1 for _ in PDFPage.get_pages(fp))
+    from PyPDF2 import PdfReader
+    with _open_fp(source) as fp:
+        return len(PdfReader(fp).pages)
+
+
+def _extract_range(engine: str, source: Source, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """Extract pages [start, end) with one engine; returns (page_index, text, seconds) tuples."""
+    out = []
+    if engine == "pymupdf":
+        with _fitz_open(source) as doc:
+            for i in range(start, min(end, len(doc))):
+                t = time.perf_counter()
+                text = doc.load_page(i).get_text("text") or ""
+                out.append((i, text, time.perf_counter() - t))
+        return out
+
+    if engine == "pdfminer":
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        with _open_fp(source) as fp:
+            t = time.perf_counter()
+            for i, layout in zip(range(start, end), extract_pages(fp, page_numbers=range(start, end))):
+                text = "".join(el.get_text() for el in layout if isinstance(el, LTTextContainer))
+                now = time.perf_counter()
+                out.append((i, text, now - t))
+                t = now
+        return out
+
+    from PyPDF2 import PdfReader
+    with _open_fp(source) as fp:
+        reader = PdfReader(fp)
+        for i in range(start, min(end, len(reader.pages))):
+            t = time.perf_counter()
+            text = reader.pages[i].extract_text() or ""
+            out.append((i, text, time.perf_counter() - t))
+    return out
+
+
+def _iter_engine_pages(engine: str, source: Source, page_count: int,
+                       parallel: bool, workers: int) -> Iterator[Tuple[int, str, float]]:
+    step = max(1, PDF_PAGES_PER_TASK)
+    ranges = [(s, min(s + step, page_count)) for s in range(0, page_count, step)]
+
+    if not parallel:
+        for start, end in ranges:
+            yield from _extract_range(engine, source, start, end)
+        return
+
+    window = max(1, workers) * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        next_range = 0
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < window:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(_extract_range, engine, source, start, end))
+                next_range += 1
+            yield from pending.pop(0).result()
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def iter_pdf_pages(
+    source: Source,
+    parallel: Optional[bool] = None,
+    workers: int = PDF_EXTRACT_WORKERS,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {"page": 1-based number, "text": str, "seconds": float, "engine": str}
+    for every page of a PDF given as a file path or raw bytes.
+
+    parallel=None decides automatically (path sources with at least
+    PDF_PARALLEL_MIN_PAGES pages). If stats is a dict it is filled with the
+    engine used, page count, total and per-page seconds.
+    """
+    if isinstance(source, str) and not os.path.exists(source):
+        raise FileNotFoundError(f"PDF not found at: {source}")
+
+    started = time.perf_counter()
+    for engine in ENGINES:
+        try:
+            page_count = _page_count(engine, source)
+        except Exception as e:
+            print(f"{engine} failed: {e}")
+            continue
+
+        use_pool = parallel
+        if use_pool is None:
+            use_pool = isinstance(source, str) and workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+
+        held: List[Dict[str, Any]] = []
+        committed = False
+        page_seconds: List[float] = []
+        try:
+            for i, text, seconds in _iter_engine_pages(engine, source, page_count, use_pool, workers):
+                page = {"page": i + 1, "text": text, "seconds": round(seconds, 4), "engine": engine}
+                page_seconds.append(page["seconds"])
+                if committed:
+                    yield page
+                elif text.strip():
+                    committed = True
+                    yield from held
+                    held = []
+                    yield page
+                else:
+                    held.append(page)
+        except Exception as e:
+            if committed:
+                raise
+            print(f"{engine} failed: {e}")
+            continue
+
+        if not committed and engine != ENGINES[-1]:
+            # No text from this engine at all; let the next one try
+            continue
+
+        yield from held
+        if stats is not None:
+            stats.update({
+                "engine": engine,
+                "pages": page_count,
+                "parallel": bool(use_pool),
+                "seconds": round(time.perf_counter() - started, 4),
+                "page_seconds": page_seconds,
+            })
+        return
+
+
+def extract_pdf_text(source: Source, sep: str = "\n", **kwargs) -> str:
+    """Whole-document text: pages from iter_pdf_pages joined with sep."""
+    return sep.join(p["text"] for p in iter_pdf_pages(source, **kwargs))
@@ -0,0 +1,409 @@
+# src/core/policy_index.py
+"""
+Persistent on-disk vector index for policy documents.
+
+Each document gets its own Chroma collection ("namespace"), keyed by the
+SHA-256 of the file bytes plus the embedding model and chunking variant.
+Re-auditing the same file reuses the stored chunks and vectors, so PDF
+extraction and embedding are skipped entirely.
+
+A small JSON manifest tracks chunk counts, approximate size and last access
+time per namespace. When the index grows past POLICY_INDEX_MAX_DOCS or
+POLICY_INDEX_MAX_BYTES, the least recently used documents are evicted.
+Concurrent builds of the same document are serialized across threads and,
+through lock files under persist_dir/.locks, across worker processes; every
+manifest save is a locked read-merge-write, so several workers can share
+the index. On platforms without fcntl (Windows) only the in-process locks
+apply and the index should be owned by a single worker.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+import chromadb
+from chromadb.utils import embedding_functions
+
+from src.core.chunking import token_batches
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Configuration
+POLICY_INDEX_DIR = os.getenv("POLICY_INDEX_DIR", os.path.join("data", "policy_index"))
+POLICY_INDEX_MAX_DOCS = int(os.getenv("POLICY_INDEX_MAX_DOCS", "500"))
+POLICY_INDEX_MAX_BYTES = int(os.getenv("POLICY_INDEX_MAX_BYTES", str(1024 * 1024 * 1024)))  # 1 GB
+EMBED_BATCH_SIZE = 64
+# "chroma" (HNSW collections) or "memmap" (brute-force quantized arrays, see memmap_index)
+POLICY_INDEX_BACKEND = os.getenv("POLICY_INDEX_BACKEND", "chroma").strip().lower()
+POLICY_EMBEDDING_BACKEND = os.getenv("POLICY_EMBEDDING_BACKEND", "default").strip().lower()
+
+# Chroma's bundled ONNX MiniLM model; matches what the in-memory client used before.
+DEFAULT_EMBEDDING_MODEL = "chroma-default-all-MiniLM-L6-v2"
+
+MANIFEST_FILE = "manifest.json"
+LOCK_DIR = ".locks"
+
+# Chunking variant of default (~3-sentence) audit chunks. Modules that reuse
+# audit vectors (evidence index, regulation recommender) look documents up
+# under this variant, so RAG builds its namespaces with the same constant.
+AUDIT_CHUNK_VARIANT = "seg3-loc"
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Stream a file from disk and return the hex SHA-256 of its bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive inter-process lock on path (created if missing); a no-op without fcntl."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def get_embedding_function():
+    """
+    Return (embedding_function, model_name) used for policy chunks.
+    POLICY_EMBEDDING_BACKEND=sbert routes embeddings through the shared
+    micro-batching service instead of Chroma's bundled model;
+    POLICY_EMBEDDING_BACKEND=hashing uses model-free hashed TF-IDF vectors.
+    """
+    if POLICY_EMBEDDING_BACKEND == "hashing":
+        from src.core.hashing_embeddings import get_hashing_embedder
+        embedder = get_hashing_embedder()
+        return embedder, embedder.model_name
+    if POLICY_EMBEDDING_BACKEND == "sbert":
+        from src.core.embedding_service import get_embedding_service, DEFAULT_SBERT_MODEL
+        return get_embedding_service(DEFAULT_SBERT_MODEL), f"sbert-{DEFAULT_SBERT_MODEL}"
+    return embedding_functions.DefaultEmbeddingFunction(), DEFAULT_EMBEDDING_MODEL
+
+
+class PolicyIndex:
+    """Content-hash-keyed, LRU-bounded store of per-document Chroma collections."""
+
+    backend = "chroma"
+
+    def __init__(
+        self,
+        persist_dir: str = POLICY_INDEX_DIR,
+        max_docs: int = POLICY_INDEX_MAX_DOCS,
+        max_bytes: int = POLICY_INDEX_MAX_BYTES,
+        embedding_function=None,
+        embedding_model: Optional[str] = None,
+    ):
+        self.persist_dir = os.path.abspath(persist_dir)
+        os.makedirs(self.persist_dir, exist_ok=True)
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+
+        if embedding_function is None:
+            embedding_function, default_model = get_embedding_function()
+            embedding_model = embedding_model or default_model
+        self.embedding_function = embedding_function
+        self.embedding_model = embedding_model or "custom"
+
+        self.client = self._make_client()
+        self.manifest_path = os.path.join(self.persist_dir, MANIFEST_FILE)
+        self._lock = threading.RLock()
+        self._build_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._manifest = self._load_manifest()
+        # Entries this process changed or dropped since the last save, merged into
+        # the file on save so workers sharing persist_dir keep each other's entries
+        self._dirty: set = set()
+        self._dropped: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Manifest helpers
+    # ------------------------------------------------------------------
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning("Policy index manifest unreadable, starting fresh: %s", e)
+            return {}
+
+    def _merged_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """The manifest on disk with this process's pending changes and drops applied."""
+        merged = self._load_manifest()
+        for name, dropped_at in self._dropped.items():
+            if merged.get(name, {}).get("created_at", 0) <= dropped_at:
+                merged.pop(name, None)
+        for name in self._dirty:
+            if name in self._manifest:
+                merged[name] = self._manifest[name]
+        return merged
+
+    def _lock_path(self, name: str) -> str:
+        return os.path.join(self.persist_dir, LOCK_DIR, f"{name}.lock")
+
+    def _reload_manifest(self) -> None:
+        with _file_lock(self._lock_path(MANIFEST_FILE)):
+            self._manifest = self._merged_manifest()
+
+    def _save_manifest(self) -> None:
+        # Held across read-merge-write so a concurrent worker's save is not lost
+        with _file_lock(self._lock_path(MANIFEST_FILE)):
+            self._manifest = self._merged_manifest()
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        self._dirty.clear()
+        self._dropped.clear()
+
+    @contextmanager
+    def _building(self, name: str):
+        """Serialize builds of one namespace across threads and processes; the lock entry is released when unused."""
+        with self._lock:
+            lock, users = self._build_locks.get(name, (threading.Lock(), 0))
+            self._build_locks[name] = (lock, users + 1)
+        try:
+            with lock, _file_lock(self._lock_path(name)):
+                yield
+        finally:
+            with self._lock:
+                lock, users = self._build_locks[name]
+                if users <= 1:
+                    del self._build_locks[name]
+                else:
+                    self._build_locks[name] = (lock, users - 1)
+
+    def namespace_for(self, doc_hash: str, namespace: str = "policies", variant: str = "") -> str:
+        """
+        Chroma collection name for a document.
+        Includes the embedding model and chunking variant so vectors from
+        different configurations never mix. Chroma caps names at 63 chars.
+        """
+        key = hashlib.sha256(f"{doc_hash}|{self.embedding_model}|{variant}".encode("utf-8")).hexdigest()
+        return f"{namespace[:20]}_{key[:40]}"
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get_or_build(
+        self,
+        doc_hash: str,
+        build_chunks: Callable[[], List[str]],
+        namespace: str = "policies",
+        variant: str = "",
+        reuse_from: Optional[str] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Return (collection, reused).
+
+        If the document is already indexed, the stored collection is returned
+        and build_chunks is never called. Otherwise build_chunks() is invoked,
+        the chunks are embedded in batches and written to a new namespace.
+
+        build_chunks may return plain strings or dicts with a "text" key; any
+        other keys of a dict (page, char offsets, hash...) become the chunk's
+        metadata next to its "chunk" position.
+
+        reuse_from: doc hash of a previous version of the same document. Chunks
+        whose chunk_hash is already indexed there reuse the stored vector, so
+        only new or changed chunks are embedded.
+        """
+        name = self.namespace_for(doc_hash, namespace, variant)
+
+        # A concurrent caller building the same document waits here and then
+        # reuses the finished collection instead of dropping and rewriting it.
+        with self._building(name):
+            with self._lock:
+                self._reload_manifest()
+                entry = self._manifest.get(name)
+                if entry is not None:
+                    try:
+                        collection = self._open_collection(name)
+                        if collection.count() == entry.get("chunks", -1):
+                            entry["last_used"] = time.time()
+                            entry["hits"] = entry.get("hits", 0) + 1
+                            self._dirty.add(name)
+                            self._save_manifest()
+                            return collection, True
+                    except Exception:
+                        pass
+                # Missing, stale or partially written: clear leftovers before building
+                self._drop(name)
+
+            items = build_chunks() or []
+            chunks = [c["text"] if isinstance(c, dict) else c for c in items]
+            metadatas = [
+                {"chunk": i, **({k: v for k, v in c.items() if k != "text"} if isinstance(c, dict) else {})}
+                for i, c in enumerate(items)
+            ]
+            reusable = self.vectors_for(reuse_from, namespace, variant) if reuse_from else {}
+            embeddings: List[Optional[List[float]]] = [reusable.get(m.get("chunk_hash")) for m in metadatas]
+            missing = [i for i, v in enumerate(embeddings) if v is None]
+            for i, vec in zip(missing, self.embed([chunks[i] for i in missing])):
+                embeddings[i] = vec
+            reused_vectors = len(chunks) - len(missing)
+
+            with self._lock:
+                collection = self._write_collection(name, doc_hash, variant, chunks, embeddings, metadatas)
+
+                dim = len(embeddings[0]) if embeddings else 0
+                self._manifest[name] = {
+                    "doc_hash": doc_hash,
+                    "embedding_model": self.embedding_model,
+                    "variant": variant,
+                    "chunks": len(chunks),
+                    "bytes": sum(len(c.encode("utf-8")) for c in chunks) + len(chunks) * dim * 4,
+                    "created_at": time.time(),
+                    "last_used": time.time(),
+                    "hits": 0,
+                    "reused_vectors": reused_vectors,
+                    "previous_doc_hash": reuse_from,
+                }
+                self._dirty.add(name)
+                self._evict(keep=name)
+                self._save_manifest()
+
+        print(f"Indexed {len(chunks)} chunks for document {doc_hash[:12]} into '{name}' "
+              f"({reused_vectors} vectors reused, {len(missing)} embedded).")
+        return collection, False
+
+    def embed(self, chunks: List[str]) -> List[List[float]]:
+        """Embed texts with the index's embedding function, in token-balanced batches."""
+        vectors: List[List[float]] = []
+        for batch in token_batches(chunks, max_batch_size=EMBED_BATCH_SIZE):
+            vectors.extend([list(map(float, v)) for v in self.embedding_function(batch)])
+        return vectors
+
+    def vectors_for(self, doc_hash: str, namespace: str = "policies",
+                    variant: str = AUDIT_CHUNK_VARIANT) -> Dict[str, List[float]]:
+        """{chunk_hash: vector} from an indexed document, or {} if it is not indexed."""
+        name = self.namespace_for(doc_hash, namespace, variant)
+        with self._lock:
+            if name not in self._manifest:
+                # may have been built by another worker since our last read
+                self._reload_manifest()
+                if name not in self._manifest:
+                    return {}
+        try:
+            stored = self._open_collection(name).get(include=["embeddings", "metadatas"])
+        except Exception as e:
+            logger.warning("Could not read indexed vectors %s: %s", name, e)
+            return {}
+        embeddings = stored.get("embeddings")
+        if embeddings is None:  # may be a numpy array, so no truthiness test
+            embeddings = []
+        vectors = {}
+        for meta, vec in zip(stored.get("metadatas") or [], embeddings):
+            if meta and meta.get("chunk_hash"):
+                vectors[meta["chunk_hash"]] = [float(x) for x in vec]
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._manifest),
+                "bytes": sum(e.get("bytes", 0) for e in self._manifest.values()),
+                "chunks": sum(e.get("chunks", 0) for e in self._manifest.values()),
+                "max_docs": self.max_docs,
+                "max_bytes": self.max_bytes,
+                "embedding_model": self.embedding_model,
+                "backend": self.backend,
+            }
+
+    # ------------------------------------------------------------------
+    # Storage hooks (overridden by alternative backends)
+    # ------------------------------------------------------------------
+    def _make_client(self):
+        return chromadb.PersistentClient(path=self.persist_dir)
+
+    def _open_collection(self, name: str):
+        return self.client.get_collection(name=name, embedding_function=self.embedding_function)
+
+    def _write_collection(self, name: str, doc_hash: str, variant: str, chunks: List[str],
+                          embeddings: List[List[float]], metadatas: List[Dict[str, Any]]):
+        collection = self.client.create_collection(
+            name=name,
+            embedding_function=self.embedding_function,
+            metadata={
+                "hnsw:space": "cosine",
+                "doc_hash": doc_hash,
+                "embedding_model": self.embedding_model,
+                "variant": variant,
+            },
+        )
+        if chunks:
+            collection.add(
+                ids=[f"{doc_hash[:16]}-{i}" for i in range(len(chunks))],
+                documents=chunks,
+                embeddings=embeddings,
+                metadatas=metadatas,
+            )
+        return collection
+
+    def _delete_collection(self, name: str) -> None:
+        self.client.delete_collection(name=name)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _drop(self, name: str) -> None:
+        try:
+            self._delete_collection(name)
+        except Exception:
+            pass
+        self._manifest.pop(name, None)
+        self._dirty.discard(name)
+        self._dropped[name] = time.time()
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used namespaces until both budgets are met."""
+        def over_budget():
+            total = sum(e.get("bytes", 0) for e in self._manifest.values())
+            return len(self._manifest) > self.max_docs or total > self.max_bytes
+
+        candidates = sorted(
+            (n for n in self._manifest if n != keep),
+            key=lambda n: self._manifest[n].get("last_used", 0),
+        )
+        for name in candidates:
+            if not over_budget():
+                break
+            print(f"Evicting cold policy namespace '{name}' from index.")
+            self._drop(name)
+
+
+_DEFAULT_INDEX: Optional[PolicyIndex] = None
+_DEFAULT_INDEX_LOCK = threading.Lock()
+
+
+def get_policy_index() -> PolicyIndex:
+    """Process-wide PolicyIndex (one PersistentClient per worker)."""
+    global _DEFAULT_INDEX
+    with _DEFAULT_INDEX_LOCK:
+        if _DEFAULT_INDEX is None:
+            if POLICY_INDEX_BACKEND == "memmap":
+                from src.core.memmap_index import MemmapPolicyIndex
+                _DEFAULT_INDEX = MemmapPolicyIndex()
+            else:
+                _DEFAULT_INDEX = PolicyIndex()
+        return _DEFAULT_INDEX
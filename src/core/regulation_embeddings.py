@@ -0,0 +1,185 @@
+# src/core/regulation_embeddings.py
+"""
+Precomputed regulation embeddings.
+
+Each requirement text is embedded once per embedding model and stored in
+the regulation_embeddings table, keyed by a hash of the normalized text.
+Embeddings are computed when a regulation enters a workspace (import,
+toggle, Michigan toggle); audits then read the stored vectors instead of
+embedding requirement texts on the hot path.
+
+The vectors must live in the same space as the policy chunks, so they are
+always produced with the policy index's embedding function.
+"""
+import hashlib
+import threading
+import traceback
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+EMBED_BATCH_SIZE = 64
+
+
+def requirement_text_for(reg) -> str:
+    """Requirement text the RAG audit queries with for a WorkspaceRegulation row."""
+    return reg.description or reg.name or ""
+
+
+def regulation_text_hash(text: str) -> str:
+    normalized = " ".join((text or "").split()).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _index():
+    from src.core.policy_index import get_policy_index
+    return get_policy_index()
+
+
+def load_regulation_embeddings(db, texts: Iterable[str], index=None) -> Dict[str, List[float]]:
+    """Stored vectors for the current model, as {text_hash: vector}. Missing texts are omitted."""
+    from src.api.models import RegulationEmbedding
+
+    index = index or _index()
+    hashes = sorted({regulation_text_hash(t) for t in texts if t})
+    if not hashes:
+        return {}
+
+    rows = (
+        db.query(RegulationEmbedding)
+        .filter(
+            RegulationEmbedding.model_name == index.embedding_model,
+            RegulationEmbedding.text_hash.in_(hashes),
+        )
+        .all()
+    )
+    return {
+        r.text_hash: np.frombuffer(r.vector, dtype=np.float32).tolist()
+        for r in rows
+        if r.vector
+    }
+
+
+def _stored_hashes(db, hashes: List[str], model_name: str) -> set:
+    from src.api.models import RegulationEmbedding
+
+    return {
+        h for (h,) in db.query(RegulationEmbedding.text_hash)
+        .filter(
+            RegulationEmbedding.model_name == model_name,
+            RegulationEmbedding.text_hash.in_(hashes),
+        )
+        .all()
+    }
+
+
+def ensure_regulation_embeddings(db, texts: Iterable[str], index=None) -> int:
+    """
+    Embed and store any texts that have no vector for the current model yet.
+    Returns the number of new embeddings written.
+
+    Runs may overlap (startup rebuild, workspace toggles); if another run
+    stores some of the same texts first, the batch is rolled back and only
+    the rows still missing are written.
+    """
+    from sqlalchemy.exc import IntegrityError
+    from src.api.models import RegulationEmbedding
+
+    index = index or _index()
+    by_hash: Dict[str, str] = {}
+    for t in texts:
+        if t and t.strip():
+            by_hash.setdefault(regulation_text_hash(t), t)
+    if not by_hash:
+        return 0
+
+    existing = _stored_hashes(db, list(by_hash), index.embedding_model)
+    missing = [(h, t) for h, t in by_hash.items() if h not in existing]
+    if not missing:
+        return 0
+
+    def rows(vectors):
+        return [
+            RegulationEmbedding(
+                text_hash=h,
+                model_name=index.embedding_model,
+                dim=int(arr.shape[0]),
+                vector=arr.tobytes(),
+            )
+            for h, arr in vectors
+        ]
+
+    written = 0
+    for i in range(0, len(missing), EMBED_BATCH_SIZE):
+        batch = missing[i:i + EMBED_BATCH_SIZE]
+        vectors = [
+            (h, np.asarray(vec, dtype=np.float32))
+            for (h, _), vec in zip(batch, index.embedding_function([t for _, t in batch]))
+        ]
+        try:
+            db.add_all(rows(vectors))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            stored = _stored_hashes(db, [h for h, _ in vectors], index.embedding_model)
+            vectors = [(h, arr) for h, arr in vectors if h not in stored]
+            if vectors:
+                db.add_all(rows(vectors))
+                db.commit()
+        written += len(vectors)
+    return written
+
+
+def rebuild_regulation_embeddings(db, index=None, prune: bool = True) -> Dict[str, int]:
+    """
+    Bulk (re)build embeddings for every workspace regulation under the
+    current model. Run on startup so a model change re-embeds the whole
+    workspace in batches; rows for other models are pruned.
+    """
+    from src.api.models import RegulationEmbedding, WorkspaceRegulation
+
+    index = index or _index()
+    regs = (
+        db.query(WorkspaceRegulation)
+        .filter(WorkspaceRegulation.workspace_status != "removed")
+        .all()
+    )
+    written = ensure_regulation_embeddings(db, [requirement_text_for(r) for r in regs], index=index)
+
+    pruned = 0
+    if prune:
+        pruned = (
+            db.query(RegulationEmbedding)
+            .filter(RegulationEmbedding.model_name != index.embedding_model)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+
+    return {"regulations": len(regs), "embedded": written, "pruned": pruned}
+
+
+def schedule_regulation_embeddings(texts: Iterable[str]) -> None:
+    """Embed texts on a daemon thread with its own DB session (non-blocking for request handlers)."""
+    texts = [t for t in texts if t]
+    if not texts:
+        return
+
+    def run():
+        from src.api.db import SessionLocal
+        db = SessionLocal()
+        try:
+            n = ensure_regulation_embeddings(db, texts)
+            if n:
+                print(f"[RegEmbeddings] Stored {n} new regulation embeddings.")
+        except Exception:
+            traceback.print_exc()
+        finally:
+            db.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def lookup_query_vectors(texts: List[str], stored: Optional[Dict[str, List[float]]]) -> List[Optional[List[float]]]:
+    """Align stored vectors with a list of query texts (None where not stored)."""
+    stored = stored or {}
+    return [stored.get(regulation_text_hash(t)) for t in texts]
@@ -0,0 +1,325 @@
+# src/core/regulation_recommender.py
+"""
+Semantic regulation recommender.
+
+One prebuilt Chroma (HNSW) index holds federal granules (federal_granules,
+with federal_fulltext when cached), eCFR sections (CFRLoader, titles 1-50)
+and cached Michigan rules, embedded with the policy index's embedding
+function so policy vectors can query it directly. A policy document is
+represented by the centroid of its indexed chunk vectors; a user profile
+by a short industry/department description. Either way recommendations
+come from a single ANN query.
+
+build_regulation_index runs offline (scripts/build_regulation_index.py)
+in batches. After every batch a checkpoint records how far each source
+unit ("federal", "cfr-<title>", "michigan") got, so an interrupted build
+resumes where it stopped instead of re-embedding the whole CFR. Ids are
+stable, so re-processing a batch only overwrites it.
+"""
+import os
+import json
+import glob
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import chromadb
+
+REG_INDEX_DIR = os.getenv("REG_INDEX_DIR", os.path.join("data", "regulation_index"))
+REG_INDEX_BATCH = int(os.getenv("REG_INDEX_BATCH", "256"))
+REG_TEXT_CHARS = 2000  # text embedded per regulation
+CHECKPOINT_FILE = "checkpoint.json"
+
+GRANULE_DIR = "federal_granules"
+FULLTEXT_DIR = "federal_fulltext"
+MICHIGAN_RULE_DIR = os.path.join("data", "state", "michigan", "rules")
+
+SOURCES = ("federal", "cfr", "michigan")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _policy_index():
+    from src.core.policy_index import get_policy_index
+    return get_policy_index()
+
+
+def _collection():
+    global _client
+    with _client_lock:
+        if _client is None:
+            os.makedirs(REG_INDEX_DIR, exist_ok=True)
+            _client = chromadb.PersistentClient(path=os.path.abspath(REG_INDEX_DIR))
+    model = _policy_index().embedding_model
+    key = hashlib.sha256(model.encode("utf-8")).hexdigest()[:16]
+    return _client.get_or_create_collection(name=f"regulations_{key}", metadata={"hnsw:space": "cosine"})
+
+
+# ----------------------------------------------------------------------
+# Corpora
+# ----------------------------------------------------------------------
+def _federal_items() -> Iterator[Dict[str, Any]]:
+    for path in sorted(glob.glob(os.path.join(GRANULE_DIR, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                granules = json.load(f)
+        except Exception as e:
+            print(f"[RegIndex] Skipping {path}: {e}")
+            continue
+        for g in granules:
+            gid = g.get("granuleId")
+            if not gid:
+                continue
+            text = " ".join(filter(None, [g.get("title"), g.get("summary"), g.get("details")]))
+            fulltext = os.path.join(FULLTEXT_DIR, f"{gid}.txt")
+            if os.path.exists(fulltext):
+                with open(fulltext, "r", errors="ignore") as f:
+                    text = f"{g.get('title') or ''} {f.read(REG_TEXT_CHARS)}"
+            yield {
+                "id": gid,
+                "source": "federal",
+                "title": g.get("title") or gid,
+                "text": text,
+                "package_id": os.path.splitext(os.path.basename(path))[0],
+            }
+
+
+def _cfr_items(title_number: int) -> Iterator[Dict[str, Any]]:
+    from src.core.regulations.cfr_loader import CFRLoader
+
+    try:
+        title = CFRLoader().load_title(title_number)
+    except FileNotFoundError:
+        return
+    if not title:
+        return
+    for chapter in title.get("chapters", []):
+        for part in chapter.get("parts", []):
+            for section in part.get("sections", []):
+                sid = section.get("id") or f"{title_number}-{section.get('section_number')}"
+                heading = section.get("heading_full") or section.get("heading") or ""
+                yield {
+                    "id": str(sid),
+                    "source": "cfr",
+                    "title": heading,
+                    "text": f"{heading} {' '.join(section.get('regulation_text', []))}",
+                    "cfr_title": title_number,
+                    "part_number": part.get("part_number"),
+                    "section_number": section.get("section_number"),
+                }
+
+
+def _michigan_items() -> Iterator[Dict[str, Any]]:
+    for path in sorted(glob.glob(os.path.join(MICHIGAN_RULE_DIR, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rule = json.load(f)
+        except Exception:
+            continue
+        rid = str(rule.get("id") or os.path.splitext(os.path.basename(path))[0])
+        title = rule.get("title") or rule.get("name") or f"Michigan Rule {rid}"
+        yield {
+            "id": rid,
+            "source": "michigan",
+            "title": title,
+            "text": f"{title} {rule.get('description') or rule.get('text') or ''}",
+        }
+
+
+def _units(sources: Iterable[str], cfr_titles: Iterable[int]):
+    """(unit name, item iterator factory) in build order."""
+    for source in sources:
+        if source == "federal":
+            yield "federal", _federal_items
+        elif source == "cfr":
+            for n in cfr_titles:
+                yield f"cfr-{n}", (lambda n=n: _cfr_items(n))
+        elif source == "michigan":
+            yield "michigan", _michigan_items
+
+
+# ----------------------------------------------------------------------
+# Offline build
+# ----------------------------------------------------------------------
+def _checkpoint_path() -> str:
+    return os.path.join(REG_INDEX_DIR, CHECKPOINT_FILE)
+
+
+def _load_checkpoint(model: str) -> Dict[str, Any]:
+    path = _checkpoint_path()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("model") == model:
+            return data
+    return {"model": model, "offsets": {}, "completed": []}
+
+
+def _save_checkpoint(data: Dict[str, Any]) -> None:
+    os.makedirs(REG_INDEX_DIR, exist_ok=True)
+    tmp = _checkpoint_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, _checkpoint_path())
+
+
+def build_regulation_index(
+    sources: Iterable[str] = SOURCES,
+    cfr_titles: Iterable[int] = range(1, 51),
+    batch_size: int = REG_INDEX_BATCH,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """Embed and index the corpora in checkpointed batches; resumes unless restart=True."""
+    index = _policy_index()
+    collection = _collection()
+    checkpoint = {"model": index.embedding_model, "offsets": {}, "completed": []} if restart \
+        else _load_checkpoint(index.embedding_model)
+
+    stats = {"units": 0, "skipped_units": 0, "indexed": 0}
+    for unit, items in _units(sources, cfr_titles):
+        if unit in checkpoint["completed"]:
+            stats["skipped_units"] += 1
+            continue
+        offset = int(checkpoint["offsets"].get(unit, 0))
+        position, batch = 0, []
+
+        def flush():
+            texts = [" ".join(it["text"].split())[:REG_TEXT_CHARS] for it in batch]
+            collection.upsert(
+                ids=[f"{it['source']}:{it['id']}" for it in batch],
+                embeddings=index.embed(texts),
+                documents=texts,
+                metadatas=[
+                    {k: v for k, v in it.items() if k != "text" and v is not None and not isinstance(v, (list, dict))}
+                    for it in batch
+                ],
+            )
+            checkpoint["offsets"][unit] = position
+            _save_checkpoint(checkpoint)
+
+        for item in items():
+            position += 1
+            if position <= offset or not item["text"].strip():
+                continue
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush()
+                stats["indexed"] += len(batch)
+                batch = []
+        if batch:
+            flush()
+            stats["indexed"] += len(batch)
+
+        checkpoint["completed"].append(unit)
+        checkpoint["offsets"][unit] = position
+        _save_checkpoint(checkpoint)
+        stats["units"] += 1
+        print(f"[RegIndex] {unit}: done ({position} items)")
+
+    stats["total"] = collection.count()
+    return stats
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+def _query(vector, top_n: int, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    collection = _collection()
+    total = collection.count()
+    if total == 0:
+        return []
+    where = None
+    if sources:
+        where = {"source": sources[0]} if len(sources) == 1 else {"source": {"$in": list(sources)}}
+    result = collection.query(
+        query_embeddings=[list(map(float, vector))],
+        n_results=min(int(top_n), total),
+        where=where,
+        include=["documents", "distances", "metadatas"],
+    )
+    recs = []
+    for rid, doc, dist, meta in zip(result["ids"][0], result["documents"][0],
+                                    result["distances"][0], result["metadatas"][0]):
+        meta = dict(meta or {})
+        recs.append({
+            "regulation_id": meta.get("id") or rid.split(":", 1)[-1],
+            "source": meta.get("source"),
+            "title": meta.get("title"),
+            "score": round((1.0 - float(dist)) * 100, 2),
+            "text": doc,
+            "meta": meta,
+        })
+    return recs
+
+
+def policy_vector(doc_hash: str, pdf_path: Optional[str] = None) -> Optional[np.ndarray]:
+    """
+    Centroid of a policy's chunk vectors, from its audit index when present,
+    otherwise by embedding its chunks (requires pdf_path).
+    """
+    index = _policy_index()
+    vectors = list(index.vectors_for(doc_hash).values())
+    if not vectors and pdf_path:
+        from src.core.RAG import chunk_text_with_spans
+        from src.core.text_artifacts import get_text_artifact
+        chunks = [c["text"] for c in chunk_text_with_spans(get_text_artifact(pdf_path, doc_hash).text)]
+        vectors = index.embed(chunks) if chunks else []
+    if not vectors:
+        return None
+    mat = np.asarray(vectors, dtype=np.float32)
+    mat /= np.maximum(np.linalg.norm(mat, axis=1, keepdims=True), 1e-12)
+    centroid = mat.mean(axis=0)
+    return centroid / max(float(np.linalg.norm(centroid)), 1e-12)
+
+
+def recommend_for_policy(doc_hash: str, pdf_path: Optional[str] = None, top_n: int = 20,
+                         sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    vector = policy_vector(doc_hash, pdf_path)
+    return _query(vector, top_n, sources) if vector is not None else []
+
+
+def recommend_for_profile(industry: Optional[str], departments: Optional[List[str]] = None,
+                          top_n: int = 20, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    profile = f"Compliance regulations for the {industry or 'general'} industry"
+    if departments:
+        profile += f" covering {', '.join(departments)} departments"
+    return _query(_policy_index().embed([profile])[0], top_n, sources)
+
+
+def apply_recommendations(db, user_uid: str, recs: List[Dict[str, Any]]) -> int:
+    """
+    Set WorkspaceRegulation.recommended for recommended regulations. Ones not
+    yet in the workspace are added as "removed" (visible, not audited) so
+    the user can toggle them in.
+    """
+    from src.api.models import WorkspaceRegulation
+
+    ids = [r["regulation_id"] for r in recs]
+    existing = {
+        r.regulation_id: r for r in db.query(WorkspaceRegulation).filter(
+            WorkspaceRegulation.user_uid == user_uid,
+            WorkspaceRegulation.regulation_id.in_(ids),
+        )
+    }
+    for rec in recs:
+        item = existing.get(rec["regulation_id"])
+        if item is None:
+            meta = rec.get("meta") or {}
+            item = WorkspaceRegulation(
+                regulation_id=rec["regulation_id"],
+                user_uid=user_uid,
+                workspace_status="removed",
+                name=rec.get("title"),
+                region="Michigan" if rec.get("source") == "michigan" else "Federal",
+                category={"cfr": "CFR", "federal": "Federal Register", "michigan": "State"}.get(rec.get("source")),
+                code=str(meta.get("section_number") or "") or None,
+                description=(rec.get("text") or "")[:1000] or None,
+                source=rec.get("source"),
+            )
+            db.add(item)
+            existing[rec["regulation_id"]] = item
+        item.recommended = True
+    db.commit()
+    return len(recs)
@@ -5,6 +5,7 @@ import json
 import requests
 from typing import List, Dict
 from src.core.regulations.gov_reg.package_cache import get_cached_packages
+from src.core.regulations.gov_reg.granule_index import build_granule_index
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -78,6 +79,11 @@ def refresh_granule_cache():
 
         fetch_granules_for_package(package_id, granules_link)
 
+    try:
+        build_granule_index()
+    except Exception as e:
+        print(f"[Granules] Could not update granule index: {e}")
+
     # print("[Granules] Granule cache refresh complete.")
 
 if __name__ == "__main__":
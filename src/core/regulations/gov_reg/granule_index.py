@@ -0,0 +1,182 @@
+# src/core/regulations/gov_reg/granule_index.py
+"""
+Persistent full-text index over the cached Federal Register granules.
+
+Granules are stored in a SQLite database with an FTS5 table over title,
+summary, details and agency names, so a topic search is one ranked (BM25)
+index lookup instead of re-reading every package JSON. Agency and type
+filters and pagination run in the same query.
+
+refresh_granule_cache() calls build_granule_index() after downloading;
+it re-indexes only packages whose granule file changed and drops packages
+that are no longer cached. The first search in a process builds the index
+if it does not exist yet.
+"""
+import os
+import re
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.core.regulations.gov_reg.local_search import (
+    PROJECT_ROOT,
+    GRANULE_DIR,
+    get_package_ids,
+    load_granules_for_package,
+)
+
+GRANULE_INDEX_DB = os.getenv("GRANULE_INDEX_DB", os.path.join(PROJECT_ROOT, "data", "granule_index.db"))
+
+# BM25 column weights: title, summary, details, agencies
+BM25_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+_TERM_RE = re.compile(r"\w+")
+_build_lock = threading.Lock()
+_checked = False
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    package_id TEXT PRIMARY KEY,
+    mtime REAL,
+    granule_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS granules (
+    id INTEGER PRIMARY KEY,
+    granule_id TEXT,
+    package_id TEXT,
+    gtype TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_granules_package ON granules (package_id);
+CREATE INDEX IF NOT EXISTS ix_granules_type ON granules (gtype);
+CREATE VIRTUAL TABLE IF NOT EXISTS granules_fts USING fts5(
+    title, summary, details, agencies, tokenize = 'porter unicode61'
+);
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(GRANULE_INDEX_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(GRANULE_INDEX_DB, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _granule_type(g: Dict[str, Any]) -> Optional[str]:
+    return g.get("type") or g.get("granuleClass")
+
+
+def _drop_package(conn: sqlite3.Connection, package_id: str) -> None:
+    conn.execute(
+        "DELETE FROM granules_fts WHERE rowid IN (SELECT id FROM granules WHERE package_id = ?)",
+        (package_id,),
+    )
+    conn.execute("DELETE FROM granules WHERE package_id = ?", (package_id,))
+    conn.execute("DELETE FROM packages WHERE package_id = ?", (package_id,))
+
+
+def _index_package(conn: sqlite3.Connection, package_id: str, granules: List[Dict[str, Any]], mtime: float) -> None:
+    _drop_package(conn, package_id)
+    for g in granules:
+        cur = conn.execute(
+            "INSERT INTO granules (granule_id, package_id, gtype, data) VALUES (?, ?, ?, ?)",
+            (g.get("granuleId"), package_id, _granule_type(g), json.dumps(g)),
+        )
+        conn.execute(
+            "INSERT INTO granules_fts (rowid, title, summary, details, agencies) VALUES (?, ?, ?, ?, ?)",
+            (
+                cur.lastrowid,
+                g.get("title") or "",
+                g.get("summary") or "",
+                g.get("details") or "",
+                " ; ".join(g.get("agencyNames") or []),
+            ),
+        )
+    conn.execute(
+        "INSERT INTO packages (package_id, mtime, granule_count) VALUES (?, ?, ?)",
+        (package_id, mtime, len(granules)),
+    )
+
+
+def build_granule_index(force: bool = False) -> Dict[str, int]:
+    """
+    Sync the index with the cached packages: (re)index packages whose
+    granule file changed since it was indexed and drop packages no longer
+    cached.
+    """
+    global _checked
+    with _build_lock:
+        conn = _connect()
+        try:
+            indexed = dict(conn.execute("SELECT package_id, mtime FROM packages").fetchall())
+            current = get_package_ids()
+
+            stats = {"packages": len(current), "indexed": 0, "unchanged": 0, "dropped": 0}
+            for package_id in set(indexed) - set(current):
+                _drop_package(conn, package_id)
+                stats["dropped"] += 1
+
+            for package_id in current:
+                path = os.path.join(GRANULE_DIR, f"{package_id}.json")
+                if not os.path.exists(path):
+                    continue
+                mtime = os.path.getmtime(path)
+                if not force and indexed.get(package_id) == mtime:
+                    stats["unchanged"] += 1
+                    continue
+                _index_package(conn, package_id, load_granules_for_package(package_id), mtime)
+                stats["indexed"] += 1
+            conn.commit()
+        finally:
+            conn.close()
+        _checked = True
+    print(f"[GranuleIndex] {stats}")
+    return stats
+
+
+def _fts_query(topic: str) -> Optional[str]:
+    """Every term must match (as a prefix, like the old substring search); quoted so user input is never FTS syntax."""
+    terms = _TERM_RE.findall((topic or "").lower())
+    return " ".join(f'"{t}"*' for t in terms) if terms else None
+
+
+def search_granule_index(
+    topic: str,
+    agency: Optional[str] = None,
+    granule_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """Ranked granules matching all terms of topic: {"total": int, "results": [granule, ...]}."""
+    if not _checked and not os.path.exists(GRANULE_INDEX_DB):
+        build_granule_index()
+
+    match = _fts_query(topic)
+    if match is None:
+        return {"total": 0, "results": []}
+    if agency:
+        agency_terms = _TERM_RE.findall(agency.lower())
+        if agency_terms:
+            match += ' AND agencies : "' + " ".join(agency_terms) + '"'
+
+    where = "granules_fts MATCH ?"
+    params: List[Any] = [match]
+    if granule_type:
+        where += " AND lower(g.gtype) = ?"
+        params.append(granule_type.lower())
+
+    conn = _connect()
+    try:
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM granules_fts JOIN granules g ON g.id = granules_fts.rowid WHERE {where}",
+            params,
+        ).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT g.data FROM granules_fts JOIN granules g ON g.id = granules_fts.rowid WHERE {where} "
+            f"ORDER BY bm25(granules_fts, {', '.join(map(str, BM25_WEIGHTS))}) LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else int(limit), max(0, int(offset))],
+        ).fetchall()
+    finally:
+        conn.close()
+    return {"total": total, "results": [json.loads(r[0]) for r in rows]}
@@ -1,5 +1,6 @@
 import os
 import json
+import sqlite3
 from typing import List, Dict
 
 PROJECT_ROOT = os.path.abspath(
@@ -110,7 +111,8 @@ def search_granules_in_package(package_id: str, topic: str):
     return results
 
 
-def search_local_granules(topic: str):
+def _scan_granules(topic: str, agency=None, granule_type=None):
+    """Substring scan over every cached package; used when SQLite has no FTS5."""
     topic = topic.lower().strip()
 
     results = []
@@ -122,6 +124,30 @@ def search_local_granules(topic: str):
             if (topic in g.get("title", "").lower()
                 or topic in g.get("summary", "").lower()
                 or topic in g.get("details", "").lower()):
+                if agency and not any(agency.lower() in a.lower() for a in g.get("agencyNames") or []):
+                    continue
+                if granule_type and (g.get("type") or g.get("granuleClass") or "").lower() != granule_type.lower():
+                    continue
                 results.append(g)
 
     return results
+
+
+def search_local_granules_page(topic: str, agency=None, granule_type=None, limit=None, offset: int = 0):
+    """
+    Ranked search over the granule index: {"total": int, "results": [...]}.
+    Every term of topic must match; agency / granule_type filter the results.
+    """
+    from src.core.regulations.gov_reg.granule_index import search_granule_index
+
+    try:
+        return search_granule_index(topic, agency=agency, granule_type=granule_type, limit=limit, offset=offset)
+    except sqlite3.OperationalError as e:
+        print("[local_search] Granule index unavailable, scanning packages:", e)
+        results = _scan_granules(topic, agency, granule_type)
+        end = None if limit is None else offset + limit
+        return {"total": len(results), "results": results[offset:end]}
+
+
+def search_local_granules(topic: str, agency=None, granule_type=None, limit=None, offset: int = 0):
+    return search_local_granules_page(topic, agency, granule_type, limit, offset)["results"]
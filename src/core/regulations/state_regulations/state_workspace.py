@@ -4,6 +4,8 @@ from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 
 from src.api.models import WorkspaceRegulation  # adjust import if path differs
+from src.core.regulation_embeddings import requirement_text_for, schedule_regulation_embeddings
+from src.core.compliance_matrix import schedule_matrix_update
 from .michigan_storage import search_local_michigan, load_michigan_rule
 
 
@@ -68,6 +70,9 @@ def toggle_michigan_for_user(
         item.workspace_status = "removed" if item.workspace_status == "added" else "added"
         db.commit()
         db.refresh(item)
+        if item.workspace_status == "added":
+            schedule_regulation_embeddings([requirement_text_for(item)])
+        schedule_matrix_update(user_uid, regulation_ids=[regulation_id])
         return item
 
     # 2. No existing row → create new one from local cache
@@ -83,6 +88,7 @@ def toggle_michigan_for_user(
         db.add(item)
         db.commit()
         db.refresh(item)
+        schedule_matrix_update(user_uid, regulation_ids=[regulation_id])
         return item
 
     # Map fields from stored JSON into model
@@ -106,6 +112,8 @@ def toggle_michigan_for_user(
     db.add(item)
     db.commit()
     db.refresh(item)
+    schedule_regulation_embeddings([requirement_text_for(item)])
+    schedule_matrix_update(user_uid, regulation_ids=[regulation_id])
     return item
 
 
@@ -0,0 +1,149 @@
+# src/core/result_store.py
+"""
+SQL store of per-regulation RAG audit results, keyed by document content
+hash, regulation text hash and scoring configuration.
+
+Re-auditing the same document only scores regulations with no stored (or a
+stale) result under the same configuration; the rest are assembled from
+here and marked "Reused". When a revised policy is audited, results of the previous version are
+loaded from here. Regulations whose retrieved evidence chunks are unchanged
+(same chunk hashes, same order) carry their previous results forward,
+including the LLM narrative, instead of being regenerated.
+
+Each (document, regulation text, configuration) key holds a single row,
+overwritten by the latest audit.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.core.regulation_embeddings import regulation_text_hash
+
+
+def threshold_key(threshold: float) -> str:
+    return f"{float(threshold):.4f}"
+
+
+def evidence_hashes(results: List[Dict[str, Any]]) -> str:
+    """Comma-joined evidence chunk hashes of one regulation's results, best first."""
+    return ",".join(
+        (r.get("Evidence_Location") or {}).get("chunk_hash") or "" for r in results
+    )
+
+
+def save_audit_results(
+    db,
+    doc_hash: str,
+    regulations: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    threshold: float,
+    top_k: int,
+    embedding_model: str,
+    user_uid: Optional[str] = None,
+    file_id: Optional[str] = None,
+) -> int:
+    """
+    Store one row per regulation, replacing any row already stored for the
+    same (doc_hash, reg_text_hash, embedding_model, threshold, top_k) key.
+    Returns the number of rows written.
+    """
+    from sqlalchemy.exc import IntegrityError
+
+    try:
+        return _upsert_audit_results(db, doc_hash, regulations, results, threshold, top_k,
+                                     embedding_model, user_uid, file_id)
+    except IntegrityError:
+        # A concurrent save inserted the same keys first; update those rows instead
+        db.rollback()
+        return _upsert_audit_results(db, doc_hash, regulations, results, threshold, top_k,
+                                     embedding_model, user_uid, file_id)
+
+
+def _upsert_audit_results(db, doc_hash, regulations, results, threshold, top_k,
+                          embedding_model, user_uid, file_id) -> int:
+    from src.api.models import AuditResultRecord
+
+    by_reg: Dict[str, List[Dict[str, Any]]] = {}
+    for r in results:
+        by_reg.setdefault(r.get("Reg_ID"), []).append(r)
+
+    rows: Dict[str, Dict[str, Any]] = {}
+    for reg in regulations:
+        reg_results = by_reg.get(reg.get("Reg_ID"))
+        if reg_results:
+            text_hash = regulation_text_hash(reg.get("Requirement_Text", "") or "")
+            rows[text_hash] = {"reg_id": reg.get("Reg_ID"), "results": reg_results}
+    if not rows:
+        return 0
+
+    existing: Dict[str, Any] = {}
+    stale = (
+        db.query(AuditResultRecord)
+        .filter(
+            AuditResultRecord.doc_hash == doc_hash,
+            AuditResultRecord.embedding_model == embedding_model,
+            AuditResultRecord.threshold == threshold_key(threshold),
+            AuditResultRecord.top_k == int(top_k),
+            AuditResultRecord.reg_text_hash.in_(list(rows)),
+        )
+        .order_by(AuditResultRecord.created_at.desc())
+        .all()
+    )
+    for record in stale:
+        # keep the newest row per key (tables created before the unique key may hold several)
+        if record.reg_text_hash in existing:
+            db.delete(record)
+        else:
+            existing[record.reg_text_hash] = record
+
+    for text_hash, row in rows.items():
+        record = existing.get(text_hash)
+        if record is None:
+            record = AuditResultRecord(
+                doc_hash=doc_hash,
+                reg_text_hash=text_hash,
+                embedding_model=embedding_model,
+                threshold=threshold_key(threshold),
+                top_k=int(top_k),
+            )
+            db.add(record)
+        record.user_uid = user_uid
+        record.file_id = file_id
+        record.reg_id = row["reg_id"]
+        record.evidence_hashes = evidence_hashes(row["results"])
+        record.results = row["results"]
+        record.created_at = datetime.utcnow()
+    db.commit()
+    return len(rows)
+
+
+def load_audit_results(
+    db,
+    doc_hash: Optional[str],
+    threshold: float,
+    top_k: int,
+    embedding_model: str,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest stored results for a document under one scoring configuration:
+    {reg_text_hash: {"evidence_hashes": str, "results": [...]}}.
+    """
+    from src.api.models import AuditResultRecord
+
+    if not doc_hash:
+        return {}
+    rows = (
+        db.query(AuditResultRecord)
+        .filter(
+            AuditResultRecord.doc_hash == doc_hash,
+            AuditResultRecord.embedding_model == embedding_model,
+            AuditResultRecord.threshold == threshold_key(threshold),
+            AuditResultRecord.top_k == int(top_k),
+        )
+        .order_by(AuditResultRecord.created_at.asc())
+        .all()
+    )
+    # later rows overwrite earlier ones
+    return {
+        r.reg_text_hash: {"evidence_hashes": r.evidence_hashes or "", "results": r.results or []}
+        for r in rows
+    }
@@ -0,0 +1,116 @@
+# src/core/segmentation.py
+"""
+Shared sentence segmentation.
+
+One precompiled, abbreviation-aware splitter used by RAG chunking, the
+SBERT compliance checker and obligation extraction. It returns sentence
+character offsets (start, end) into the original text, so callers can
+slice sentences, group them into chunks or map them back to pages without
+running their own regex pass.
+
+Offsets are cached per (text hash, options), so repeated passes over the
+same large regulation or policy reuse the first segmentation.
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+SEGMENT_CACHE_SIZE = int(os.getenv("SEGMENT_CACHE_SIZE", "64"))
+
+# Candidate boundary: terminator, optional closing quotes/brackets, whitespace
+_BOUNDARY_RE = re.compile(r'([.?!;])["\')\]]*\s+')
+_PREV_WORD_RE = re.compile(r'([A-Za-z][A-Za-z.]*)$')
+
+# Tokens that end with a period without ending the sentence (compared lowercased, without the final ".")
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt",
+    "inc", "ltd", "co", "corp", "llc", "plc", "dept", "univ", "assn",
+    "no", "nos", "sec", "secs", "art", "arts", "para", "paras", "pt", "pts",
+    "ch", "cl", "subpt", "fig", "figs", "vol", "vols", "ed", "rev", "approx", "est",
+    "e.g", "i.e", "etc", "vs", "viz", "cf", "al", "et al",
+    "u.s", "u.s.c", "c.f.r", "fed", "reg", "regs", "stat", "pub", "l",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+})
+
+Span = Tuple[int, int]
+
+_CACHE: "OrderedDict[Tuple[str, bool], List[Span]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _is_boundary(text: str, term_pos: int, next_pos: int) -> bool:
+    """Decide whether the terminator at term_pos really ends a sentence."""
+    # Never split before a lowercase continuation ("approx. five", "U.S. law")
+    if next_pos < len(text) and text[next_pos].islower():
+        return False
+    if text[term_pos] != ".":
+        return True
+
+    m = _PREV_WORD_RE.search(text, max(0, term_pos - 20), term_pos)
+    if not m:
+        return True
+    word = m.group(1)
+    if len(word) == 1 and word.isupper():
+        return False  # initial, e.g. "J. Smith"
+    if word.lower().rstrip(".") in ABBREVIATIONS:
+        return False
+    return True
+
+
+def _segment(text: str, semicolons: bool) -> List[Span]:
+    spans: List[Span] = []
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        if m.group(1) == ";" and not semicolons:
+            continue
+        if not _is_boundary(text, m.start(1), m.end()):
+            continue
+        spans.append((start, m.end()))
+        start = m.end()
+    spans.append((start, len(text)))
+
+    # Trim whitespace so each span covers exactly the sentence text
+    out: List[Span] = []
+    for s, e in spans:
+        segment = text[s:e]
+        stripped = segment.strip()
+        if stripped:
+            s += len(segment) - len(segment.lstrip())
+            out.append((s, s + len(stripped)))
+    return out
+
+
+def sentence_spans(text: str, semicolons: bool = False) -> List[Span]:
+    """
+    (start, end) offsets of every sentence in text, whitespace-trimmed.
+    semicolons=True also splits clauses at ";" (obligation extraction).
+    """
+    if not text:
+        return []
+    key = (hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest(), semicolons)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            _CACHE.move_to_end(key)
+            return cached
+
+    spans = _segment(text, semicolons)
+    with _CACHE_LOCK:
+        _CACHE[key] = spans
+        while len(_CACHE) > SEGMENT_CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return spans
+
+
+def split_sentences(text: str, semicolons: bool = False) -> List[str]:
+    """Sentence strings of text (see sentence_spans)."""
+    return [text[s:e] for s, e in sentence_spans(text, semicolons)]
+
+
+def group_spans(spans: List[Span], size: int) -> List[List[Span]]:
+    """Consecutive groups of up to size sentence spans (chunking)."""
+    size = max(1, size)
+    return [spans[i:i + size] for i in range(0, len(spans), size)]
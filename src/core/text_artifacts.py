@@ -0,0 +1,175 @@
+# src/core/text_artifacts.py
+"""
+Extracted-text artifacts, one per file content hash.
+
+A PDF is parsed once (via pdf_extraction) and the result is stored as a
+gzip-compressed JSON file under TEXT_ARTIFACT_DIR:
+
+    {
+      "version": 1,
+      "sha256": "...",
+      "engine": "pymupdf",
+      "stats": {...},                 # extraction timings
+      "pages": [[start, end], ...],   # char offsets of each page in "text"
+      "text": "page 1\npage 2..."     # pages joined with PAGE_SEPARATOR
+    }
+
+FileHub upload, audits, metadata extraction and RAG chunking all read the
+artifact instead of re-parsing the PDF. Concurrent requests for the same
+hash wait on a per-hash lock so the file is still parsed only once.
+Extractions that yield no text are returned but not stored, so a failed
+parse is retried on the next request.
+"""
+import os
+import gzip
+import json
+import bisect
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.core.pdf_extraction import iter_pdf_pages
+
+TEXT_ARTIFACT_DIR = os.getenv("TEXT_ARTIFACT_DIR", os.path.join("data", "text_artifacts"))
+ARTIFACT_VERSION = 1
+PAGE_SEPARATOR = "\n"
+
+# content hash -> (lock, number of callers using it); dropped when unused
+_LOCKS: Dict[str, Tuple[threading.Lock, int]] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+class TextArtifact:
+    """Extracted text of one document plus its page map."""
+
+    def __init__(self, content_hash: str, text: str, pages: List[Tuple[int, int]],
+                 engine: Optional[str] = None, stats: Optional[Dict[str, Any]] = None):
+        self.content_hash = content_hash
+        self.text = text
+        self.pages = [tuple(p) for p in pages]
+        self.engine = engine
+        self.stats = stats or {}
+        self._starts = [start for start, _ in self.pages]
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_texts(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.pages]
+
+    def joined(self, sep: str = PAGE_SEPARATOR) -> str:
+        """Page texts joined with sep (self.text when sep is the stored separator)."""
+        if sep == PAGE_SEPARATOR:
+            return self.text
+        return sep.join(self.page_texts())
+
+    def page_for_offset(self, offset: int) -> int:
+        """1-based page number containing a character offset into self.text."""
+        if not self.pages:
+            return 0
+        return max(1, bisect.bisect_right(self._starts, offset))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": ARTIFACT_VERSION,
+            "sha256": self.content_hash,
+            "engine": self.engine,
+            "stats": self.stats,
+            "pages": [list(p) for p in self.pages],
+            "text": self.text,
+        }
+
+
+def content_sha256(source: Union[str, bytes]) -> str:
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    from src.core.policy_index import file_sha256
+    return file_sha256(source)
+
+
+def artifact_path(content_hash: str) -> str:
+    return os.path.join(TEXT_ARTIFACT_DIR, content_hash[:2], f"{content_hash}.json.gz")
+
+
+@contextmanager
+def _locked(content_hash: str):
+    with _LOCKS_GUARD:
+        lock, users = _LOCKS.get(content_hash, (threading.Lock(), 0))
+        _LOCKS[content_hash] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _LOCKS_GUARD:
+            lock, users = _LOCKS[content_hash]
+            if users <= 1:
+                del _LOCKS[content_hash]
+            else:
+                _LOCKS[content_hash] = (lock, users - 1)
+
+
+def load_text_artifact(content_hash: str) -> Optional[TextArtifact]:
+    path = artifact_path(content_hash)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"[TextArtifact] Unreadable artifact {content_hash[:12]}, re-extracting: {e}")
+        return None
+    if data.get("version") != ARTIFACT_VERSION:
+        return None
+    return TextArtifact(content_hash, data["text"], data["pages"], data.get("engine"), data.get("stats"))
+
+
+def _save_text_artifact(artifact: TextArtifact) -> None:
+    path = artifact_path(artifact.content_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(artifact.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def _extract(source: Union[str, bytes], content_hash: str) -> TextArtifact:
+    stats: Dict[str, Any] = {}
+    parts: List[str] = []
+    pages: List[Tuple[int, int]] = []
+    offset = 0
+    for page in iter_pdf_pages(source, stats=stats):
+        if parts:
+            offset += len(PAGE_SEPARATOR)
+        parts.append(page["text"])
+        pages.append((offset, offset + len(page["text"])))
+        offset += len(page["text"])
+    # page_seconds is useful at parse time but bloats every artifact
+    stats.pop("page_seconds", None)
+    return TextArtifact(content_hash, PAGE_SEPARATOR.join(parts), pages, stats.get("engine"), stats)
+
+
+def get_text_artifact(source: Union[str, bytes], content_hash: Optional[str] = None) -> TextArtifact:
+    """
+    Return the text artifact for a PDF given as a path or raw bytes,
+    extracting and persisting it on first use.
+    """
+    content_hash = content_hash or content_sha256(source)
+    artifact = load_text_artifact(content_hash)
+    if artifact is not None:
+        return artifact
+
+    with _locked(content_hash):
+        artifact = load_text_artifact(content_hash)
+        if artifact is not None:
+            return artifact
+        artifact = _extract(source, content_hash)
+        if not artifact.pages or not artifact.text.strip():
+            print(f"[TextArtifact] No text extracted for {content_hash[:12]} "
+                  f"({artifact.engine}); not caching.")
+            return artifact
+        _save_text_artifact(artifact)
+        print(f"[TextArtifact] Stored {artifact.page_count} pages for {content_hash[:12]} "
+              f"({artifact.engine}, {artifact.stats.get('seconds', 0)}s).")
+        return artifact
@@ -0,0 +1,80 @@
+import pytest
+
+from src.core import chunking
+from src.core.chunking import token_chunks, token_batches, chunk_stats
+from src.core.segmentation import sentence_spans
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # ~4 characters per token, independent of whether tiktoken is installed
+    monkeypatch.setattr(chunking, "_encoder", lambda: None)
+
+
+def _sentences(n):
+    # each sentence is 39 characters = 10 estimated tokens
+    return " ".join(f"Sentence number {i:02d} is exactly 40 chars." for i in range(n))
+
+
+def test_chunks_respect_target_and_cover_the_text():
+    text = _sentences(12)
+    chunks = token_chunks(text, target_tokens=30, overlap_tokens=0, max_tokens=100)
+
+    assert [c["tokens"] for c in chunks] == [30, 30, 30, 30]
+    for c in chunks:
+        assert text[c["char_start"]:c["char_end"]] == c["text"]
+    assert chunks[0]["char_start"] == 0 and chunks[-1]["char_end"] == len(text)
+
+
+def test_overlap_repeats_trailing_sentences():
+    text = _sentences(10)
+    spans = sentence_spans(text)
+    chunks = token_chunks(text, target_tokens=40, overlap_tokens=10, max_tokens=100)
+
+    # every chunk after the first starts with the last sentence of the previous one
+    for prev, nxt in zip(chunks, chunks[1:]):
+        last = max(s for s, e in spans if e <= prev["char_end"])
+        assert nxt["char_start"] == last
+    assert chunks[-1]["char_end"] == len(text)
+
+
+def test_overlap_always_advances():
+    text = _sentences(6)
+    chunks = token_chunks(text, target_tokens=10, overlap_tokens=50, max_tokens=100)
+    starts = [c["char_start"] for c in chunks]
+    assert starts == sorted(set(starts))
+    assert len(chunks) == 6
+
+
+def test_long_sentences_are_split_on_words():
+    text = "word " * 200 + "end."
+    chunks = token_chunks(text, target_tokens=50, overlap_tokens=0, max_tokens=50)
+    assert len(chunks) > 1
+    assert all(c["tokens"] <= 50 for c in chunks)
+    assert all(not c["text"].startswith(" ") and not c["text"].endswith(" ") for c in chunks)
+
+
+def test_chunk_hash_depends_on_text_only():
+    a = token_chunks("Alpha beta. Gamma delta.", target_tokens=100)
+    b = token_chunks("Alpha beta. Gamma delta.", target_tokens=100)
+    assert a[0]["chunk_hash"] == b[0]["chunk_hash"]
+
+
+def test_batches_balance_tokens_and_keep_order():
+    chunks = [f"{i:03d}" + "x" * 397 for i in range(12)]  # 100 tokens each
+    batches = token_batches(chunks, max_batch_tokens=450, max_batch_size=64)
+    assert sum(batches, []) == chunks
+    assert [len(b) for b in batches] == [4, 4, 4]
+
+
+def test_batches_respect_batch_size_and_empty_input():
+    assert token_batches([]) == []
+    batches = token_batches(["a"] * 10, max_batch_tokens=10_000, max_batch_size=3)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+
+
+def test_chunk_stats():
+    stats = chunk_stats([{"text": "x", "tokens": 5}, {"text": "y", "tokens": 15}])
+    assert stats["chunks"] == 2 and stats["tokens"] == 20
+    assert stats["min_tokens"] == 5 and stats["max_tokens"] == 15 and stats["mean_tokens"] == 10.0
+    assert chunk_stats([])["chunks"] == 0
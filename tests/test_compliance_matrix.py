@@ -0,0 +1,45 @@
+import pytest
+
+from src.core import compliance_matrix
+from src.core.compliance_matrix import _merge, schedule_matrix_update
+
+
+def test_merge_semantics():
+    assert _merge(None, ["a"], first=True) == {"a"}
+    assert _merge({"a"}, ["b"], first=False) == {"a", "b"}
+    # None means "all": it absorbs any later or earlier subset
+    assert _merge({"a"}, None, first=False) is None
+    assert _merge(None, ["b"], first=False) is None
+
+
+@pytest.fixture
+def pending(monkeypatch):
+    monkeypatch.setattr(compliance_matrix, "MATRIX_ENABLED", True)
+    monkeypatch.setattr(compliance_matrix, "_pending", {})
+    # keep requests queued instead of letting the worker process them
+    monkeypatch.setattr(compliance_matrix, "_run", lambda: None)
+    monkeypatch.setattr(compliance_matrix, "_worker", None)
+    return compliance_matrix._pending
+
+
+def test_requests_for_one_user_coalesce(pending):
+    schedule_matrix_update("u1", file_ids=["f1"])
+    schedule_matrix_update("u1", file_ids=["f2"])
+    assert pending["u1"] == {"files": {"f1", "f2"}, "regulations": None}
+
+    schedule_matrix_update("u1", regulation_ids=["r1"])
+    assert pending["u1"] == {"files": None, "regulations": None}
+
+
+def test_users_are_queued_separately(pending):
+    schedule_matrix_update("u1", file_ids=["f1"], regulation_ids=["r1"])
+    schedule_matrix_update("u2", regulation_ids=["r2"], file_ids=[])
+    assert pending["u1"] == {"files": {"f1"}, "regulations": {"r1"}}
+    assert pending["u2"] == {"files": set(), "regulations": {"r2"}}
+
+
+def test_disabled_or_anonymous_updates_are_ignored(pending, monkeypatch):
+    schedule_matrix_update("", file_ids=["f1"])
+    monkeypatch.setattr(compliance_matrix, "MATRIX_ENABLED", False)
+    schedule_matrix_update("u1", file_ids=["f1"])
+    assert pending == {}
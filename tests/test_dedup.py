@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.core.dedup import dedup_chunks, minhash_signature
+
+BOILERPLATE = "This document is confidential and intended solely for internal use by Acme Corporation staff members"
+
+
+def test_identical_texts_have_identical_signatures():
+    assert np.array_equal(minhash_signature(BOILERPLATE), minhash_signature(BOILERPLATE.upper()))
+    assert np.mean(minhash_signature(BOILERPLATE) == minhash_signature("Completely different text about boilers")) < 0.2
+
+
+def test_near_duplicates_are_dropped_and_counted():
+    chunks = [
+        {"text": BOILERPLATE, "page": 1},
+        {"text": "Employees must report spills within 24 hours to the environmental team.", "page": 1},
+        {"text": BOILERPLATE + " staff", "page": 2},
+        {"text": BOILERPLATE, "page": 3},
+    ]
+    kept, stats = dedup_chunks(chunks, threshold=0.8, batch_size=2)
+
+    assert [c["page"] for c in kept] == [1, 1]
+    assert kept[0]["dup_count"] == 2
+    assert kept[1]["dup_count"] == 0
+    assert stats["chunks_in"] == 4 and stats["chunks_dropped"] == 2
+    assert stats["embedding_calls_saved"] == 1
+
+
+def test_distinct_chunks_are_kept_in_order():
+    chunks = [f"Requirement {i}: the facility shall monitor parameter {i * 7} every {i} days" for i in range(20)]
+    kept, stats = dedup_chunks(chunks, threshold=0.85)
+    assert kept == chunks
+    assert stats["dedup_ratio"] == 0.0
+
+
+def test_empty_input():
+    kept, stats = dedup_chunks([])
+    assert kept == [] and stats["chunks_in"] == 0 and stats["dedup_ratio"] == 0.0
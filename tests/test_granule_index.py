@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from src.core.regulations.gov_reg import granule_index, local_search
+
+GRANULES = {
+    "FR-1": [
+        {"granuleId": "a", "title": "Air emissions standards", "summary": "Final rule on boilers",
+         "agencyNames": ["Environmental Protection Agency"], "granuleClass": "RULE"},
+        {"granuleId": "b", "title": "Fishing quotas", "summary": "Mentions emission reporting once",
+         "agencyNames": ["Commerce Department"], "granuleClass": "NOTICE"},
+    ],
+    "FR-2": [
+        {"granuleId": "c", "title": "Water permits", "details": "emissions of water vapor into air",
+         "agencyNames": ["Environmental Protection Agency"], "granuleClass": "NOTICE"},
+    ],
+}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    granule_dir = tmp_path / "federal_granules"
+    granule_dir.mkdir()
+    package_file = tmp_path / "federal_packages.json"
+    package_file.write_text(json.dumps({"packages": [{"packageId": p} for p in GRANULES]}))
+    for package_id, granules in GRANULES.items():
+        (granule_dir / f"{package_id}.json").write_text(json.dumps(granules))
+
+    monkeypatch.setattr(local_search, "PACKAGE_FILE", str(package_file))
+    monkeypatch.setattr(local_search, "GRANULE_DIR", str(granule_dir))
+    monkeypatch.setattr(granule_index, "GRANULE_DIR", str(granule_dir))
+    monkeypatch.setattr(granule_index, "GRANULE_INDEX_DB", str(tmp_path / "granule_index.db"))
+    monkeypatch.setattr(granule_index, "_checked", False)
+    return tmp_path
+
+
+def _ids(results):
+    return [g["granuleId"] for g in results]
+
+
+def test_search_builds_index_and_ranks_title_matches_first(cache):
+    assert _ids(local_search.search_local_granules("emission")) == ["a", "b", "c"]
+    assert os.path.exists(granule_index.GRANULE_INDEX_DB)
+
+
+def test_all_terms_must_match(cache):
+    assert sorted(_ids(local_search.search_local_granules("air emissions"))) == ["a", "c"]
+    assert local_search.search_local_granules("air quotas") == []
+
+
+def test_filters_and_pagination(cache):
+    page = local_search.search_local_granules_page("emission", agency="environmental protection",
+                                                   granule_type="notice")
+    assert page["total"] == 1 and _ids(page["results"]) == ["c"]
+
+    page = local_search.search_local_granules_page("emission", limit=2, offset=1)
+    assert page["total"] == 3 and _ids(page["results"]) == ["b", "c"]
+
+
+def test_query_syntax_is_not_interpreted(cache):
+    assert local_search.search_local_granules('"); DROP TABLE granules; --') == []
+    assert local_search.search_local_granules("   ") == []
+    assert len(local_search.search_local_granules("emission")) == 3
+
+
+def test_rebuild_is_incremental_and_drops_uncached_packages(cache):
+    assert granule_index.build_granule_index()["indexed"] == 2
+    assert granule_index.build_granule_index()["unchanged"] == 2
+
+    (cache / "federal_packages.json").write_text(json.dumps({"packages": [{"packageId": "FR-1"}]}))
+    stats = granule_index.build_granule_index()
+    assert stats["dropped"] == 1
+    assert _ids(local_search.search_local_granules("water")) == []
+
+
+def test_falls_back_to_scan_without_fts5(cache, monkeypatch):
+    def no_fts5(*args, **kwargs):
+        raise sqlite3.OperationalError("no such module: fts5")
+
+    monkeypatch.setattr(granule_index, "search_granule_index", no_fts5)
+    page = local_search.search_local_granules_page("emission", agency="Environmental", limit=1)
+    # the scan matches the whole topic as a substring, in package order
+    assert page["total"] == 2 and _ids(page["results"]) == ["a"]
+    assert _ids(local_search.search_local_granules("emission", granule_type="rule")) == ["a"]
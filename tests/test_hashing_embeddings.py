@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.core.hashing_embeddings import HashingEmbedder, fit_hashing_model, hashed_counts
+
+CORPUS = [
+    "The facility shall monitor air emissions monthly.",
+    "Air emissions must be reported to the agency.",
+    "Employees shall complete safety training every year.",
+    "Training records are kept for three years.",
+    "Wastewater discharges require a permit.",
+]
+
+
+def test_hashed_counts_shape_and_counts():
+    x = hashed_counts(["a a", ""], dim=64)
+    assert x.shape == (2, 64)
+    assert x[1].nnz == 0
+    assert x[0].sum() > 0
+
+
+def test_unfitted_embeddings_are_normalized_and_deterministic(tmp_path):
+    embedder = HashingEmbedder(dim=256, model_path=str(tmp_path / "missing.npz"))
+    vectors = embedder.encode(CORPUS)
+    assert vectors.shape == (len(CORPUS), 256)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    assert np.array_equal(vectors, embedder.encode(CORPUS))
+    assert embedder.model_name == "hashing-tfidf-256-256-noidf"
+    assert embedder(["x"]) == embedder.encode(["x"]).tolist()
+
+
+def test_related_texts_score_higher():
+    embedder = HashingEmbedder(dim=1024, model_path=None)
+    v = embedder.encode(CORPUS)
+    sims = v @ v.T
+    assert sims[0, 1] > sims[0, 2]
+    assert sims[2, 3] > sims[2, 4]
+
+
+def test_fitted_model_changes_name_and_projects(tmp_path):
+    path = str(tmp_path / "model.npz")
+    info = fit_hashing_model(CORPUS, path=path, dim=256, svd_dim=3)
+    assert info == {"texts": len(CORPUS), "dim": 256, "svd_dim": 3}
+
+    embedder = HashingEmbedder(dim=256, model_path=path)
+    assert embedder.model_name.startswith("hashing-tfidf-256-3-")
+    assert not embedder.model_name.endswith("noidf")
+    vectors = embedder.encode(CORPUS)
+    assert vectors.shape == (len(CORPUS), 3)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_model_fitted_for_another_dim_is_ignored(tmp_path):
+    path = str(tmp_path / "model.npz")
+    fit_hashing_model(CORPUS, path=path, dim=128)
+    embedder = HashingEmbedder(dim=256, model_path=path)
+    assert embedder.fingerprint == "noidf"
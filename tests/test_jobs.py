@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.api.db import Base
+from src.api.models import ComplianceJob
+from src.core import jobs
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[ComplianceJob.__table__])
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(jobs, "_session", Session)
+    session = Session()
+    yield session
+    session.close()
+
+
+def _wait(db, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get_job(db, job_id)
+        db.expire_all()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_job_runs_to_success_with_partial_results(db):
+    def handler(payload, progress):
+        progress.set_total(len(payload["items"]))
+        for item in payload["items"]:
+            progress.add({"item": item})
+        return {"sum": sum(payload["items"])}
+
+    jobs.register_job_handler("test_sum", handler)
+    job_id = jobs.submit_job(db, "test_sum", {"items": [1, 2, 3]}, user_uid="u1")
+
+    job = _wait(db, job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"sum": 6}
+    assert job["progress"] == job["total"] == 3
+    assert [p["item"] for p in job["partial_results"]] == [1, 2, 3]
+    assert job["attempts"] == 1
+    assert job_id not in jobs._local_jobs
+
+
+def test_failing_handler_marks_job_failed(db):
+    def handler(payload, progress):
+        raise RuntimeError("boom")
+
+    jobs.register_job_handler("test_fail", handler)
+    job = _wait(db, jobs.submit_job(db, "test_fail", {}))
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+
+
+def test_unknown_kind_is_rejected(db):
+    with pytest.raises(ValueError):
+        jobs.submit_job(db, "no_such_kind", {})
+
+
+def test_resume_only_takes_over_stale_jobs(db, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(jobs, "_schedule", scheduled.append)
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+    db.add_all([
+        ComplianceJob(job_id="stale", kind="k", status="running", owner="gone", heartbeat_at=stale, attempts=1),
+        ComplianceJob(job_id="alive", kind="k", status="running", owner="sibling", heartbeat_at=now, attempts=1),
+        ComplianceJob(job_id="legacy", kind="k", status="queued", heartbeat_at=None),
+        ComplianceJob(job_id="exhausted", kind="k", status="running", owner="gone", heartbeat_at=stale,
+                      attempts=jobs.JOB_MAX_ATTEMPTS),
+        ComplianceJob(job_id="done", kind="k", status="succeeded", owner="gone", heartbeat_at=stale),
+    ])
+    db.commit()
+
+    assert jobs.resume_pending_jobs() == 2
+    assert sorted(scheduled) == ["legacy", "stale"]
+
+    db.expire_all()
+    rows = {j.job_id: j for j in db.query(ComplianceJob)}
+    assert rows["stale"].status == "queued" and rows["stale"].owner == jobs.WORKER_ID
+    assert rows["alive"].status == "running" and rows["alive"].owner == "sibling"
+    assert rows["exhausted"].status == "failed"
+    assert rows["done"].status == "succeeded"
+
+    # a second starting worker finds nothing left to take over
+    assert jobs.resume_pending_jobs() == 0
+
+
+def test_progress_from_a_replaced_owner_is_ignored(db):
+    db.add(ComplianceJob(job_id="j", kind="k", status="running", owner="other", heartbeat_at=datetime.utcnow()))
+    db.commit()
+    jobs._update_job("j", status="failed", error="late write")
+    db.expire_all()
+    job = db.query(ComplianceJob).filter_by(job_id="j").one()
+    assert job.status == "running" and job.error is None
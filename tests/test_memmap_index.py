@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from src.core import memmap_index
+from src.core.memmap_index import MemmapPolicyIndex, quantize
+from src.core.policy_index import AUDIT_CHUNK_VARIANT
+
+
+def _unit_rows(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    m = rng.normal(size=(n, dim)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype,tol", [("float16", 1e-3), ("int8", 1e-2)])
+def test_quantize_round_trip(dtype, tol):
+    m = _unit_rows(50, 16)
+    stored, scales = quantize(m, dtype)
+    restored = stored.astype(np.float32) * (scales[:, None] if scales is not None else 1.0)
+    assert np.abs(restored - m).max() < tol
+
+
+def _build(tmp_path, dtype, vectors):
+    # chunk i embeds to vectors[i]
+    index = MemmapPolicyIndex(
+        persist_dir=str(tmp_path), dtype=dtype, embedding_model="test",
+        embedding_function=lambda texts: [vectors[int(t.split()[1])] for t in texts],
+    )
+    collection, reused = index.get_or_build("doc", lambda: [f"chunk {i}" for i in range(len(vectors))])
+    assert not reused
+    return collection
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_blocked_top_k_matches_exact_scan(tmp_path, monkeypatch, dtype):
+    monkeypatch.setattr(memmap_index, "MEMMAP_SCORE_BLOCK", 7)
+    vectors = _unit_rows(40, 8, seed=1)
+    collection = _build(tmp_path, dtype, vectors)
+    queries = _unit_rows(3, 8, seed=2)
+
+    result = collection.query(query_embeddings=queries.tolist(), n_results=5)
+
+    # reference: one full scan over the stored (quantized) vectors
+    exact = queries @ collection.get(include=["embeddings"])["embeddings"].T
+    for q, ids in enumerate(result["ids"]):
+        expected = np.argsort(-exact[q])[:5]
+        assert [int(i.rsplit("-", 1)[1]) for i in ids] == expected.tolist()
+        assert result["distances"][q] == sorted(result["distances"][q])
+
+
+def test_get_dequantizes_only_requested_rows(tmp_path):
+    vectors = _unit_rows(10, 4, seed=3)
+    collection = _build(tmp_path, "int8", vectors)
+
+    subset = collection.get(ids=[collection.ids[7], collection.ids[2]], include=["embeddings", "documents"])
+    assert subset["documents"] == ["chunk 7", "chunk 2"]
+    assert subset["embeddings"].shape == (2, 4)
+    assert np.allclose(subset["embeddings"], vectors[[7, 2]], atol=1e-2)
+
+    everything = collection.get(include=["embeddings"])
+    assert everything["embeddings"].shape == (10, 4)
+
+
+def test_vectors_for_reads_audit_variant_by_chunk_hash(tmp_path):
+    vectors = _unit_rows(3, 4, seed=4)
+    index = MemmapPolicyIndex(
+        persist_dir=str(tmp_path), dtype="float16", embedding_model="test",
+        embedding_function=lambda texts: [vectors[int(t.split()[1])] for t in texts],
+    )
+    chunks = [{"text": f"chunk {i}", "chunk_hash": f"h{i}"} for i in range(3)]
+    index.get_or_build("doc", lambda: chunks, variant=AUDIT_CHUNK_VARIANT)
+
+    found = index.vectors_for("doc")
+    assert sorted(found) == ["h0", "h1", "h2"]
+    assert np.allclose(found["h1"], vectors[1], atol=1e-3)
+    assert index.vectors_for("doc", variant="other") == {}
+    assert np.allclose(index.embed(["chunk 2"])[0], vectors[2])
+
+
+def _save_entries(persist_dir, start):
+    index = MemmapPolicyIndex(persist_dir=persist_dir, dtype="float16", embedding_model="test",
+                              embedding_function=lambda texts: [[1.0, 0.0]] * len(texts))
+    for i in range(start, start + 20):
+        index._manifest[f"ns{i}"] = {"chunks": 1, "created_at": 0}
+        index._dirty.add(f"ns{i}")
+        index._save_manifest()
+
+
+def test_manifest_saves_from_several_processes_are_not_lost(tmp_path):
+    import json
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_save_entries, args=(str(tmp_path), k * 20)) for k in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    with open(tmp_path / "manifest.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == sorted(f"ns{i}" for i in range(80))
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.db import Base
+from src.api.models import AuditResultRecord
+from src.core.RAG import ComplianceChecker
+from src.core.result_store import save_audit_results, load_audit_results
+from src.core.regulation_embeddings import regulation_text_hash
+
+REGS = [{"Reg_ID": "R1", "Requirement_Text": "Keep records for five years."}]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[AuditResultRecord.__table__])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _result(chunk_hash, narrative="GAP SUMMARY: missing retention period"):
+    return {
+        "Reg_ID": "R1",
+        "Is_Compliant": False,
+        "Narrative_Gap": narrative,
+        "Evidence_Location": {"chunk_hash": chunk_hash},
+    }
+
+
+def _save(db, results, **kwargs):
+    return save_audit_results(db, "doc1", REGS, results, threshold=0.6, top_k=1,
+                              embedding_model="m:seg3-loc", **kwargs)
+
+
+def test_save_and_load_round_trip(db):
+    assert _save(db, [_result("c1")]) == 1
+
+    stored = load_audit_results(db, "doc1", 0.6, 1, "m:seg3-loc")
+    entry = stored[regulation_text_hash(REGS[0]["Requirement_Text"])]
+    assert entry["evidence_hashes"] == "c1"
+    assert entry["results"][0]["Narrative_Gap"].startswith("GAP SUMMARY")
+
+    # another configuration sees nothing
+    assert load_audit_results(db, "doc1", 0.7, 1, "m:seg3-loc") == {}
+    assert load_audit_results(db, None, 0.6, 1, "m:seg3-loc") == {}
+
+
+def test_resaving_replaces_the_row(db):
+    _save(db, [_result("c1")], file_id="f1")
+    _save(db, [_result("c2")], file_id="f2")
+
+    rows = db.query(AuditResultRecord).all()
+    assert len(rows) == 1
+    assert rows[0].file_id == "f2"
+    stored = load_audit_results(db, "doc1", 0.6, 1, "m:seg3-loc")
+    assert list(stored.values())[0]["evidence_hashes"] == "c2"
+
+
+def _checker(previous):
+    checker = ComplianceChecker.__new__(ComplianceChecker)
+    checker.previous_results = previous
+    checker.stage_timings = {"carried_forward": 0}
+    return checker
+
+
+def test_carry_forward_only_when_evidence_is_unchanged(db):
+    _save(db, [_result("c1")])
+    checker = _checker(load_audit_results(db, "doc1", 0.6, 1, "m:seg3-loc"))
+    text = REGS[0]["Requirement_Text"]
+
+    assert checker._carried_forward_narratives(text, [_result("c1", None)]) == [
+        "GAP SUMMARY: missing retention period"
+    ]
+    assert checker._carried_forward_narratives(text, [_result("c9", None)]) is None
+    assert checker.stage_timings["carried_forward"] == 1
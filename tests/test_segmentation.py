@@ -0,0 +1,43 @@
+from src.core.segmentation import sentence_spans, split_sentences, group_spans
+
+
+def test_splits_on_terminators_and_trims_whitespace():
+    text = "  First sentence. Second one?  Third!\n"
+    assert split_sentences(text) == ["First sentence.", "Second one?", "Third!"]
+    for s, e in sentence_spans(text):
+        assert text[s:e] == text[s:e].strip()
+
+
+def test_abbreviations_and_initials_do_not_end_sentences():
+    text = "See 40 C.F.R. Part 60 and U.S. law, e.g. Sec. 5. Contact J. Smith at Acme Inc. Today."
+    assert split_sentences(text) == [
+        "See 40 C.F.R. Part 60 and U.S. law, e.g. Sec. 5.",
+        "Contact J. Smith at Acme Inc. Today.",
+    ]
+
+
+def test_lowercase_continuation_is_not_a_boundary():
+    assert split_sentences("It takes approx. five days. Done.") == ["It takes approx. five days.", "Done."]
+
+
+def test_semicolons_split_only_when_requested():
+    text = "The operator shall keep logs; Operators shall report leaks; and retain them."
+    assert len(split_sentences(text)) == 1
+    # like the old obligation split, a lowercase continuation stays in the clause
+    assert split_sentences(text, semicolons=True) == [
+        "The operator shall keep logs;",
+        "Operators shall report leaks; and retain them.",
+    ]
+
+
+def test_cached_spans_are_stable_and_empty_text_has_none():
+    text = "One. Two. Three."
+    assert sentence_spans(text) == sentence_spans(text)
+    assert sentence_spans("") == []
+    assert sentence_spans("   ") == []
+
+
+def test_group_spans():
+    spans = [(0, 1), (2, 3), (4, 5), (6, 7)]
+    assert group_spans(spans, 3) == [[(0, 1), (2, 3), (4, 5)], [(6, 7)]]
+    assert group_spans(spans, 0) == [[s] for s in spans]
@@ -0,0 +1,36 @@
+from src.core import text_artifacts
+
+
+def _fake_pages(pages):
+    def iter_pdf_pages(source, stats=None):
+        stats["engine"] = "fake"
+        for text in pages:
+            yield {"text": text}
+    return iter_pdf_pages
+
+
+def test_artifact_is_stored_with_page_map(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_artifacts, "TEXT_ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(text_artifacts, "iter_pdf_pages", _fake_pages(["first page", "second page"]))
+
+    artifact = text_artifacts.get_text_artifact(b"pdf", "a" * 64)
+    assert artifact.page_texts() == ["first page", "second page"]
+    assert artifact.page_for_offset(artifact.text.index("second")) == 2
+
+    stored = text_artifacts.load_text_artifact("a" * 64)
+    assert stored is not None and stored.text == artifact.text
+    assert text_artifacts._LOCKS == {}
+
+
+def test_empty_extraction_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_artifacts, "TEXT_ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(text_artifacts, "iter_pdf_pages", _fake_pages(["  ", ""]))
+
+    artifact = text_artifacts.get_text_artifact(b"pdf", "b" * 64)
+    assert artifact.text.strip() == ""
+    assert text_artifacts.load_text_artifact("b" * 64) is None
+
+    # a later successful parse is stored
+    monkeypatch.setattr(text_artifacts, "iter_pdf_pages", _fake_pages(["recovered"]))
+    assert text_artifacts.get_text_artifact(b"pdf", "b" * 64).text == "recovered"
+    assert text_artifacts.load_text_artifact("b" * 64) is not None